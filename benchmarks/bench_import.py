@@ -0,0 +1,93 @@
+'''
+Benchmark of the import time of the translations
+
+ogr2osm imports the translation once per run, and runs on single map sheets
+or tiles are short enough for the import to show in their wall time. Each
+translation is imported REPEAT times, each time in a fresh interpreter which
+has already imported what ogr2osm imports before loading the translation:
+geom, osgeo.ogr and logging. Reports the fastest and the median import time.
+
+With --source the translation is compiled from source instead of being read
+from its bytecode cache, as on a read-only checkout. With --importtime the
+python -X importtime lines of the modules imported by the last import of
+each translation are printed (Python 3.7 and later).
+
+Needs the ogr2osm geom module and GDAL's osgeo package, run with the ogr2osm
+directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_import.py [-r REPEAT] [--source] [--importtime]
+           [TRANSLATION...]
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSLATIONS = ['mtk-gml.py', 'uvmtrans.py', 'databc_ta_municip.py', 'langleyroad.py',
+                'layer.py', 'surreyroad.py']
+
+
+def worker(translation, source):
+    """Import translation, print the seconds taken."""
+    sys.path.insert(0, ROOT)
+    import geom
+    import logging
+    from osgeo import ogr
+
+    path = os.path.join(ROOT, translation)
+    start = time.time()
+    if source:
+        with open(path, 'rb') as f:
+            code = compile(f.read(), path, 'exec')
+        exec(code, {'__name__': 'translation', '__file__': path})
+    else:
+        from common import compat
+        compat.load_source('translation', path)
+    sys.stdout.write('%f\n' % (time.time() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the import of the translations.')
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('--source', action='store_true',
+                        help='Compile the translations, do not use the bytecode cache')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Print the -X importtime lines of the last import')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('translations', nargs='*')
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.worker, args.source)
+        return
+
+    for translation in args.translations or TRANSLATIONS:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', translation]
+        if args.source:
+            command.append('--source')
+        # Write the bytecode caches before timing
+        subprocess.check_output(command)
+        times = []
+        for n in range(args.repeat):
+            if args.importtime and n == args.repeat - 1:
+                command[1:1] = ['-X', 'importtime']
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            (out, err) = process.communicate()
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, command, err)
+            times.append(float(out))
+        times.sort()
+        sys.stdout.write('%-22s min %6.1f ms  median %6.1f ms\n'
+                         % (translation, 1000 * times[0], 1000 * times[len(times) // 2]))
+        if args.importtime:
+            # Lines from the import of the translation on, indented by depth
+            lines = err.decode('utf-8').splitlines()
+            first = [i for (i, line) in enumerate(lines) if line.endswith('| osgeo.ogr')]
+            for line in lines[first[-1] + 1 if first else 0:]:
+                sys.stdout.write('    %s\n' % line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+'''
+Benchmark of the translations on different Python interpreters
+
+Runs the records of the regression corpus, regression/corpus.jsonl, through
+their translations REPEAT times under each of the given interpreters and
+reports the records translated per second. The tag functions are dominated
+by dict and string handling, the part of a run which changes most between
+interpreter versions.
+
+Needs the ogr2osm geom module and GDAL's osgeo package for every interpreter,
+run with the ogr2osm directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_interpreters.py [-r REPEAT] INTERPRETER...
+  e.g. python benchmarks/bench_interpreters.py python2.7 python3.11
+'''
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(repeat):
+    """Translate the corpus repeat times, print the records per second."""
+    sys.path.insert(0, ROOT)
+    import logging
+    from common import compat
+
+    logging.disable(logging.WARNING)
+    check = compat.load_source('regression_check', os.path.join(ROOT, 'regression', 'check.py'))
+    with io.open(os.path.join(ROOT, 'regression', 'corpus.jsonl'), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    modules = dict((r['translation'], check.load(r['translation'])) for r in records)
+
+    start = time.time()
+    for n in range(repeat):
+        for record in records:
+            check.run(modules[record['translation']], record)
+    elapsed = time.time() - start
+    sys.stdout.write('%d %f\n' % (repeat * len(records), elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare translation speed of interpreters.')
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('interpreters', nargs='*')
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.repeat)
+        return
+
+    for interpreter in args.interpreters or [sys.executable]:
+        output = subprocess.check_output([interpreter, os.path.abspath(__file__),
+                                          '--worker', '-r', str(args.repeat)])
+        (records, elapsed) = output.decode('ascii').split()
+        sys.stdout.write('%-30s %8d records %6.2f s %9.0f records/s\n'
+                         % (interpreter, int(records), float(elapsed),
+                            int(records) / float(elapsed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# coding=utf-8
+'''
+Benchmark of the mtk-gml.py name tags
+
+Builds a synthetic Tieviiva layer of a Lapland map sheet in Inari, where most
+roads have Finnish and Inari, Skolt and Northern Sámi names, and computes the
+name tags of every feature with mtk_nimet(). For comparison the previous
+name lookup, which tried the nimi_* fields by name through fget() and kept
+the first one, and the same lookup extended to all five fields are timed on
+the same features.
+
+Needs the ogr2osm geom module and GDAL's osgeo package, run with the ogr2osm
+directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_names.py [FEATURES]
+'''
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import compat
+
+mtk = compat.load_source('mtk_gml', os.path.join(ROOT, 'mtk-gml.py'))
+
+FIELDS = ['kohdeluokka', 'kuntatunnus', 'tasosijainti', 'paallyste', 'yksisuuntaisuus',
+          'nimi_suomi', 'nimi_ruotsi', 'nimi_inarinsaame', 'nimi_koltansaame',
+          'nimi_pohjoissaame']
+NAMES = [
+    (u'Ivalontie', u'Avveel kiäinu', u'Avvil kiõtt', u'Avvila geaidnu'),
+    (u'Menesjärventie', u'Menišjävri kiäinu', None, u'Menešjávrri geaidnu'),
+    (u'Sevettijärventie', None, u'Čeʹvetjääuʹrr kiõtt', u'Čevetjávrri geaidnu'),
+    (u'Nellimintie', u'Njellim kiäinu', u'Njeeʹllem kiõtt', u'Njellima geaidnu'),
+]
+
+
+class Defn(object):
+    """An OGR layer or field definition stand-in."""
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+    def GetFieldCount(self):
+        return len(FIELDS)
+
+    def GetFieldDefn(self, i):
+        return Defn(FIELDS[i])
+
+    def GetFieldIndex(self, name):
+        return FIELDS.index(name) if name in FIELDS else -1
+
+
+DEFN = Defn('Tieviiva')
+
+
+class Feature(object):
+    """An OGR feature stand-in, fields looked up by name like osgeo does."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def GetField(self, i):
+        return self.values[i]
+
+    def __getitem__(self, name):
+        i = DEFN.GetFieldIndex(name)
+        if i < 0:
+            raise ValueError(name)
+        return self.GetField(i)
+
+
+def sheet(count):
+    rnd = random.Random(1)
+    features = []
+    for n in range(count):
+        names = rnd.choice(NAMES) if rnd.random() < 0.8 else (None,) * 4
+        # OGR returns strings as UTF-8 bytes on Python 2
+        names = [s.encode('utf-8') if s is not None and str is bytes else s for s in names]
+        values = [12131, 148, 0, 1, 0, names[0], None] + names[1:]
+        features.append(Feature(values))
+    return features
+
+
+def getnimi(f):
+    """The name lookup mtk_nimet() replaced."""
+    nimi = None
+    for lang in mtk.NIMI_FEATS:
+        nimi = mtk.fget(f, lang)
+        if nimi:
+            nimi = mtk.ustr(nimi)
+            break
+    return nimi
+
+
+def getnimet(f):
+    """All name:<lang> tags through the previous fget() and ustr() calls."""
+    tags = {}
+    for (field, lang) in mtk.NIMI_LANGS:
+        nimi = mtk.fget(f, field)
+        if nimi:
+            tags['name:' + lang] = mtk.ustr(nimi)
+    return tags
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    features = sheet(count)
+    mtk.mtk_kentat(DEFN)
+
+    start = time.time()
+    for f in features:
+        getnimi(f)
+    old = time.time() - start
+
+    start = time.time()
+    for f in features:
+        getnimet(f)
+    oldall = time.time() - start
+
+    start = time.time()
+    tags = 0
+    for f in features:
+        tags += len(mtk.mtk_nimet(f))
+    new = time.time() - start
+
+    sys.stdout.write('%d features, %d name tags\n' % (count, tags))
+    sys.stdout.write('fget, first name only  %.2f s\n' % old)
+    sys.stdout.write('fget, all names        %.2f s\n' % oldall)
+    sys.stdout.write('mtk_nimet, all names   %.2f s (%.1fx)\n' % (new, oldall / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+'''
+Benchmark of per-feature and batched reprojection
+
+Builds a synthetic address file of N points in NAD83 / UTM zone 10N
+(EPSG:26910), spread over Surrey, one feature per point as
+surrey/addresses.py gets them. Reprojects them to WGS84 once per feature,
+as ogr2osm does, and once with reproject.reproject(), and reports the
+times and the largest difference between the two results.
+
+The per-feature run uses OGR Transform() calls when GDAL's osgeo package
+has osr, and pyproj calls of one point otherwise. Needs the ogr2osm geom
+module, NumPy and pyproj, run with the ogr2osm directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_reproject.py [N]
+'''
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geom
+from common import reproject
+
+CRS = 'EPSG:26910'
+# Extent of Surrey in CRS
+EXTENT = (500000.0, 5435000.0, 520000.0, 5450000.0)
+
+
+def addresses(n):
+    random.seed(0)
+    (minx, miny, maxx, maxy) = EXTENT
+    points = []
+    for i in range(n):
+        point = geom.Point(random.uniform(minx, maxx), random.uniform(miny, maxy))
+        feature = geom.Feature()
+        feature.geometry = point
+        point.addparent(feature)
+        feature.tags = {'addr:housenumber': '%d' % (10000 + i % 9000),
+                        'addr:street': '%d Avenue' % (i % 120), 'addr:city': 'Surrey'}
+        points.append(point)
+    return points
+
+
+def per_feature(coords):
+    """Return coords reprojected one at a time, and the method used."""
+    try:
+        from osgeo import ogr, osr
+        source = osr.SpatialReference()
+        source.ImportFromEPSG(26910)
+        target = osr.SpatialReference()
+        target.ImportFromEPSG(4326)
+        if hasattr(osr, 'OAMS_TRADITIONAL_GIS_ORDER'):
+            target.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        transform = osr.CoordinateTransformation(source, target)
+    except (ImportError, AttributeError):
+        t = reproject.transformer(CRS)
+        return ([t.transform(x, y) for (x, y) in coords], 'pyproj per point')
+    result = []
+    for (x, y) in coords:
+        g = ogr.Geometry(ogr.wkbPoint)
+        g.AddPoint_2D(x, y)
+        g.Transform(transform)
+        result.append((g.GetX(), g.GetY()))
+    return (result, 'OGR Transform() per feature')
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    points = addresses(n)
+    coords = [(p.x, p.y) for p in points]
+    reproject.transformer(CRS)
+
+    start = time.time()
+    (single, method) = per_feature(coords)
+    single_time = time.time() - start
+
+    start = time.time()
+    reproject.reproject(geom.Geometry.geometries, CRS)
+    batch_time = time.time() - start
+
+    difference = max(max(abs(p.x - x), abs(p.y - y)) for (p, (x, y)) in zip(points, single))
+    sys.stdout.write('%d points: %s %.2f s, batched %.2f s (%.1fx), '
+                     'largest difference %.1e degrees\n'
+                     % (n, method, single_time, batch_time, single_time / batch_time, difference))
+
+
+if __name__ == '__main__':
+    main()
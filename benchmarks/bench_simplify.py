@@ -0,0 +1,95 @@
+'''
+Benchmark of the simplification and quantisation stage
+
+Builds a synthetic sheet of GRID x GRID adjacent areas whose wavy shared
+borders carry a vertex every 2 m with sub-metre survey noise, as MTK swamp
+and forest borders do. Reports the node count and the size of the OSM XML output
+before and after simplify.simplify() and simplify.quantise().
+
+Needs the ogr2osm geom module, run with the ogr2osm directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_simplify.py [GRID]
+'''
+
+import os
+import math
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geom
+from common import simplify, sink
+
+# Vertices per area side, and the area side length in degrees (~200 m)
+VERTICES = 100
+SIDE = 0.002
+TOLERANCE = 2.0
+
+
+def sheet(grid):
+    random.seed(0)
+    noise = 0.3 / 111320.0
+    wave = 20.0 / 111320.0
+    nodes = {}
+
+    def node(i, j):
+        p = nodes.get((i, j))
+        if p is None:
+            x = 25.0 + i * SIDE / VERTICES + 2 * wave * math.sin(j * 0.1)
+            y = 60.0 + j * SIDE / VERTICES / 2 + wave * math.sin(i * 0.1)
+            p = nodes[(i, j)] = geom.Point(x + random.uniform(-noise, noise),
+                                           y + random.uniform(-noise, noise))
+        return p
+
+    features = []
+    for gx in range(grid):
+        for gy in range(grid):
+            (x0, y0) = (gx * VERTICES, gy * VERTICES)
+            ring = ([node(x0 + k, y0) for k in range(VERTICES)]
+                    + [node(x0 + VERTICES, y0 + k) for k in range(VERTICES)]
+                    + [node(x0 + VERTICES - k, y0 + VERTICES) for k in range(VERTICES)]
+                    + [node(x0, y0 + VERTICES - k) for k in range(VERTICES)])
+            way = geom.Way()
+            way.points = ring + [ring[0]]
+            for p in ring:
+                p.addparent(way)
+            feature = geom.Feature()
+            feature.geometry = way
+            way.addparent(feature)
+            feature.tags = {'natural': 'wetland', 'source': 'MTK_2013'}
+            features.append(feature)
+    return features
+
+
+def size(geometries, features):
+    (fd, path) = tempfile.mkstemp(suffix='.osm')
+    os.close(fd)
+    s = sink.XmlSink(path)
+    sink.write(geometries, features, s)
+    s.close()
+    result = os.path.getsize(path)
+    os.remove(path)
+    return result
+
+
+def main():
+    grid = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    features = sheet(grid)
+    geometries = geom.Geometry.geometries
+    nodes = len([g for g in geometries if type(g) is geom.Point])
+    bytes = size(geometries, features)
+    start = time.time()
+    simplify.simplify(geometries, features, dict((f, TOLERANCE) for f in features))
+    simplify.quantise(geometries)
+    elapsed = time.time() - start
+    sys.stdout.write('%d areas: %d -> %d nodes, %d -> %d bytes in %.2f s\n'
+                     % (len(features), nodes,
+                        len([g for g in geometries if type(g) is geom.Point]),
+                        bytes, size(geometries, features), elapsed))
+
+
+if __name__ == '__main__':
+    main()
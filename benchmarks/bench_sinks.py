@@ -0,0 +1,45 @@
+'''
+Benchmark of the XML and PBF output sinks
+
+Writes a synthetic data set of tagged ways of 10 nodes each with both sinks
+and reports the write time and file size.
+
+Usage: python benchmarks/bench_sinks.py [NODES]
+'''
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import sink
+
+
+def write(s, nodes):
+    for i in range(nodes):
+        s.node(-1 - i, 60.0 + (i // 1000) * 0.0001, 24.0 + (i % 1000) * 0.0001)
+    for i in range(nodes // 10):
+        refs = [-1 - j for j in range(i * 10, i * 10 + 10)]
+        s.way(-nodes - 1 - i, refs, {'highway': 'residential', 'source': 'MTK_2013',
+                                     'name': 'Katu %d' % (i % 500)})
+    s.close()
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tmpdir = tempfile.mkdtemp()
+    for name in ('bench.osm', 'bench.osm.pbf'):
+        path = os.path.join(tmpdir, name)
+        start = time.time()
+        write(sink.open_sink(path), nodes)
+        elapsed = time.time() - start
+        size = os.path.getsize(path)
+        os.remove(path)
+        sys.stdout.write('%-14s %d nodes: %6.2f s %10d bytes\n' % (name, nodes, elapsed, size))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+'''
+Benchmark of the road segment stitching stage
+
+Builds a synthetic region of SHEETS x SHEETS map sheets crossed by straight
+roads, each cut into one segment per sheet with address interpolation end
+nodes, and stitches it with common/stitch.py. Reports the way and feature
+counts before and after, and the time taken.
+
+Needs the ogr2osm geom module, run with the ogr2osm directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_stitch.py [SHEETS]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geom
+from common import stitch
+
+# Roads crossing each sheet in both directions, and vertices per segment
+ROADS = 50
+VERTICES = 10
+
+
+def region(sheets):
+    points = {}
+
+    def point(x, y):
+        p = points.get((x, y))
+        if p is None:
+            p = points[(x, y)] = geom.Point(x, y)
+        return p
+
+    roads = []
+    interpolations = {}
+    for road in range(sheets * ROADS):
+        number = 1
+        for sheet in range(sheets):
+            way = geom.Way()
+            for v in range(VERTICES + 1):
+                along = sheet * VERTICES + v
+                if road % 2:
+                    way.points.append(point(along, road * 1000))
+                else:
+                    way.points.append(point(road * 1000, along))
+            for p in way.points:
+                p.addparent(way)
+            feature = geom.Feature()
+            feature.geometry = way
+            way.addparent(feature)
+            feature.tags = {'highway': 'residential', 'name': 'Tie %d' % road,
+                            'addr:interpolation': 'all', 'source': 'MTK_2013'}
+            ends = []
+            for (p, n) in ((way.points[0], number), (way.points[-1], number + 8)):
+                f = geom.Feature()
+                f.geometry = p
+                f.tags = {'addr:housenumber': str(n)}
+                ends.append(f)
+            number += 10
+            interpolations[feature] = ends
+            roads.append(feature)
+    return (roads, interpolations)
+
+
+def main():
+    sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    (roads, interpolations) = region(sheets)
+    geometries = geom.Geometry.geometries
+    features = geom.Feature.features
+    ways = len([g for g in geometries if isinstance(g, geom.Way)])
+    count = len(features)
+    start = time.time()
+    stitch.stitch(geometries, features, roads, interpolations)
+    elapsed = time.time() - start
+    sys.stdout.write('%d sheets: %d -> %d ways, %d -> %d features in %.2f s\n'
+                     % (sheets * sheets, ways,
+                        len([g for g in geometries if isinstance(g, geom.Way)]),
+                        count, len(features), elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+'''
+Benchmark of the mtk-gml.py tag cache
+
+Computes the tags of a synthetic stream of MTK road and point features, whose
+attributes repeat like those of a map sheet, through mtk_tags() once with
+the cache turned off, as OGR2OSM_TAGCACHE=0 does, and once with it on.
+Reports the time taken by both and the cache hit rate.
+
+Needs the ogr2osm geom module and GDAL's osgeo package, run with the ogr2osm
+directory on PYTHONPATH.
+
+Usage: python benchmarks/bench_tagcache.py [FEATURES]
+'''
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import compat
+
+mtk = compat.load_source('mtk_gml', os.path.join(ROOT, 'mtk-gml.py'))
+
+# Distinct street names on a sheet
+NAMES = 300
+ROADS = [12121, 12122, 12131, 12132, 12141, 12313, 12314, 12316]
+POINTS = [52210, 54210, 95100, 36291]
+NIMI_OTHER = ['nimi_ruotsi', 'nimi_inarinsaame', 'nimi_koltansaame', 'nimi_pohjoissaame']
+FIELDS = ['kohdeluokka', 'paallyste', 'tasosijainti', 'yksisuuntaisuus', 'teksti',
+          'korkeusarvo', 'nimi_suomi'] + NIMI_OTHER
+
+
+class Attrs(dict):
+    """An ogrfeature stand-in, raising ValueError for missing fields."""
+
+    def __getitem__(self, key):
+        try:
+            return dict.__getitem__(self, key)
+        except KeyError:
+            raise ValueError(key)
+
+    def GetField(self, i):
+        return self.get(FIELDS[i])
+
+
+class Defn(object):
+    """A layer definition stand-in for the fields in FIELDS."""
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+    def GetFieldCount(self):
+        return len(FIELDS)
+
+    def GetFieldDefn(self, i):
+        return Defn(FIELDS[i])
+
+
+def stream(count, unique=False):
+    """
+    Return count attribute dicts, roads of NAMES streets and text points.
+
+    With unique set every road segment gets a name of its own.
+    """
+    rnd = random.Random(1)
+    streets = []
+    for i in range(NAMES):
+        streets.append(dict(kohdeluokka=rnd.choice(ROADS), paallyste=rnd.choice([0, 1, 2]),
+                            yksisuuntaisuus=rnd.choice([0, 0, 0, 1]),
+                            nimi_suomi='Katu %d' % i if rnd.random() < 0.8 else None))
+    features = []
+    for i in range(count):
+        if rnd.random() < 0.7:
+            # Segments of a street differ only where it crosses a bridge
+            attrs = Attrs(rnd.choice(streets))
+            attrs['tasosijainti'] = 1 if rnd.random() < 0.05 else 0
+            if unique:
+                attrs['nimi_suomi'] = 'Tie %d' % i
+            for key in NIMI_OTHER:
+                attrs[key] = None
+        else:
+            attrs = Attrs(kohdeluokka=rnd.choice(POINTS), teksti=str(rnd.randrange(50)),
+                          korkeusarvo=rnd.randrange(100) * 1000)
+        features.append(attrs)
+    return features
+
+
+def table(kohdeluokka):
+    return mtk.mtk_luokka(kohdeluokka)
+
+
+def measure(features):
+    """Return the seconds taken without and with the cache, and the hit rate."""
+    mtk.cachetags = False
+    start = time.time()
+    for o in features:
+        k = o['kohdeluokka']
+        mtk.mtk_tags(table(k), k, o)
+    plain = time.time() - start
+
+    mtk.tagcache.clear()
+    mtk.cachetags = True
+    start = time.time()
+    for o in features:
+        k = o['kohdeluokka']
+        mtk.mtk_tags(table(k), k, o)
+    cached = time.time() - start
+    return (plain, cached, mtk.tagcache.hitrate())
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    mtk.mtk_kentat(Defn())
+    for (label, unique) in (('streets', False), ('unique names', True)):
+        (plain, cached, hitrate) = measure(stream(count, unique))
+        sys.stdout.write('%-12s %d features: uncached %.2f s, cached %.2f s (%.1fx), '
+                         'hit rate %.1f %%\n'
+                         % (label, count, plain, cached, plain / cached, 100.0 * hitrate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+'''
+Micro-benchmark of the TIGER FIPS tags with table lookups
+
+Runs tiger.fips.fips_tags over a feature of each county in fips.dat, in
+state order like a national county file, and compares it to the
+string-building function it replaced.
+
+Usage: python benchmarks/bench_tiger_fips.py
+'''
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiger import fips, fipstable
+
+
+def fips_tags_strings(attrs, fields, tags=None):
+    """fips_tags before the FIPS table, for comparison."""
+    if tags is None:
+        tags = {}
+    if 'STATEFP' in attrs:
+        tags['nist:state_fips'] = attrs['STATEFP']
+        code = fips.fips_code(attrs, fields)
+        if code:
+            tags['nist:fips_code'] = code
+    return tags
+
+
+def county_features():
+    features = []
+    for (key, name) in fipstable.read_table():
+        if key % 1000 == 0:
+            continue
+        features.append({
+            'STATEFP': '%02d' % (key // 1000),
+            'COUNTYFP': '%03d' % (key % 1000),
+            'NAME': name,
+            'NAMELSAD': name,
+        })
+    return features
+
+
+def run(function, features):
+    for attrs in features:
+        function(attrs, fips.COUNTY_FIELDS, {})
+
+
+def main():
+    features = county_features()
+    repeat = 1000
+    for (label, function) in (('strings', fips_tags_strings),
+                              ('fips table', fips.fips_tags)):
+        best = min(timeit.repeat(lambda: run(function, features), number=1, repeat=repeat))
+        sys.stdout.write('%-12s %d features: %.2f ms\n' % (label, len(features), best * 1000.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+'''
+A translation function running several translations in one pass
+
+The translations are named in the OGR2OSM_CHAIN environment variable, for
+example layer,surreyroad to add the __LAYER field before the Surrey roads
+translation. See common.chain.
+'''
+
+from common import chain
+
+globals().update(chain.hooks())
@@ -0,0 +1,93 @@
+'''
+Chaining of translations
+
+Runs several translation modules in one ogr2osm pass, for example layer.py,
+which adds the __LAYER field, in front of surreyroad.py, instead of a
+separate pass over the data for each. Translate with the chain.py
+translation and name the modules in the OGR2OSM_CHAIN environment variable,
+separated by commas, in the order their hooks run:
+
+    OGR2OSM_CHAIN=layer,surreyroad ogr2osm.py -t chain.py roads.shp
+
+A module is named like ogr2osm's -t option: the path of a .py file, or a
+translation in this repository such as surreyroad, mtk-gml or
+surrey.addresses.
+
+The hooks are composed as follows, a module which does not define a hook is
+left out of it:
+
+    filterLayer         each gets the layer returned by the one before,
+                        None skips the layer
+    filterFeature       each gets the feature returned by the one before,
+                        None drops the feature
+    filterTags          each gets the tags returned by the one before
+    filterFeaturePost   all are called
+    preOutputTransform  only the last module's is called, it writes the
+                        statistics and the output
+'''
+
+import os
+
+from common import compat
+
+CHAIN_ENV = 'OGR2OSM_CHAIN'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS = ('filterLayer', 'filterFeature', 'filterTags', 'filterFeaturePost',
+         'preOutputTransform')
+
+
+def load(translation):
+    """Import the translation module named like ogr2osm's -t option."""
+    if os.path.isfile(translation):
+        path = translation
+        translation = os.path.splitext(os.path.basename(path))[0]
+    else:
+        path = os.path.join(ROOT, translation.replace('.', os.sep) + '.py')
+    return compat.load_source(translation.replace('-', '_').replace('.', '_'), path)
+
+
+def compose(modules):
+    """Return a dict of the chained hooks of modules, by hook name."""
+    (layers, features, tags, posts, outputs) = [
+        [getattr(m, hook) for m in modules if hasattr(m, hook)] for hook in HOOKS]
+
+    def filterLayer(layer):
+        for f in layers:
+            layer = f(layer)
+            if layer is None:
+                return None
+        return layer
+
+    def filterFeature(ogrfeature, fieldNames, reproject):
+        for f in features:
+            ogrfeature = f(ogrfeature, fieldNames, reproject)
+            if ogrfeature is None:
+                return None
+        return ogrfeature
+
+    def filterTags(attrs):
+        for f in tags:
+            attrs = f(attrs)
+        return attrs
+
+    def filterFeaturePost(feature, ogrfeature, ogrgeometry):
+        for f in posts:
+            f(feature, ogrfeature, ogrgeometry)
+
+    def preOutputTransform(geometries, features):
+        if outputs:
+            outputs[-1](geometries, features)
+
+    return {'filterLayer': filterLayer, 'filterFeature': filterFeature,
+            'filterTags': filterTags, 'filterFeaturePost': filterFeaturePost,
+            'preOutputTransform': preOutputTransform}
+
+
+def hooks(spec=None):
+    """Return the chained hooks of the modules in spec, default OGR2OSM_CHAIN."""
+    spec = spec if spec is not None else os.environ.get(CHAIN_ENV, '')
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    if not names:
+        raise ValueError('Set %s to the translations to chain, like layer,surreyroad'
+                         % CHAIN_ENV)
+    return compose([load(name) for name in names])
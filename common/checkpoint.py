@@ -0,0 +1,92 @@
+'''
+Checkpoints of batch runs
+
+The batch drivers, tiger.batch, common.sheets and common.tiles, run ogr2osm
+once per input file or tile and write one output shard for each. A Manifest
+records each finished job in an append-only JSON lines file as soon as its
+shard is written:
+
+    manifest = Manifest(path)
+    if not manifest.done(key, shard):
+        ...translate to shard...
+        manifest.record(key, shard)
+
+A rerun after a failure or a reboot skips the jobs whose shard is recorded
+and still has the recorded size, and redoes the rest. The key of a job is
+made with job_key() from its input file, whose size and modification time
+are part of the key so a changed input is translated again, and whatever
+else selects the job, such as the translation and the tile.
+
+Lines are flushed and synced one at a time, so a crash loses at most the
+line being written; a truncated last line is ignored on reading.
+
+Node, way and relation ids need no checkpointing: each shard is numbered on
+its own, and the merge steps renumber or deduplicate from the shards.
+'''
+
+import io
+import json
+import os
+
+
+def job_key(source, *parts):
+    """Return the key of a job translating the file source."""
+    st = os.stat(source)
+    return '|'.join([os.path.abspath(source), '%d' % st.st_size, '%d' % int(st.st_mtime)]
+                    + ['%s' % (p,) for p in parts])
+
+
+class Manifest(object):
+    """Finished jobs of a batch run, and their output shards."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs = {}
+        if os.path.exists(path):
+            with io.open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Line cut short by a crash
+                        continue
+                    self.jobs[entry['key']] = entry
+        self.f = None
+
+    def done(self, key, output):
+        """Return True if the job key has written output and it is intact."""
+        entry = self.jobs.get(key)
+        return entry is not None and entry['output'] == os.path.abspath(output) \
+            and os.path.exists(output) and os.path.getsize(output) == entry['bytes']
+
+    def record(self, key, output):
+        """Record the job key as finished with output."""
+        entry = {'key': key, 'output': os.path.abspath(output),
+                 'bytes': os.path.getsize(output)}
+        self.jobs[key] = entry
+        if self.f is None:
+            self.f = open(self.path, 'ab+')
+            self.f.seek(0, os.SEEK_END)
+            cut = False
+            if self.f.tell() > 0:
+                self.f.seek(-1, os.SEEK_END)
+                cut = self.f.read(1) != b'\n'
+            self.f.seek(0, os.SEEK_END)
+            if cut:
+                # Finish the line cut short by a crash
+                self.f.write(b'\n')
+        self.f.write(json.dumps(entry, sort_keys=True).encode('utf-8') + b'\n')
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+    def remove(self):
+        """Forget every job, when the run has finished."""
+        self.close()
+        self.jobs = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
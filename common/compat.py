@@ -0,0 +1,42 @@
+'''
+Python 2 and 3 compatibility
+
+The translations run on Python 3. Until every worker has been moved off the
+old interpreter they also have to run on Python 2.7, and the few names which
+differ between the two are taken from here:
+
+    text_type       unicode on Python 2, str on Python 3
+    urlopen         urllib.urlopen or urllib.request.urlopen
+    load_source     import a module from a file path, like imp.load_source
+'''
+
+import sys
+
+PY2 = sys.version_info[0] == 2
+
+if PY2:
+    text_type = unicode
+else:
+    text_type = str
+
+
+def urlopen(*args, **kwargs):
+    # urllib.request takes longer to import than the translations
+    if PY2:
+        from urllib import urlopen
+    else:
+        from urllib.request import urlopen
+    return urlopen(*args, **kwargs)
+
+
+def load_source(name, path):
+    """Import the Python file at path as module name."""
+    if PY2:
+        import imp
+        return imp.load_source(name, path)
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
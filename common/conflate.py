@@ -0,0 +1,362 @@
+'''
+Conflation against existing OSM data
+
+Most features of a re-imported source are already in OSM. When the
+OGR2OSM_CONFLATE environment variable names a local .osm or .pbf extract of
+the area, conflate() finds the translated features which match an object of
+the extract:
+
+  - the same value of one of the ID_KEYS, tol:streetid or surrey:geodb_oid
+  - the same addr:housenumber and addr:street, compared ignoring case and
+    spacing, within DISTANCE metres
+
+Matching features are dropped from the output. With OGR2OSM_CONFLATE_ACTION
+set to 'flag' they are kept for review instead, tagged with MATCH_TAG giving
+the matching object as node/123; remove the tag before uploading.
+
+The extract is streamed through once, keeping only the objects with an id
+key or an address. Ids are kept in a dict, addresses in a spatial hash of
+cells DISTANCE high, so a feature is compared only to the addresses of the
+cells around it. Address ways, such as buildings, are located at the mean of
+their nodes, which are looked up in a second pass over the extract.
+
+Call conflate() from a translation's preOutputTransform, before output.
+'''
+
+import logging as l
+import math
+import os
+import struct
+import zlib
+
+from common import geo
+
+CONFLATE_ENV = 'OGR2OSM_CONFLATE'
+ACTION_ENV = 'OGR2OSM_CONFLATE_ACTION'
+# Source id tags, matched by value
+ID_KEYS = ('tol:streetid', 'surrey:geodb_oid')
+# Distance in metres within which an address matches
+DISTANCE = 50.0
+MATCH_TAG = 'conflate:match'
+
+
+def _text(s):
+    return s.decode('utf-8') if isinstance(s, bytes) else s
+
+
+def _address(tags):
+    """Return the normalised (housenumber, street) of tags, or None."""
+    number = tags.get('addr:housenumber')
+    street = tags.get('addr:street')
+    if not number or not street:
+        return None
+    return (u' '.join(_text(number).lower().split()),
+            u' '.join(_text(street).lower().split()))
+
+
+class Index(object):
+    """Ids and addresses of the objects of an OSM extract."""
+
+    def __init__(self, distance=DISTANCE):
+        self.distance = distance
+        self.cell = distance / geo.METRES
+        # Object of each (key, value) of ID_KEYS
+        self.ids = {}
+        # (housenumber, street, lat, lon, object) by cell
+        self.cells = {}
+        self.addresses = 0
+
+    def _cellrange(self, lat, lon):
+        """Return the cells within distance of lat, lon."""
+        # Cells are narrower than distance in longitude away from the equator
+        dx = int(math.ceil(1.0 / max(math.cos(math.radians(lat)), 0.01)))
+        (cy, cx) = (int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell)))
+        return [(y, x) for y in (cy - 1, cy, cy + 1) for x in range(cx - dx, cx + dx + 1)]
+
+    def add(self, ref, tags, location):
+        """Add the object ref with tags at location (lat, lon) or None."""
+        for key in ID_KEYS:
+            if key in tags:
+                self.ids[(key, _text(tags[key]).strip())] = ref
+        address = _address(tags)
+        if address is not None and location is not None:
+            (lat, lon) = location
+            cell = (int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell)))
+            self.cells.setdefault(cell, []).append(address + (lat, lon, ref))
+            self.addresses += 1
+
+    def match(self, tags, location):
+        """Return the object matching tags at location, or None."""
+        for key in ID_KEYS:
+            if key in tags:
+                ref = self.ids.get((key, _text(tags[key]).strip()))
+                if ref is not None:
+                    return ref
+        address = _address(tags)
+        if address is None or location is None:
+            return None
+        (lat, lon) = location
+        scale = math.cos(math.radians(lat))
+        limit = (self.distance / geo.METRES) ** 2
+        for cell in self._cellrange(lat, lon):
+            for (number, street, olat, olon, ref) in self.cells.get(cell, ()):
+                if (number, street) == address \
+                        and (olat - lat) ** 2 + ((olon - lon) * scale) ** 2 <= limit:
+                    return ref
+        return None
+
+
+def _relevant(tags):
+    return any(key in tags for key in ID_KEYS) or _address(tags) is not None
+
+
+def load(path, distance=DISTANCE):
+    """Return the Index of the OSM extract at path."""
+    elements = _pbf if path.endswith('.pbf') else _xml
+    index = Index(distance)
+    ways = []
+    wanted = set()
+    for (kind, id, tags, data) in elements(path):
+        if not tags or not _relevant(tags):
+            continue
+        ref = '%s/%d' % (kind, id)
+        if kind == 'node':
+            index.add(ref, tags, data)
+        elif kind == 'way' and _address(tags) is not None and data:
+            ways.append((ref, tags, data))
+            wanted.update(data)
+        else:
+            index.add(ref, tags, None)
+    if ways:
+        locations = {}
+        for (kind, id, tags, data) in elements(path):
+            if kind == 'node' and id in wanted:
+                locations[id] = data
+            elif kind != 'node':
+                break
+        for (ref, tags, refs) in ways:
+            points = [locations[r] for r in refs if r in locations]
+            location = None
+            if points:
+                location = (sum(p[0] for p in points) / len(points),
+                            sum(p[1] for p in points) / len(points))
+            index.add(ref, tags, location)
+    l.info("Conflate: %d ids and %d addresses in %s", len(index.ids), index.addresses, path)
+    return index
+
+
+def _xml(path):
+    """
+    Yield (kind, id, tags, data) of the elements of an OSM XML file, data is
+    (lat, lon) of nodes and the node refs of ways.
+    """
+    import xml.etree.ElementTree as ET
+
+    root = None
+    for (event, elem) in ET.iterparse(path, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event != 'end' or elem.tag not in ('node', 'way', 'relation'):
+            continue
+        tags = dict((tag.get('k'), tag.get('v')) for tag in elem.findall('tag'))
+        if elem.tag == 'node':
+            data = (float(elem.get('lat')), float(elem.get('lon')))
+        elif elem.tag == 'way':
+            data = [int(nd.get('ref')) for nd in elem.findall('nd')]
+        else:
+            data = None
+        yield (elem.tag, int(elem.get('id')), tags, data)
+        root.clear()
+
+
+def _uvarint(data, pos):
+    """Decode the varint at data[pos], return (value, next pos)."""
+    value = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        if b < 0x80:
+            return (value, pos)
+        shift += 7
+
+
+def _fields(data):
+    """Yield (number, value) of the varint and length-delimited fields of data."""
+    pos = 0
+    end = len(data)
+    while pos < end:
+        (key, pos) = _uvarint(data, pos)
+        wire = key & 7
+        if wire == 0:
+            (value, pos) = _uvarint(data, pos)
+        elif wire == 2:
+            (length, pos) = _uvarint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        else:
+            # Fixed size fields, not used by OSM PBF
+            pos += 8 if wire == 1 else 4
+            continue
+        yield (key >> 3, value)
+
+
+def _unpacked(data):
+    values = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        (value, pos) = _uvarint(data, pos)
+        values.append(value)
+    return values
+
+
+def _zigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _undelta(values):
+    out = []
+    last = 0
+    for value in values:
+        last += _zigzag(value)
+        out.append(last)
+    return out
+
+
+def _int64(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _blocks(path):
+    """Yield the decompressed OSMData blocks of an OSM PBF file."""
+    with open(path, 'rb') as f:
+        while True:
+            size = f.read(4)
+            if len(size) < 4:
+                return
+            header = dict(_fields(bytearray(f.read(struct.unpack('!I', size)[0]))))
+            blob = dict(_fields(bytearray(f.read(header[3]))))
+            if bytes(header[1]) != b'OSMData':
+                continue
+            yield bytearray(zlib.decompress(bytes(blob[3])) if 3 in blob else blob[1])
+
+
+def _pbf(path):
+    """Yield (kind, id, tags, data) of the elements of an OSM PBF file, as _xml()."""
+    for block in _blocks(path):
+        strings = []
+        groups = []
+        granularity = 100
+        (latoffset, lonoffset) = (0, 0)
+        for (number, value) in _fields(block):
+            if number == 1:
+                strings = [bytes(s).decode('utf-8') for (n, s) in _fields(value) if n == 1]
+            elif number == 2:
+                groups.append(value)
+            elif number == 17:
+                granularity = value
+            elif number == 19:
+                latoffset = _int64(value)
+            elif number == 20:
+                lonoffset = _int64(value)
+
+        def location(lat, lon):
+            return (1e-9 * (latoffset + granularity * lat), 1e-9 * (lonoffset + granularity * lon))
+
+        for group in groups:
+            for (number, value) in _fields(group):
+                if number == 2:
+                    dense = {}
+                    for (n, v) in _fields(value):
+                        dense[n] = v
+                    ids = _undelta(_unpacked(dense.get(1, b'')))
+                    lats = _undelta(_unpacked(dense.get(8, b'')))
+                    lons = _undelta(_unpacked(dense.get(9, b'')))
+                    keysvals = _unpacked(dense.get(10, b''))
+                    pos = 0
+                    for i in range(len(ids)):
+                        tags = {}
+                        while pos < len(keysvals) and keysvals[pos] != 0:
+                            tags[strings[keysvals[pos]]] = strings[keysvals[pos + 1]]
+                            pos += 2
+                        pos += 1
+                        yield ('node', ids[i], tags, location(lats[i], lons[i]))
+                elif number in (1, 3, 4):
+                    fields = {}
+                    for (n, v) in _fields(value):
+                        fields[n] = v
+                    tags = dict(zip([strings[k] for k in _unpacked(fields.get(2, b''))],
+                                    [strings[v] for v in _unpacked(fields.get(3, b''))]))
+                    if number == 1:
+                        yield ('node', _zigzag(fields[1]), tags,
+                               location(_zigzag(fields.get(8, 0)), _zigzag(fields.get(9, 0))))
+                    elif number == 3:
+                        yield ('way', _int64(fields[1]), tags,
+                               _undelta(_unpacked(fields.get(8, b''))))
+                    else:
+                        yield ('relation', _int64(fields[1]), tags, None)
+
+
+def _location(geometry, geom):
+    """Return (lat, lon) of a point, or the mean of the nodes of a way."""
+    if isinstance(geometry, geom.Point):
+        return (geometry.y, geometry.x)
+    if isinstance(geometry, geom.Way) and geometry.points:
+        points = geometry.points
+        return (sum(p.y for p in points) / len(points), sum(p.x for p in points) / len(points))
+    return None
+
+
+def _detach(geometry, parent, dropped, geom):
+    """Detach geometry from parent, collect the ids of what is left unused."""
+    geometry.parents.discard(parent)
+    if geometry.parents:
+        return
+    dropped.add(id(geometry))
+    if isinstance(geometry, geom.Way):
+        children = set(geometry.points)
+    elif isinstance(geometry, geom.Relation):
+        children = set(member for (member, role) in geometry.members)
+    else:
+        children = ()
+    for child in children:
+        _detach(child, geometry, dropped, geom)
+
+
+def conflate(geometries, features, path=None, action=None):
+    """
+    Drop or flag the features matching an object of the extract at path.
+
+    path and action default to OGR2OSM_CONFLATE and OGR2OSM_CONFLATE_ACTION,
+    nothing is done without a path. Returns the number of matching features.
+    """
+    import geom
+
+    path = path or os.environ.get(CONFLATE_ENV)
+    if not path:
+        return 0
+    action = action or os.environ.get(ACTION_ENV, 'drop')
+    if action not in ('drop', 'flag'):
+        raise ValueError('Unknown %s %r, use drop or flag' % (ACTION_ENV, action))
+    index = load(path)
+
+    total = len(features)
+    matched = set()
+    dropped = set()
+    for feature in features:
+        ref = index.match(feature.tags, _location(feature.geometry, geom))
+        if ref is None:
+            continue
+        matched.add(id(feature))
+        if action == 'flag':
+            feature.tags[MATCH_TAG] = ref
+        else:
+            _detach(feature.geometry, feature, dropped, geom)
+    if action == 'drop':
+        features[:] = [f for f in features if id(f) not in matched]
+        geometries[:] = [g for g in geometries if id(g) not in dropped]
+    l.info("Conflate: %d of %d features match the extract, action %s",
+           len(matched), total, action)
+    return len(matched)
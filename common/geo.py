@@ -0,0 +1,11 @@
+'''
+Geographic constants shared by the translations
+
+Distances in metres are converted to and from WGS84 degrees with a
+spherical approximation: a degree of latitude is METRES long, and a degree
+of longitude METRES times the cosine of the latitude. This is within one
+percent of the ellipsoid, close enough for tolerances and search radii.
+'''
+
+# Metres per degree of latitude
+METRES = 111320.0
@@ -0,0 +1,172 @@
+'''
+Address interpolation ways beside road centrelines
+
+Road datasets often give the house number range of each side of a road
+segment. interpolate() turns the ranges into addr:interpolation ways offset
+DISTANCE metres to the left and right of the centreline, with the first and
+last house number tagged on their end nodes. The ends are pulled TRIM
+metres back along the road, so the interpolations of consecutive segments
+and of crossing roads do not meet.
+
+The offsets of all segments are computed at once with NumPy, which is only
+needed when a translation generates interpolations: the vertices of every
+road are put in flat arrays, and the normals of the segments, their mitred
+sums at the vertices and the trimmed ends are array operations over the
+whole dataset. Left is left of the direction the road is drawn in, the
+direction its numbers run from the FROM to the TO value.
+
+A side gets an interpolation when both of its numbers are positive and
+differ. It is even or odd when both numbers are, and all otherwise.
+
+Translations generate interpolations when the OGR2OSM_INTERPOLATION
+environment variable is set, to the offset in metres or to an empty value
+for DISTANCE, see configured().
+'''
+
+import logging as l
+import os
+
+from common import geo
+
+INTERPOLATION_ENV = 'OGR2OSM_INTERPOLATION'
+
+# Offset from the centreline in metres
+DISTANCE = 10.0
+# Distance the ends are pulled back along the road in metres, at most a
+# third of the end segment
+TRIM = 5.0
+# Longest miter at sharp corners, in multiples of DISTANCE
+MITER_LIMIT = 2.0
+
+
+def configured():
+    """Return the offset set in OGR2OSM_INTERPOLATION, or None if it is not set."""
+    value = os.environ.get(INTERPOLATION_ENV)
+    if value is None:
+        return None
+    return float(value) if value.strip() else DISTANCE
+
+
+def offsets(lines, distance=DISTANCE, trim=TRIM):
+    """
+    Return the left and right offset lines of lines.
+
+    lines is a list of lists of (lon, lat), the result a list of (left,
+    right) pairs of the same lengths.
+    """
+    import numpy as np
+
+    counts = np.array([len(line) for line in lines], dtype=np.intp)
+    if not len(counts) or not counts.sum():
+        return [([], []) for line in lines]
+    xy = np.array([p for line in lines for p in line], dtype=np.float64).reshape(-1, 2)
+    n = len(xy)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    # Local metric coordinates, scaled at the mean latitude of each line
+    way = np.repeat(np.arange(len(lines)), counts)
+    lat = np.bincount(way, xy[:, 1], len(lines)) / np.maximum(counts, 1)
+    kx = (geo.METRES * np.cos(np.radians(lat)))[way]
+    m = np.column_stack((xy[:, 0] * kx, xy[:, 1] * geo.METRES))
+
+    # Unit normals of the segments from each vertex to the next, zero for
+    # the last vertex of a line and for zero length segments
+    first = np.zeros(n, dtype=bool)
+    first[starts[counts > 0]] = True
+    last = np.zeros(n, dtype=bool)
+    last[ends[counts > 0] - 1] = True
+    d = np.zeros((n, 2))
+    d[:-1] = m[1:] - m[:-1]
+    d[last] = 0.0
+    length = np.hypot(d[:, 0], d[:, 1])
+    unit = d / np.where(length > 0, length, 1.0)[:, None]
+    normal = np.column_stack((-unit[:, 1], unit[:, 0]))
+
+    # The offset of a vertex is along the sum of the normals of its two
+    # segments, mitred to keep DISTANCE from both
+    before = np.zeros((n, 2))
+    before[1:] = normal[:-1]
+    before[first] = 0.0
+    total = before + normal
+    sides = (np.hypot(before[:, 0], before[:, 1]) > 0).astype(np.float64) \
+        + (length > 0).astype(np.float64)
+    size = np.hypot(total[:, 0], total[:, 1])
+    size = np.where(size > 0, size, 1.0)
+    miter = np.minimum(sides / size, MITER_LIMIT)
+    offset = total * (miter / size * distance)[:, None]
+
+    # Pull the ends back along the first and last segment
+    shift = np.zeros((n, 2))
+    pull = np.minimum(trim, length / 3.0)
+    shift[first] = (unit * pull[:, None])[first]
+    previous = np.zeros((n, 2))
+    previous[1:] = (unit * pull[:, None])[:-1]
+    shift[last] = -previous[last]
+
+    left = m + shift + offset
+    right = m + shift - offset
+    left = np.column_stack((left[:, 0] / kx, left[:, 1] / geo.METRES))
+    right = np.column_stack((right[:, 0] / kx, right[:, 1] / geo.METRES))
+    (left, right) = (left.tolist(), right.tolist())
+    return [([tuple(p) for p in left[s:e]], [tuple(p) for p in right[s:e]])
+            for (s, e) in zip(starts.tolist(), ends.tolist())]
+
+
+def _mode(start, end):
+    if start % 2 == 0 and end % 2 == 0:
+        return 'even'
+    if start % 2 == 1 and end % 2 == 1:
+        return 'odd'
+    return 'all'
+
+
+def interpolate(ranges, distance=DISTANCE, trim=TRIM, tags=None):
+    """
+    Add interpolation ways for ranges, return the number of ways added.
+
+    ranges is a list of (feature, fromleft, toleft, fromright, toright) of
+    road features with way geometries. The ways and their end nodes get the
+    addr:street of the road's name, and tags.
+    """
+    import geom
+
+    roads = []
+    lines = []
+    for r in ranges:
+        if type(r[0].geometry) is not geom.Way:
+            continue
+        # Repeated points have no direction to offset from
+        line = []
+        for p in r[0].geometry.points:
+            if not line or line[-1] != (p.x, p.y):
+                line.append((p.x, p.y))
+        if len(line) > 1:
+            roads.append(r)
+            lines.append(line)
+    added = 0
+    for (r, sides) in zip(roads, offsets(lines, distance, trim)):
+        (feature, fromleft, toleft, fromright, toright) = r
+        for (start, end, coords) in ((fromleft, toleft, sides[0]), (fromright, toright, sides[1])):
+            if start <= 0 or end <= 0 or start == end:
+                continue
+            common = dict(tags or {})
+            if 'name' in feature.tags:
+                common['addr:street'] = feature.tags['name']
+            way = geom.Way()
+            way.points = [geom.Point(x, y) for (x, y) in coords]
+            for point in way.points:
+                point.addparent(way)
+            for (point, number) in ((way.points[0], start), (way.points[-1], end)):
+                f = geom.Feature()
+                f.geometry = point
+                f.tags = dict(common)
+                f.tags['addr:housenumber'] = '%d' % number
+                point.addparent(f)
+            f = geom.Feature()
+            f.geometry = way
+            f.tags = dict(common)
+            f.tags['addr:interpolation'] = _mode(start, end)
+            way.addparent(f)
+            added += 1
+    l.info("Interpolation: %d ways for %d roads", added, len(roads))
+    return added
@@ -0,0 +1,189 @@
+'''
+Merging of nodes at identical coordinates
+
+Roads sharing end points and buildings sharing walls come out of ogr2osm as
+separate nodes at the same coordinates when their input coordinates differ
+below the output precision, or after quantise(). merge() replaces the untagged
+nodes at the same coordinates, quantised to 1e-7 degrees, by one node. Nodes
+which are the geometry of a feature are not replaced; untagged nodes are
+merged into them if they are way nodes, like address interpolation end
+points, and left apart from them otherwise, like address points.
+
+The nodes are looked up in a NodeIndex, an open addressing hash table from
+the quantised coordinates to node numbers kept in two flat int64 arrays, 16
+bytes per slot instead of the hundreds of bytes of a dict entry with a tuple
+key. Once the table would grow past SPILL bytes, or the size given in the
+OGR2OSM_NODE_SPILL environment variable, it is moved to a memory-mapped
+temporary file, so a nationwide run pages the table instead of running out
+of memory.
+
+Call merge() from a translation's preOutputTransform, after quantise().
+'''
+
+import ctypes
+import logging as l
+import mmap
+import os
+import tempfile
+
+SPILL_ENV = 'OGR2OSM_NODE_SPILL'
+# Table size in bytes above which the table is memory-mapped
+SPILL = 256 << 20
+# Coordinate scale of the keys, 7 decimals is about 1 cm
+SCALE = 10000000
+# Distinct longitude values at SCALE
+LON_VALUES = 360 * SCALE + 1
+# Fibonacci hashing multiplier, 2**64 / golden ratio
+MULTIPLIER = 0x9E3779B97F4A7C15
+MASK = (1 << 64) - 1
+
+
+def key(x, y):
+    """Return the positive integer key of the WGS84 coordinates x, y."""
+    lon = int(round((x + 180.0) * SCALE))
+    lat = int(round((y + 90.0) * SCALE))
+    return lat * LON_VALUES + lon + 1
+
+
+class NodeIndex(object):
+    """Hash table from coordinate keys to node numbers."""
+
+    def __init__(self, capacity=1 << 16, spill=SPILL):
+        self.spill = spill
+        self.size = 0
+        (self.keys, self.values, self.mapped) = self._allocate(max(capacity, 16))
+
+    def _allocate(self, capacity):
+        """Return empty key and value arrays of capacity slots, and their mapping."""
+        self.bits = (capacity - 1).bit_length()
+        self.capacity = 1 << self.bits
+        array = ctypes.c_int64 * self.capacity
+        size = ctypes.sizeof(array)
+        if 2 * size <= self.spill:
+            return (array(), array(), None)
+        f = tempfile.TemporaryFile(prefix='nodes-')
+        try:
+            f.truncate(2 * size)
+            mapped = mmap.mmap(f.fileno(), 2 * size)
+        finally:
+            f.close()
+        # A new file reads as zeros, that is as empty slots
+        return (array.from_buffer(mapped), array.from_buffer(mapped, size), mapped)
+
+    def _slot(self, k):
+        """Return the slot of key k, or of the empty slot where it belongs."""
+        keys = self.keys
+        shift = 64 - self.bits
+        mask = self.capacity - 1
+        i = ((k * MULTIPLIER) & MASK) >> shift
+        while True:
+            found = keys[i]
+            if found == k or found == 0:
+                return i
+            i = (i + 1) & mask
+
+    def get(self, x, y, default=None):
+        """Return the number of the node at x, y, or default."""
+        k = key(x, y)
+        i = self._slot(k)
+        return self.values[i] if self.keys[i] == k else default
+
+    def setdefault(self, x, y, number):
+        """Return the number of the node at x, y, adding number if none."""
+        k = key(x, y)
+        i = self._slot(k)
+        if self.keys[i] == k:
+            return self.values[i]
+        self.keys[i] = k
+        self.values[i] = number
+        self.size += 1
+        if 2 * self.size > self.capacity:
+            self._grow()
+        return number
+
+    def _grow(self):
+        (keys, values, mapped) = (self.keys, self.values, self.mapped)
+        (self.keys, self.values, self.mapped) = self._allocate(2 * self.capacity)
+        for i in range(len(keys)):
+            k = keys[i]
+            if k:
+                j = self._slot(k)
+                self.keys[j] = k
+                self.values[j] = values[i]
+        # The arrays refer to the mapping until they are gone
+        del keys, values
+        if mapped is not None:
+            mapped.close()
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        """Release the table, and its file if it was spilled."""
+        mapped = self.mapped
+        self.keys = self.values = self.mapped = None
+        self.size = 0
+        if mapped is not None:
+            mapped.close()
+
+
+def merge(geometries, features, spill=None):
+    """
+    Merge the untagged nodes at the same coordinates.
+
+    Returns the number of nodes removed.
+    """
+    import geom
+
+    if spill is None:
+        spill = int(os.environ.get(SPILL_ENV) or SPILL)
+    tagged = set(id(f.geometry) for f in features)
+    index = NodeIndex(spill=spill)
+    # Node of each number in the index
+    nodes = []
+    removed = set()
+
+    def canonical(point):
+        if id(point) in tagged:
+            return point
+        number = index.setdefault(point.x, point.y, len(nodes))
+        if number == len(nodes):
+            nodes.append(point)
+            return point
+        node = nodes[number]
+        if node is not point:
+            removed.add(id(point))
+        return node
+
+    try:
+        # Tagged way nodes, such as address interpolation end points, are
+        # kept and the untagged nodes at their coordinates merged into them
+        for g in geometries:
+            if type(g) is geom.Way:
+                for p in g.points:
+                    if id(p) in tagged and index.setdefault(p.x, p.y, len(nodes)) == len(nodes):
+                        nodes.append(p)
+        for g in geometries:
+            if type(g) is geom.Way:
+                points = [canonical(p) for p in g.points]
+                for (old, new) in zip(g.points, points):
+                    if old is not new:
+                        old.parents.discard(g)
+                        new.addparent(g)
+                g.points = points
+            elif type(g) is geom.Relation:
+                members = []
+                for (member, role) in g.members:
+                    if type(member) is geom.Point:
+                        new = canonical(member)
+                        if new is not member:
+                            member.parents.discard(g)
+                            new.addparent(g)
+                        member = new
+                    members.append((member, role))
+                g.members = members
+    finally:
+        index.close()
+    geometries[:] = [g for g in geometries if id(g) not in removed]
+    l.info("Nodes: merged %d nodes at shared coordinates", len(removed))
+    return len(removed)
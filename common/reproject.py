@@ -0,0 +1,78 @@
+'''
+Batched reprojection of the output coordinates
+
+ogr2osm reprojects the geometry of each feature to WGS84 as it is read,
+one OGR Transform() call per feature. For inputs of millions of small
+features, like address points, the calls cost more than the translation.
+With the OGR2OSM_REPROJECT environment variable set to the CRS of the
+source, for example EPSG:26910, reproject() transforms the coordinates of
+all nodes at once at the start of preOutputTransform instead:
+
+    OGR2OSM_REPROJECT=EPSG:26910 ogr2osm.py -e 4326 -t surrey.addresses ...
+
+ogr2osm is told the source is already in WGS84 with -e 4326, so it leaves
+the coordinates alone. reproject() then copies the coordinates of CHUNK
+nodes at a time into NumPy arrays, transforms them in place with one pyproj
+call and writes them back. The pyproj Transformer of each source CRS is made
+once and kept, so a common.worker process reuses it from job to job.
+
+The coordinates are taken as ogr2osm stores them in geom.Point: the floats
+read from OGR, in source units, as the ogr2osm with the geom module which
+these translations are written for does. The later stages, such as
+simplify, nodes and tiles, expect the float degrees left by reproject().
+ogr2osm versions storing integers scaled by 10**significantDigits are not
+supported, reproject() raises ValueError on integer coordinates instead of
+transforming scaled values.
+
+NumPy and pyproj are only imported when OGR2OSM_REPROJECT is set.
+'''
+
+import logging as l
+import os
+
+REPROJECT_ENV = 'OGR2OSM_REPROJECT'
+# Nodes transformed per call
+CHUNK = 1 << 16
+
+# Transformer to WGS84 of each source CRS
+transformers = {}
+
+
+def transformer(crs):
+    """Return the cached transformer from crs to WGS84 longitude, latitude."""
+    t = transformers.get(crs)
+    if t is None:
+        from pyproj import Transformer
+        t = transformers[crs] = Transformer.from_crs(crs, 'EPSG:4326', always_xy=True)
+    return t
+
+
+def reproject(geometries, crs=None, chunk=CHUNK):
+    """
+    Transform the nodes of geometries from crs to WGS84.
+
+    crs defaults to OGR2OSM_REPROJECT, nothing is done without one. Returns
+    the number of nodes transformed.
+    """
+    crs = crs or os.environ.get(REPROJECT_ENV)
+    if not crs:
+        return 0
+    import geom
+
+    points = [g for g in geometries if type(g) is geom.Point]
+    if points and not isinstance(points[0].x, float):
+        raise ValueError('%s needs float coordinates, ogr2osm gave %r'
+                         % (REPROJECT_ENV, points[0].x))
+    import numpy as np
+
+    t = transformer(crs)
+    for start in range(0, len(points), chunk):
+        batch = points[start:start + chunk]
+        xs = np.fromiter((p.x for p in batch), np.float64, len(batch))
+        ys = np.fromiter((p.y for p in batch), np.float64, len(batch))
+        t.transform(xs, ys, inplace=True)
+        for (p, x, y) in zip(batch, xs.tolist(), ys.tolist()):
+            p.x = x
+            p.y = y
+    l.info("Reproject: %d nodes from %s", len(points), crs)
+    return len(points)
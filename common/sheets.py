@@ -0,0 +1,259 @@
+'''
+Batch translation of map sheets with prefetching
+
+Translates every sheet in a directory, such as the MTK GML sheets of an
+area, running ogr2osm once per sheet. A background thread prepares the next
+PREFETCH sheets while ogr2osm translates the current one:
+
+  - zipped and gzipped sheets are extracted to a temporary directory
+  - the sheet is read through once, into the page cache
+  - the sheet is opened with OGR, for GML the full prescan which writes the
+    .gfs schema file, so the ogr2osm run finds the schema and starts reading
+    features at once
+
+The prepared sheets wait in a queue of at most PREFETCH sheets, bounding the
+disk space of extracted sheets. The output of each sheet is written to
+OUTPUTDIR as <sheet>.osm.
+
+With OGR2OSM_STATS set, the statistics of each sheet are written next to
+its output, and the batch report to OGR2OSM_STATS. It has the prefetch,
+translate and wait seconds of every sheet and the overlap: the share of the
+prefetch time hidden behind translation, 1 - wait / prefetch.
+
+Finished sheets are recorded in OUTPUTDIR/manifest.jsonl, and a rerun skips
+them without prefetching, see common.checkpoint. --restart translates every
+sheet again.
+
+Usage: python -m common.sheets [--prefetch N] [--ogr2osm CMD] [--pattern GLOB]
+           [--restart] -t TRANSLATION INPUTDIR OUTPUTDIR
+
+The ogr2osm command defaults to the OGR2OSM environment variable or
+'ogr2osm.py' on the PATH.
+'''
+
+import fnmatch
+import gzip
+import io
+import os
+import shutil
+import sys
+import threading
+import time
+import zipfile
+
+from common import checkpoint, compat
+
+# Number of sheets prepared ahead of the translation
+PREFETCH = 2
+# Sheet file name patterns
+PATTERNS = ('*.gml', '*.xml', '*.gml.gz', '*.xml.gz', '*.zip')
+# Bytes read at a time when reading a sheet into the page cache
+CHUNK = 1 << 20
+
+
+def find_sheets(root, patterns=PATTERNS):
+    """Return the sorted paths of the sheets under root."""
+    sheets = []
+    for (dirpath, dirnames, filenames) in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if any(fnmatch.fnmatch(filename.lower(), p) for p in patterns):
+                sheets.append(os.path.join(dirpath, filename))
+    return sheets
+
+
+def _extract(sheet, tmpdir):
+    """Return the GML file of sheet, extracted to tmpdir if compressed."""
+    name = os.path.basename(sheet)
+    if name.lower().endswith('.zip'):
+        with zipfile.ZipFile(sheet) as z:
+            members = [m for m in z.namelist()
+                       if m.lower().endswith(('.gml', '.xml')) and not m.endswith('/')]
+            if len(members) != 1:
+                raise IOError('%s has %d GML files, expected one' % (sheet, len(members)))
+            path = os.path.join(tmpdir, os.path.basename(members[0]))
+            with z.open(members[0]) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK)
+        return path
+    if name.lower().endswith('.gz'):
+        path = os.path.join(tmpdir, name[:-3])
+        with gzip.open(sheet, 'rb') as src, open(path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK)
+        return path
+    with io.open(sheet, 'rb') as f:
+        while f.read(CHUNK):
+            pass
+    return sheet
+
+
+def prefetch(sheet, tmpdir):
+    """Prepare sheet for translation, return the path to translate."""
+    from osgeo import ogr
+
+    path = _extract(sheet, tmpdir)
+    datasource = ogr.Open(path)
+    if datasource is None:
+        raise IOError('Cannot open %s' % path)
+    for i in range(datasource.GetLayerCount()):
+        datasource.GetLayer(i).GetLayerDefn()
+    datasource = None
+    return path
+
+
+def _output(sheet, outputdir):
+    """Return the output file of sheet."""
+    name = os.path.splitext(os.path.basename(sheet))[0]
+    if name.lower().endswith(('.gml', '.xml')):
+        name = os.path.splitext(name)[0]
+    return os.path.join(outputdir, name + '.osm')
+
+
+def _producer(sheets, tmpdir, queue):
+    for (n, sheet) in enumerate(sheets):
+        start = time.time()
+        workdir = os.path.join(tmpdir, '%d' % n)
+        try:
+            os.mkdir(workdir)
+            path = prefetch(sheet, workdir)
+            error = None
+        except Exception as e:
+            (path, error) = (None, e)
+        queue.put((sheet, workdir, path, error, time.time() - start))
+    queue.put(None)
+
+
+def translate(command, translation, path, output):
+    """Run ogr2osm on path, return its return code."""
+    import subprocess
+
+    env = dict(os.environ)
+    env.pop('OGR2OSM_SINK', None)
+    if env.get('OGR2OSM_STATS'):
+        env['OGR2OSM_STATS'] = output + os.path.splitext(env['OGR2OSM_STATS'])[1]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+    args = command + ['-f', '-t', translation, '-o', output, path]
+    with open(output + '.log', 'w') as log:
+        return subprocess.call(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def run(command, translation, sheets, outputdir, depth=PREFETCH, manifest=None):
+    """
+    Translate sheets to outputdir, prefetching depth sheets ahead.
+
+    With a checkpoint.Manifest, the sheets it has as done are skipped and the
+    translated ones recorded in it. Returns the batch report.
+    """
+    import tempfile
+    if compat.PY2:
+        import Queue as queue
+    else:
+        import queue
+
+    start = time.time()
+    keys = {}
+    skipped = []
+    if manifest is not None:
+        todo = []
+        for sheet in sheets:
+            keys[sheet] = checkpoint.job_key(sheet, translation)
+            if manifest.done(keys[sheet], _output(sheet, outputdir)):
+                skipped.append(sheet)
+            else:
+                todo.append(sheet)
+        sheets = todo
+    tmpdir = tempfile.mkdtemp(prefix='sheets-')
+    prepared = queue.Queue(max(1, depth))
+    producer = threading.Thread(target=_producer, args=(sheets, tmpdir, prepared))
+    producer.daemon = True
+    producer.start()
+    report = {'sheets': {}, 'failed': [], 'skipped': skipped}
+    try:
+        while True:
+            waited = time.time()
+            item = prepared.get()
+            waited = time.time() - waited
+            if item is None:
+                break
+            (sheet, workdir, path, error, fetched) = item
+            output = _output(sheet, outputdir)
+            translated = time.time()
+            if error is not None:
+                sys.stderr.write('Prefetching %s failed: %s\n' % (sheet, error))
+                returncode = None
+            else:
+                returncode = translate(command, translation, path, output)
+                if returncode != 0:
+                    sys.stderr.write('Translating %s failed, see %s.log\n' % (sheet, output))
+                elif manifest is not None:
+                    manifest.record(keys[sheet], output)
+            translated = time.time() - translated
+            if returncode != 0:
+                report['failed'].append(sheet)
+            report['sheets'][sheet] = {
+                'prefetch': round(fetched, 3),
+                'wait': round(waited, 3),
+                'translate': round(translated, 3),
+            }
+            shutil.rmtree(workdir, ignore_errors=True)
+        producer.join()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    rows = report['sheets'].values()
+    fetched = sum(row['prefetch'] for row in rows)
+    waited = sum(row['wait'] for row in rows)
+    report['prefetch'] = round(fetched, 3)
+    report['wait'] = round(waited, 3)
+    report['translate'] = round(sum(row['translate'] for row in rows), 3)
+    report['seconds'] = round(time.time() - start, 3)
+    report['overlap'] = round(max(0.0, 1.0 - waited / fetched), 4) if fetched else 0.0
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import shlex
+
+    parser = argparse.ArgumentParser(description='Translate a directory of map sheets.')
+    parser.add_argument('--prefetch', type=int, default=PREFETCH,
+                        help='Number of sheets prepared ahead of the translation')
+    parser.add_argument('--ogr2osm', default=os.environ.get('OGR2OSM', 'ogr2osm.py'),
+                        help='Command used to run ogr2osm')
+    parser.add_argument('--pattern', action='append',
+                        help='Sheet file name pattern, default %s' % ' '.join(PATTERNS))
+    parser.add_argument('--restart', action='store_true',
+                        help='Translate every sheet, also those finished by an earlier run')
+    parser.add_argument('-t', '--translation', required=True)
+    parser.add_argument('inputdir')
+    parser.add_argument('outputdir')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.outputdir):
+        os.makedirs(args.outputdir)
+    sheets = find_sheets(args.inputdir, args.pattern or PATTERNS)
+    manifest = checkpoint.Manifest(os.path.join(args.outputdir, 'manifest.jsonl'))
+    if args.restart:
+        manifest.remove()
+    try:
+        report = run(shlex.split(args.ogr2osm), args.translation, sheets, args.outputdir,
+                     args.prefetch, manifest)
+    finally:
+        manifest.close()
+    if report['skipped']:
+        sys.stdout.write('Resuming, %d of %d sheets already translated\n'
+                         % (len(report['skipped']), len(sheets)))
+    sys.stdout.write('%d sheets in %.1f s: translate %.1f s, prefetch %.1f s, waited %.1f s, '
+                     'overlap %.0f %%\n' % (len(sheets), report['seconds'], report['translate'],
+                                            report['prefetch'], report['wait'],
+                                            100.0 * report['overlap']))
+    path = os.environ.get('OGR2OSM_STATS')
+    if path:
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(compat.text_type(json.dumps(report, indent=1, sort_keys=True)))
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
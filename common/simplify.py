@@ -0,0 +1,153 @@
+'''
+Topology-preserving line simplification and coordinate quantisation
+
+simplify() removes vertices from the ways of the selected features with the
+Douglas-Peucker algorithm, using a tolerance in metres per feature. The ways
+are cut into chains at the nodes where the set of ways using a node changes,
+so a border shared by two ways is one chain. Each chain is simplified once,
+with the smallest tolerance of the ways using it, and a node is dropped from
+all ways or from none. Way end nodes, nodes used by other features and nodes
+of ways without a tolerance are never dropped.
+
+quantise() rounds all node coordinates to DECIMALS decimal places.
+
+Coordinates are expected in WGS84 degrees, as ogr2osm gives them to
+preOutputTransform.
+'''
+
+import logging as l
+import math
+
+from common import geo
+
+# Output coordinate precision, 7 decimals is about 1 cm
+DECIMALS = 7
+
+
+def _douglaspeucker(chain, tolerance, keep):
+    """Add the ids of the nodes of chain to keep for the given tolerance."""
+    scale = math.cos(math.radians(chain[0].y)) * geo.METRES
+    xs = [p.x * scale for p in chain]
+    ys = [p.y * geo.METRES for p in chain]
+    keep.add(id(chain[0]))
+    keep.add(id(chain[-1]))
+    stack = [(0, len(chain) - 1)]
+    while stack:
+        (first, last) = stack.pop()
+        if last - first < 2:
+            continue
+        (x0, y0, x1, y1) = (xs[first], ys[first], xs[last], ys[last])
+        dx = x1 - x0
+        dy = y1 - y0
+        length = math.hypot(dx, dy)
+        maxdist = -1.0
+        maxindex = first
+        for i in range(first + 1, last):
+            if length > 0.0:
+                dist = abs(dy * (xs[i] - x0) - dx * (ys[i] - y0)) / length
+            else:
+                dist = math.hypot(xs[i] - x0, ys[i] - y0)
+            if dist > maxdist:
+                maxdist = dist
+                maxindex = i
+        if maxdist > tolerance:
+            keep.add(id(chain[maxindex]))
+            stack.append((first, maxindex))
+            stack.append((maxindex, last))
+
+
+def _ways(geometry, geom):
+    if isinstance(geometry, geom.Way):
+        return [geometry]
+    if isinstance(geometry, geom.Relation):
+        return [w for (member, role) in geometry.members for w in _ways(member, geom)]
+    return []
+
+
+def simplify(geometries, features, tolerances):
+    """
+    Simplify the ways of the features found in tolerances, a dict of feature
+    to tolerance in metres. Returns the number of nodes before and after.
+    """
+    import geom
+
+    waytolerance = {}
+    for feature in features:
+        tolerance = tolerances.get(feature)
+        if tolerance is None:
+            continue
+        for way in _ways(feature.geometry, geom):
+            if id(way) in waytolerance:
+                tolerance = min(tolerance, waytolerance[id(way)][1])
+            waytolerance[id(way)] = (way, tolerance)
+
+    def parentways(point):
+        """Return the ids of the ways using point, or None if it is fixed."""
+        ids = []
+        for parent in point.parents:
+            if not isinstance(parent, geom.Way) or id(parent) not in waytolerance:
+                return None
+            ids.append(id(parent))
+        return frozenset(ids)
+
+    keep = set()
+    done = set()
+    for (way, tolerance) in waytolerance.values():
+        points = way.points
+        parents = [parentways(p) for p in points]
+        # Chain ends: way ends, fixed nodes and nodes where the ways change
+        ends = [0]
+        for i in range(1, len(points) - 1):
+            if parents[i] is None or parents[i] != parents[i - 1] \
+                    or parents[i] != parents[i + 1]:
+                ends.append(i)
+        ends.append(len(points) - 1)
+        for n in range(len(ends) - 1):
+            chain = points[ends[n]:ends[n + 1] + 1]
+            key = tuple(id(p) for p in chain)
+            key = min(key, key[::-1])
+            if key in done:
+                continue
+            done.add(key)
+            if key != tuple(id(p) for p in chain):
+                chain = chain[::-1]
+            if len(chain) > 2:
+                # All interior nodes are used by the same ways
+                chaintolerance = min(waytolerance[w][1] for w in parents[ends[n] + 1])
+                _douglaspeucker(chain, chaintolerance, keep)
+            else:
+                keep.update(id(p) for p in chain)
+
+    # Ways which would collapse keep all their nodes, in all ways using them
+    for (way, tolerance) in waytolerance.values():
+        closed = way.points[0] is way.points[-1]
+        if len([p for p in way.points if id(p) in keep]) < (4 if closed else 2):
+            keep.update(id(p) for p in way.points)
+
+    before = 0
+    after = 0
+    dropped = set()
+    for (way, tolerance) in waytolerance.values():
+        points = [p for p in way.points if id(p) in keep]
+        before += len(way.points)
+        after += len(points)
+        for p in way.points:
+            if id(p) not in keep:
+                p.parents.discard(way)
+                if not p.parents:
+                    dropped.add(id(p))
+        way.points = points
+    geometries[:] = [g for g in geometries if id(g) not in dropped]
+
+    l.info("Simplify: %d way nodes reduced to %d", before, after)
+    return (before, after)
+
+
+def quantise(geometries, decimals=DECIMALS):
+    """Round the coordinates of all nodes to decimals decimal places."""
+    import geom
+
+    for g in geometries:
+        if type(g) is geom.Point:
+            g.x = round(g.x, decimals)
+            g.y = round(g.y, decimals)
@@ -0,0 +1,259 @@
+'''
+Output sinks for translated data
+
+A sink receives nodes, ways and relations one at a time, in that order, and
+streams them to a file:
+
+    XmlSink     OSM XML, as written by ogr2osm
+    PbfSink     OSM PBF, dense nodes with delta-encoded ids and coordinates,
+                zlib compressed blocks of up to BLOCK_SIZE entities
+
+open_sink() picks the sink from the file name extension. PBF output is about
+100 times smaller than XML, see benchmarks/bench_sinks.py, but not faster to
+write: encoding each entity in Python costs as much as formatting its XML.
+
+Translations call output() at the end of their preOutputTransform. When the
+OGR2OSM_SINK environment variable names an output file, the ogr2osm
+geometries and features are written there and the lists are emptied, so
+ogr2osm itself only writes an empty .osm file. Otherwise output() does
+nothing.
+'''
+
+import os
+import struct
+import zlib
+
+# Maximum number of entities in a PBF block
+BLOCK_SIZE = 8000
+
+
+class XmlSink(object):
+    """Write OSM XML."""
+
+    def __init__(self, path, generator='ogr2osm'):
+        # xml.sax.saxutils imports urllib.request, only import it when
+        # writing XML
+        from xml.sax.saxutils import quoteattr
+        self.quoteattr = quoteattr
+        self.f = open(path, 'wb')
+        self.f.write(('<?xml version="1.0"?>\n<osm version="0.6" upload="false" generator=%s>\n'
+                      % quoteattr(generator)).encode('utf-8'))
+
+    def _tags(self, tags):
+        quoteattr = self.quoteattr
+        return ''.join(['<tag k=%s v=%s/>' % (quoteattr(_text(k)), quoteattr(_text(v)))
+                        for (k, v) in tags.items()])
+
+    def node(self, id, lat, lon, tags=None):
+        if tags:
+            line = '<node id="%d" lat="%.7f" lon="%.7f">%s</node>\n' % (id, lat, lon, self._tags(tags))
+        else:
+            line = '<node id="%d" lat="%.7f" lon="%.7f"/>\n' % (id, lat, lon)
+        self.f.write(line.encode('utf-8'))
+
+    def way(self, id, refs, tags=None):
+        nds = ''.join(['<nd ref="%d"/>' % ref for ref in refs])
+        line = '<way id="%d">%s%s</way>\n' % (id, nds, self._tags(tags or {}))
+        self.f.write(line.encode('utf-8'))
+
+    def relation(self, id, members, tags=None):
+        """members is a list of (type, ref, role), type 'node', 'way' or 'relation'."""
+        ms = ''.join(['<member type="%s" ref="%d" role=%s/>' % (type, ref, self.quoteattr(_text(role)))
+                      for (type, ref, role) in members])
+        line = '<relation id="%d">%s%s</relation>\n' % (id, ms, self._tags(tags or {}))
+        self.f.write(line.encode('utf-8'))
+
+    def close(self):
+        self.f.write(b'</osm>\n')
+        self.f.close()
+
+
+def _text(s):
+    return s.decode('utf-8') if isinstance(s, bytes) else s
+
+
+def _bytes(s):
+    return s if isinstance(s, bytes) else s.encode('utf-8')
+
+
+# Encodings of the one and two byte varints, filled in on first use
+_varints = []
+
+
+def _varint(value):
+    """Encode an unsigned or int64 integer as a protobuf varint."""
+    if 0 <= value < len(_varints):
+        return _varints[value]
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _packed(values):
+    """Encode a list of unsigned integers as packed varints."""
+    if not _varints:
+        _varints.extend([_varint(v) for v in range(0x4000)])
+    table = _varints
+    return b''.join([table[v] if v < 0x4000 else _varint(v) for v in values])
+
+
+def _delta(values):
+    """Return the zigzag encoded deltas of a list of signed integers."""
+    out = []
+    last = 0
+    for value in values:
+        d = value - last
+        last = value
+        out.append(d << 1 if d >= 0 else ((-d) << 1) - 1)
+    return out
+
+
+def _field(number, data):
+    """Encode a length-delimited field."""
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def _intfield(number, value):
+    """Encode a varint field."""
+    return _varint(number << 3) + _varint(value)
+
+
+class PbfSink(object):
+    """Write OSM PBF."""
+
+    def __init__(self, path, generator='ogr2osm', compresslevel=6):
+        self.f = open(path, 'wb')
+        self.compresslevel = compresslevel
+        self.kind = None
+        self.entities = []
+        self.nodes = ([], [], [], [])
+        header = (_field(4, b'OsmSchema-V0.6') + _field(4, b'DenseNodes')
+                  + _field(16, _bytes(generator)))
+        self._blob(b'OSMHeader', header)
+
+    def _blob(self, type, data):
+        blob = _intfield(2, len(data)) + _field(3, zlib.compress(data, self.compresslevel))
+        header = _field(1, type) + _intfield(3, len(blob))
+        self.f.write(struct.pack('!I', len(header)) + header + blob)
+
+    def _add(self, kind, entity):
+        if kind != self.kind or len(self.entities) >= BLOCK_SIZE:
+            self.flush()
+            self.kind = kind
+        self.entities.append(entity)
+
+    def node(self, id, lat, lon, tags=None):
+        (ids, lats, lons, nodetags) = self.nodes
+        if self.kind != 'node' or len(ids) >= BLOCK_SIZE:
+            self.flush()
+            self.kind = 'node'
+        ids.append(id)
+        lats.append(int(round(lat * 10000000)))
+        lons.append(int(round(lon * 10000000)))
+        nodetags.append(tags)
+
+    def way(self, id, refs, tags=None):
+        self._add('way', (id, refs, tags))
+
+    def relation(self, id, members, tags=None):
+        """members is a list of (type, ref, role), type 'node', 'way' or 'relation'."""
+        self._add('relation', (id, members, tags))
+
+    def flush(self):
+        """Write the buffered entities as one block."""
+        if not self.entities and not self.nodes[0]:
+            return
+        strings = {b'': 0}
+
+        def sid(s):
+            s = _bytes(s)
+            i = strings.get(s)
+            if i is None:
+                i = strings[s] = len(strings)
+            return i
+
+        def keysvals(tags):
+            if not tags:
+                return b''
+            items = list(tags.items())
+            return (_field(2, _packed([sid(k) for (k, v) in items]))
+                    + _field(3, _packed([sid(v) for (k, v) in items])))
+
+        if self.kind == 'node':
+            (ids, lats, lons, nodetags) = self.nodes
+            dense = (_field(1, _packed(_delta(ids)))
+                     + _field(8, _packed(_delta(lats)))
+                     + _field(9, _packed(_delta(lons))))
+            if any(nodetags):
+                kv = []
+                for tags in nodetags:
+                    for (k, v) in (tags or {}).items():
+                        kv.append(sid(k))
+                        kv.append(sid(v))
+                    kv.append(0)
+                dense += _field(10, _packed(kv))
+            group = _field(2, dense)
+            self.nodes = ([], [], [], [])
+        elif self.kind == 'way':
+            group = b''.join([_field(3, _intfield(1, id) + keysvals(tags)
+                                     + _field(8, _packed(_delta(refs))))
+                              for (id, refs, tags) in self.entities])
+        else:
+            types = {'node': 0, 'way': 1, 'relation': 2}
+            group = b''.join([_field(4, _intfield(1, id) + keysvals(tags)
+                                     + _field(8, _packed([sid(m[2]) for m in members]))
+                                     + _field(9, _packed(_delta([m[1] for m in members])))
+                                     + _field(10, _packed([types[m[0]] for m in members])))
+                              for (id, members, tags) in self.entities])
+
+        table = b''.join([_field(1, s) for (s, i) in sorted(strings.items(), key=lambda x: x[1])])
+        self._blob(b'OSMData', _field(1, table) + _field(2, group))
+        self.entities = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+def open_sink(path, **kwargs):
+    """Return a sink for path, PBF for .pbf files and XML otherwise."""
+    if path.endswith('.pbf'):
+        return PbfSink(path, **kwargs)
+    return XmlSink(path, **kwargs)
+
+
+def write(geometries, features, sink):
+    """Write ogr2osm geometries to sink, tagged from their features."""
+    import geom
+
+    featuretags = dict((id(f.geometry), f.tags) for f in features)
+    kinds = {geom.Point: 'node', geom.Way: 'way', geom.Relation: 'relation'}
+    for g in geometries:
+        if type(g) is geom.Point:
+            sink.node(g.id, g.y, g.x, featuretags.get(id(g)))
+    for g in geometries:
+        if type(g) is geom.Way:
+            sink.way(g.id, [p.id for p in g.points], featuretags.get(id(g)))
+    for g in geometries:
+        if type(g) is geom.Relation:
+            sink.relation(g.id, [(kinds[type(m)], m.id, role) for (m, role) in g.members],
+                          featuretags.get(id(g)))
+
+
+def output(geometries, features):
+    """Write to the OGR2OSM_SINK file, if set, instead of ogr2osm's output."""
+    path = os.environ.get('OGR2OSM_SINK')
+    if not path:
+        return
+    sink = open_sink(path)
+    try:
+        write(geometries, features, sink)
+    finally:
+        sink.close()
+    del geometries[:]
+    del features[:]
@@ -0,0 +1,188 @@
+'''
+Statistics of a translation run
+
+Translations count what happens to each feature with plain dict counters,
+without logging anything per feature:
+
+    layer(name)             a layer starts, time is accounted to it from now
+    skip(name)              a layer was skipped by filterLayer
+    count(cls)              a feature of class cls in the current layer
+    output(geoms, feats)    tag histogram and element counts of the output
+    report()                write the report, at the end of preOutputTransform
+    reset()                 forget everything, before the next run in the
+                            same process
+
+The class is what the translation maps from: the MTK kohdeluokka, the TIGER
+MTFCC, 'rejected' for dropped addresses and so on.
+
+The report is written to the file named by the OGR2OSM_STATS environment
+variable, as CSV if it ends in .csv and as JSON otherwise. It has the
+feature count, seconds and share of the run time of each layer, the feature
+count of each class, the tag key histogram, with the values of keys with at
+most MAX_VALUES distinct values, and the number of nodes, ways and relations
+and the bytes written to OGR2OSM_SINK. Without OGR2OSM_STATS the totals are
+logged on one line.
+'''
+
+import io
+import logging as l
+import os
+import time
+
+# Keys with more distinct values only get a total count in the histogram
+MAX_VALUES = 50
+# Output element counts by ogr2osm geometry class
+ELEMENTS = {'Point': 'nodes', 'Way': 'ways', 'Relation': 'relations'}
+
+# Feature counts by layer and class
+classes = {}
+# Seconds by layer
+seconds = {}
+skipped = []
+# Tag key counts, and value counts of keys with few values
+keys = {}
+values = {}
+elements = {}
+# Current layer and the time it started
+current = [None, time.time()]
+
+
+def _switch(name):
+    now = time.time()
+    seconds[current[0]] = seconds.get(current[0], 0.0) + now - current[1]
+    current[0] = name
+    current[1] = now
+
+
+def layer(name):
+    """Account the following features and time to layer name."""
+    _switch(name)
+    classes.setdefault(name, {})
+
+
+def skip(name):
+    skipped.append(name)
+
+
+def count(cls, n=1):
+    """Count n features of class cls in the current layer."""
+    counts = classes.get(current[0])
+    if counts is None:
+        counts = classes[current[0]] = {}
+    counts[cls] = counts.get(cls, 0) + n
+
+
+def output(geometries, features):
+    """Collect the tag histogram and element counts of the output."""
+    _switch('(output)')
+    for feature in features:
+        for (k, v) in feature.tags.items():
+            keys[k] = keys.get(k, 0) + 1
+            kv = values.get(k)
+            if kv is None:
+                kv = values[k] = {}
+            if kv is not False:
+                kv[v] = kv.get(v, 0) + 1
+                if len(kv) > MAX_VALUES:
+                    values[k] = False
+    for g in geometries:
+        kind = ELEMENTS.get(type(g).__name__, type(g).__name__)
+        elements[kind] = elements.get(kind, 0) + 1
+
+
+def _report():
+    _switch(current[0])
+    names = set(classes) | set(seconds)
+    if not classes.get(None):
+        # Time before the first layer
+        names.discard(None)
+    total = sum(seconds.get(name, 0.0) for name in names) or 1.0
+    layers = {}
+    for name in names:
+        layers[_label(name)] = {
+            'features': sum(classes.get(name, {}).values()),
+            'seconds': round(seconds.get(name, 0.0), 3),
+            'share': round(seconds.get(name, 0.0) / total, 4),
+        }
+    histogram = {}
+    for (k, n) in keys.items():
+        histogram[k] = {'count': n}
+        if values.get(k):
+            histogram[k]['values'] = values[k]
+    out = dict(elements)
+    sinkpath = os.environ.get('OGR2OSM_SINK')
+    if sinkpath and os.path.exists(sinkpath):
+        out['bytes'] = os.path.getsize(sinkpath)
+    return {
+        'layers': layers,
+        'skipped': skipped,
+        'classes': dict((_label(name), dict((_text(c), n) for (c, n) in counts.items()))
+                        for (name, counts) in classes.items() if counts),
+        'tags': histogram,
+        'output': out,
+    }
+
+
+def _csvrows(report):
+    yield ('section', 'layer', 'name', 'value')
+    for (name, row) in sorted(report['layers'].items()):
+        for field in ('features', 'seconds', 'share'):
+            yield ('layer', name, field, row[field])
+    for name in report['skipped']:
+        yield ('skipped', name, '', '')
+    for (name, counts) in sorted(report['classes'].items()):
+        for (cls, n) in sorted(counts.items()):
+            yield ('class', name, cls, n)
+    for (k, row) in sorted(report['tags'].items()):
+        yield ('tag', '', k, row['count'])
+        for (v, n) in sorted(row.get('values', {}).items()):
+            yield ('tag', '', '%s=%s' % (k, v), n)
+    for (kind, n) in sorted(report['output'].items()):
+        yield ('output', '', kind, n)
+
+
+def report(path=None):
+    """Write the report to path, or OGR2OSM_STATS. Returns the report."""
+    result = _report()
+    path = path or os.environ.get('OGR2OSM_STATS')
+    if not path:
+        l.info("Statistics: %d features in %d layers, %d skipped, %d output elements",
+               sum(row['features'] for row in result['layers'].values()),
+               len(result['layers']), len(skipped), sum(elements.values()))
+    elif path.endswith('.csv'):
+        import csv
+        # The Python 2 csv module writes byte strings only
+        if str is bytes:
+            f = open(path, 'wb')
+        else:
+            f = io.open(path, 'w', encoding='utf-8', newline='')
+        with f:
+            writer = csv.writer(f)
+            for row in _csvrows(result):
+                row = [_text(x) for x in row]
+                writer.writerow([x.encode('utf-8') for x in row] if str is bytes else row)
+    else:
+        import json
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(_text(json.dumps(result, indent=1, sort_keys=True, ensure_ascii=False)))
+    return result
+
+
+def _label(name):
+    """Features of translations without filterLayer are in layer ''."""
+    return u'' if name is None else _text(name)
+
+
+def _text(x):
+    if isinstance(x, bytes):
+        return x.decode('utf-8')
+    return x if isinstance(x, type(u'')) else u'%s' % (x,)
+
+
+def reset():
+    """Forget everything counted so far."""
+    for d in (classes, seconds, keys, values, elements):
+        d.clear()
+    del skipped[:]
+    current[0] = None
+    current[1] = time.time()
@@ -0,0 +1,120 @@
+'''
+Stitching of line features cut into segments
+
+Sources cut at map sheet and attribute borders produce chains of short ways
+with identical tags. stitch() joins consecutive segments of the selected
+features through a hash index of their end nodes. Two segments are joined at
+a node when
+
+  - they are the only ways using the node, and both end there
+  - their tags are identical
+  - for oneway=yes/-1 ways, they run in the same direction
+
+Address interpolation ranges given as (start feature, end feature) pairs of
+addr:housenumber nodes are merged as well. Interpolated segments are only
+joined head to tail with house numbers increasing across the joint, and the
+two address nodes at the joint are dropped.
+
+Call stitch() from a translation's preOutputTransform.
+'''
+
+import logging as l
+
+
+def _number(feature):
+    try:
+        return int(feature.tags['addr:housenumber'])
+    except (KeyError, ValueError):
+        return None
+
+
+def _ways(point, geom):
+    return [g for g in point.parents if isinstance(g, geom.Way)]
+
+
+def stitch(geometries, features, selected, interpolations=None):
+    """
+    Join the consecutive segments of the selected features.
+
+    interpolations maps a feature to the [start, end] features of its
+    address interpolation. Returns the number of ways before and after.
+    """
+    import geom
+
+    if interpolations is None:
+        interpolations = {}
+
+    # Features ending at each node
+    ends = {}
+    candidates = []
+    for feature in selected:
+        way = feature.geometry
+        if not isinstance(way, geom.Way) or len(way.points) < 2 \
+                or way.points[0] is way.points[-1]:
+            continue
+        candidates.append(feature)
+        ends.setdefault(id(way.points[0]), []).append(feature)
+        ends.setdefault(id(way.points[-1]), []).append(feature)
+
+    removed = set()
+    removedgeometries = set()
+    for feature in candidates:
+        if id(feature) in removed:
+            continue
+        way = feature.geometry
+        oneway = feature.tags.get('oneway') in ('yes', '-1')
+        joined = True
+        while joined:
+            joined = False
+            for atend in (True, False):
+                point = way.points[-1] if atend else way.points[0]
+                atpoint = ends.get(id(point), [])
+                if len(atpoint) != 2 or len(_ways(point, geom)) != 2:
+                    continue
+                other = atpoint[1] if atpoint[0] is feature else atpoint[0]
+                if other is feature or other.tags != feature.tags:
+                    continue
+                otherpoints = other.geometry.points
+                # Does the other segment continue in the same direction
+                forward = (otherpoints[0] is point) == atend
+                if oneway and not forward:
+                    continue
+
+                ranges = (interpolations.get(feature), interpolations.get(other))
+                if ranges[0] is not None or ranges[1] is not None:
+                    if None in ranges or not forward:
+                        continue
+                    (first, second) = ranges if atend else ranges[::-1]
+                    numbers = [_number(f) for f in first + second]
+                    if None in numbers or numbers != sorted(numbers):
+                        continue
+                    # Drop the address nodes at the joint
+                    removed.add(id(first[1]))
+                    removed.add(id(second[0]))
+                    interpolations[feature] = [first[0], second[1]]
+
+                if not forward:
+                    otherpoints = otherpoints[::-1]
+                if atend:
+                    way.points = way.points + otherpoints[1:]
+                    far = otherpoints[-1]
+                else:
+                    way.points = otherpoints[:-1] + way.points
+                    far = otherpoints[0]
+                for p in set(otherpoints):
+                    p.parents.discard(other.geometry)
+                    p.addparent(way)
+                del ends[id(point)]
+                farends = ends[id(far)]
+                farends[farends.index(other)] = feature
+                removed.add(id(other))
+                removedgeometries.add(id(other.geometry))
+                joined = True
+                break
+
+    count = len(candidates)
+    stitched = len(removedgeometries)
+    geometries[:] = [g for g in geometries if id(g) not in removedgeometries]
+    features[:] = [f for f in features if id(f) not in removed]
+    l.info("Stitch: joined %d ways into %d", count, count - stitched)
+    return (count, count - stitched)
@@ -0,0 +1,170 @@
+'''
+Validation of address streets against a road network
+
+Address datasets spell out their street names separately from the road
+dataset, and a street name which does not exist only shows up in OSM QA
+later. When the OGR2OSM_STREETS environment variable names the road dataset,
+check() looks up the addr:street of each address in the names of the roads,
+expanded by the same function as the addresses' streets:
+
+    streets.check(tags['addr:street'], 'ROAD_NAME', expandName)
+
+Unknown streets are counted in the statistics as UNKNOWN, and reported with
+warn() along with the nearest road names, those within MAX_DISTANCE edits.
+Every unknown street is reported, the 'street' warnings have no limit.
+
+The road names are read once, on the first check(), into a set of names
+normalised to lower case and single spaces. Near misses are found with a
+deletion index: every string made by deleting up to MAX_DISTANCE characters
+from a road name points to the name, so the candidates for a street are
+found by looking up its own deletions, with no scan over the road names.
+The candidates are then confirmed by their edit distance, and the result is
+kept in an LRUCache, as the addresses of a misspelt street come together.
+'''
+
+import os
+
+from common import memo, stats, warn
+
+STREETS_ENV = 'OGR2OSM_STREETS'
+# Largest edit distance of a near miss
+MAX_DISTANCE = 2
+# Near misses reported per street
+CANDIDATES = 3
+# Statistics class of addresses with an unknown street
+UNKNOWN = 'unknown street'
+
+warn.set_limit('street', None)
+
+# StreetIndex of each road dataset path
+indexes = {}
+
+
+def normalise(name):
+    return u' '.join(name.lower().split())
+
+
+def _deletions(name, distance):
+    """Return the strings made by deleting up to distance characters from name."""
+    found = set([name])
+    last = found
+    for _ in range(distance):
+        last = set(s[:i] + s[i + 1:] for s in last for i in range(len(s)))
+        found |= last
+    return found
+
+
+def distance(a, b, limit):
+    """Return the edit distance of a and b, or limit + 1 if it is over limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for (i, ca) in enumerate(a):
+        current = [i + 1]
+        for (j, cb) in enumerate(b):
+            current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class StreetIndex(object):
+    """Normalised road names, and their deletions for near misses."""
+
+    def __init__(self, names=(), max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        # Road name by normalised name
+        self.names = {}
+        # Normalised names by deletion
+        self.deletions = {}
+        # Near misses by normalised street
+        self.cache = memo.LRUCache()
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        key = normalise(name)
+        if not key or key in self.names:
+            return
+        self.names[key] = name
+        for s in _deletions(key, self.max_distance):
+            self.deletions.setdefault(s, []).append(key)
+
+    def __contains__(self, street):
+        return normalise(street) in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, street, n=CANDIDATES):
+        """Return up to n road names nearest to street, nearest first."""
+        key = normalise(street)
+        found = self.cache.get((key, n))
+        if found is not None:
+            return found
+        candidates = set()
+        for s in _deletions(key, self.max_distance):
+            candidates.update(self.deletions.get(s, ()))
+        found = []
+        for candidate in candidates:
+            d = distance(key, candidate, self.max_distance)
+            if d <= self.max_distance:
+                found.append((d, candidate))
+        found = [self.names[c] for (d, c) in sorted(found)[:n]]
+        self.cache.put((key, n), found)
+        return found
+
+
+def load(path, field, translate=None):
+    """Return the StreetIndex of the field values of the dataset at path."""
+    import logging as l
+
+    from osgeo import ogr
+
+    from common import compat
+
+    datasource = ogr.Open(path)
+    if datasource is None:
+        raise IOError('Cannot open %s' % path)
+    index = StreetIndex()
+    for i in range(datasource.GetLayerCount()):
+        layer = datasource.GetLayer(i)
+        column = layer.GetLayerDefn().GetFieldIndex(field)
+        if column < 0:
+            continue
+        for ogrfeature in layer:
+            value = ogrfeature.GetFieldAsString(column)
+            if compat.PY2:
+                value = value.decode('utf-8', 'replace')
+            value = value.strip()
+            if value:
+                index.add(translate(value) if translate else value)
+    l.info("Streets: %d road names in %s", len(index), path)
+    return index
+
+
+def check(street, field, translate=None, path=None):
+    """
+    Check street against the road names of the dataset at path.
+
+    The names are the values of field, passed through translate, path
+    defaults to OGR2OSM_STREETS and nothing is checked without one. Returns
+    True if the street is known, False if not and None without a path.
+    """
+    path = path or os.environ.get(STREETS_ENV)
+    if not path:
+        return None
+    index = indexes.get(path)
+    if index is None:
+        index = indexes[path] = load(path, field, translate)
+    if street in index:
+        return True
+    stats.count(UNKNOWN)
+    nearest = index.nearest(street)
+    if nearest:
+        warn.warn('street', "Street %s is not in the road network, nearest %s",
+                  street, ', '.join(nearest))
+    else:
+        warn.warn('street', "Street %s is not in the road network", street)
+    return False
@@ -0,0 +1,309 @@
+'''
+Tiled processing of large inputs
+
+The extent of the input is split into a grid of tiles, and ogr2osm is run
+once per tile, so only the features of one tile are in memory at a time.
+Each run gets its tile in the OGR2OSM_TILE environment variable as
+"index,minx,miny,maxx,maxy", in the coordinates of the source layers.
+
+Translations supporting tiles call
+
+    filter_layer(layer)     in filterLayer, sets the layer's spatial filter
+    owns(ogrfeature)        in filterFeature, drop the feature if False
+    stable_ids(geometries, features)
+                            in preOutputTransform, before output and after
+                            common.nodes.merge(geometries, features)
+
+The spatial filter returns every feature whose envelope intersects the tile,
+so features crossing a tile border are read by more than one run. owns()
+keeps a feature only in the tile containing the lower left corner of its
+envelope. Features are not cut at tile borders, and joining stages such as
+topology.dissolve() and stitch.stitch() only see the features of one tile.
+
+stable_ids() numbers untagged nodes by their coordinates, so a node used by
+features of two tiles gets the same id in both outputs. Untagged nodes at
+the same coordinates would get the same id too, so they must be merged first
+by nodes.merge(), which rounds coordinates alike. Tagged nodes, ways
+and relations are numbered from a range of ids per tile above all the
+coordinate ids, as two point features may share coordinates. Nodes are
+sorted by id, and merge() joins the tile outputs by streaming the node lists
+through a k-way merge which drops the repeated border nodes, in memory
+independent of input size.
+
+The tile outputs are written to the directory OUTPUT.tiles, and finished
+tiles are recorded in its manifest.jsonl, see common.checkpoint. A rerun
+after a failed tile or an interrupted run only translates the tiles which
+are not recorded; --restart translates every tile again. The directory is
+removed once the tiles are merged. Tile ids need no restoring, they are
+given by the tile index.
+
+Usage: python -m common.tiles [-j JOBS] [--size SIZE] [--ogr2osm CMD] [--restart]
+           -t TRANSLATION SOURCE OUTPUT
+
+SIZE is the tile width and height in source units. The ogr2osm command
+defaults to the OGR2OSM environment variable or 'ogr2osm.py' on the PATH.
+'''
+
+import math
+import os
+import re
+import sys
+
+TILE_ENV = 'OGR2OSM_TILE'
+# Coordinate scale of node ids, 7 decimals is about 1 cm
+SCALE = 10000000
+# Distinct longitude values at SCALE
+LON_VALUES = 360 * SCALE + 1
+# Ids of tagged nodes, ways and relations, per tile, start above the
+# largest coordinate id, 180 * SCALE * LON_VALUES
+TILE_BASE = 7 * 10 ** 18
+TILE_IDS = 1000000000
+
+# Tile of this run, parsed on first use, None when not tiled
+_tile = []
+
+
+def tile():
+    """Return (index, (minx, miny, maxx, maxy)) of this run, or None."""
+    if not _tile:
+        value = os.environ.get(TILE_ENV)
+        if value:
+            parts = value.split(',')
+            _tile.append((int(parts[0]), tuple(float(p) for p in parts[1:5])))
+        else:
+            _tile.append(None)
+    return _tile[0]
+
+
+def reset():
+    """Forget the tile of this run, for common.worker."""
+    del _tile[:]
+
+
+def filter_layer(layer):
+    """Restrict layer to the features intersecting the tile of this run."""
+    t = tile()
+    if t is not None:
+        layer.SetSpatialFilterRect(*t[1])
+    return layer
+
+
+def owns(ogrfeature):
+    """Return True if ogrfeature belongs to the tile of this run."""
+    t = tile()
+    if t is None:
+        return True
+    (index, (minx, miny, maxx, maxy)) = t
+    geometry = ogrfeature.GetGeometryRef()
+    if geometry is None:
+        # Features without geometry are written by the first tile
+        return index == 0
+    (gminx, gmaxx, gminy, gmaxy) = geometry.GetEnvelope()
+    return minx <= gminx < maxx and miny <= gminy < maxy
+
+
+def node_id(x, y):
+    """Return the id of the node at WGS84 coordinates x, y."""
+    lon = int(round((x + 180.0) * SCALE))
+    lat = int(round((y + 90.0) * SCALE))
+    return -(lat * LON_VALUES + lon + 1)
+
+
+def stable_ids(geometries, features):
+    """
+    Renumber the geometries of a tiled run, nodes sorted by id.
+
+    The untagged nodes must have distinct coordinates, see nodes.merge().
+    """
+    import geom
+
+    t = tile()
+    if t is None:
+        return
+    tagged = set(id(f.geometry) for f in features if f.tags)
+    n = TILE_BASE + t[0] * TILE_IDS
+    for g in geometries:
+        if type(g) is geom.Point and id(g) not in tagged:
+            g.id = node_id(g.x, g.y)
+        else:
+            n += 1
+            g.id = -n
+    geometries.sort(key=lambda g: (type(g) is not geom.Point, g.id if type(g) is geom.Point else 0))
+
+
+def grid(extent, size):
+    """Return the tile rectangles covering extent (minx, maxx, miny, maxy)."""
+    (minx, maxx, miny, maxy) = extent
+    columns = max(1, int(math.ceil((maxx - minx) / size)))
+    rows = max(1, int(math.ceil((maxy - miny) / size)))
+    rects = []
+    for row in range(rows):
+        for column in range(columns):
+            x = minx + column * size
+            y = miny + row * size
+            # The last row and column reach past the extent, owns() is
+            # half-open
+            rects.append((x, y, x + size if column < columns - 1 else maxx + size,
+                          y + size if row < rows - 1 else maxy + size))
+    return rects
+
+
+def extent(source):
+    """Return the union of the extents of the layers of source."""
+    from osgeo import ogr
+
+    datasource = ogr.Open(source)
+    if datasource is None:
+        raise IOError('Cannot open %s' % source)
+    extents = [datasource.GetLayer(i).GetExtent() for i in range(datasource.GetLayerCount())]
+    return (min(e[0] for e in extents), max(e[1] for e in extents),
+            min(e[2] for e in extents), max(e[3] for e in extents))
+
+
+# Start of an element, ogr2osm does not write id as the first attribute
+_element = re.compile(br'\s*<(node|way|relation)\b[^>]*?\sid="(-?\d+)"')
+
+
+def _elements(path):
+    """Yield (kind, id, lines) of the elements of an OSM XML file."""
+    with open(path, 'rb') as f:
+        current = None
+        for line in f:
+            m = _element.match(line)
+            if m is not None:
+                if current is not None:
+                    yield current
+                current = (m.group(1).decode('ascii'), int(m.group(2)), [line])
+            elif current is not None:
+                if line.lstrip().startswith(b'</osm'):
+                    yield current
+                    current = None
+                else:
+                    current[2].append(line)
+        if current is not None:
+            yield current
+
+
+def _nodes(path):
+    for (kind, id, lines) in _elements(path):
+        if kind == 'node':
+            yield (id, b''.join(lines))
+
+
+def merge(paths, outpath):
+    """
+    Merge the outputs of the tiles to outpath, writing each node once.
+
+    Returns the number of repeated nodes dropped.
+    """
+    import heapq
+
+    dropped = 0
+    with open(outpath, 'wb') as out:
+        out.write(b'<?xml version="1.0"?>\n'
+                  b'<osm version="0.6" upload="false" generator="common.tiles">\n')
+        last = None
+        for (id, data) in heapq.merge(*[_nodes(p) for p in paths]):
+            if id == last:
+                dropped += 1
+                continue
+            last = id
+            out.write(data)
+        for kind in ('way', 'relation'):
+            for path in paths:
+                for (k, id, lines) in _elements(path):
+                    if k == kind:
+                        out.writelines(lines)
+        out.write(b'</osm>\n')
+    return dropped
+
+
+def translate(job):
+    """Run ogr2osm on one tile, return (index, output, returncode)."""
+    import subprocess
+
+    (command, translation, source, index, rect, output) = job
+    env = dict(os.environ)
+    env.pop('OGR2OSM_SINK', None)
+    if env.get('OGR2OSM_STATS'):
+        (base, ext) = os.path.splitext(env['OGR2OSM_STATS'])
+        env['OGR2OSM_STATS'] = '%s.tile%d%s' % (base, index, ext)
+    env[TILE_ENV] = ','.join([str(index)] + [repr(v) for v in rect])
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join([root] + [p for p in [env.get('PYTHONPATH')] if p])
+    args = command + ['-f', '-t', translation, '-o', output, source]
+    with open(output + '.log', 'w') as log:
+        returncode = subprocess.call(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return (index, output, returncode)
+
+
+def main(argv=None):
+    # Imported here, the translations import this module in every run
+    import argparse
+    import multiprocessing
+    import shlex
+    import shutil
+
+    from common import checkpoint
+
+    parser = argparse.ArgumentParser(description='Translate a large input in tiles.')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of parallel ogr2osm processes')
+    parser.add_argument('--size', type=float, default=50000.0,
+                        help='Tile width and height in source units')
+    parser.add_argument('--ogr2osm', default=os.environ.get('OGR2OSM', 'ogr2osm.py'),
+                        help='Command used to run ogr2osm')
+    parser.add_argument('--restart', action='store_true',
+                        help='Translate every tile, also those finished by an earlier run')
+    parser.add_argument('-t', '--translation', required=True)
+    parser.add_argument('source')
+    parser.add_argument('output')
+    args = parser.parse_args(argv)
+
+    command = shlex.split(args.ogr2osm)
+    rects = grid(extent(args.source), args.size)
+    workdir = args.output + '.tiles'
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    manifest = checkpoint.Manifest(os.path.join(workdir, 'manifest.jsonl'))
+    if args.restart:
+        manifest.remove()
+    outputs = {}
+    keys = {}
+    jobs = []
+    for (index, rect) in enumerate(rects):
+        outputs[index] = os.path.join(workdir, 'tile%d.osm' % index)
+        keys[index] = checkpoint.job_key(args.source, args.translation, index, rect)
+        if not manifest.done(keys[index], outputs[index]):
+            jobs.append((command, args.translation, args.source, index, rect, outputs[index]))
+    if len(jobs) < len(rects):
+        sys.stdout.write('Resuming, %d of %d tiles already translated\n'
+                         % (len(rects) - len(jobs), len(rects)))
+    failed = False
+    pool = multiprocessing.Pool(args.jobs)
+    try:
+        for (index, output, returncode) in pool.imap_unordered(translate, jobs):
+            if returncode != 0:
+                shutil.copy(output + '.log', args.output + '.tile%d.log' % index)
+                sys.stderr.write('Tile %d failed, see %s.tile%d.log\n'
+                                 % (index, args.output, index))
+                failed = True
+            else:
+                manifest.record(keys[index], output)
+    finally:
+        pool.close()
+        pool.join()
+        manifest.close()
+    if failed:
+        sys.stderr.write('Rerun to translate the failed tiles, the others are kept in %s\n'
+                         % workdir)
+        return 1
+    dropped = merge([outputs[i] for i in sorted(outputs)], args.output)
+    sys.stdout.write('%s: merged %d tiles, dropped %d repeated border nodes\n'
+                     % (args.output, len(rects), dropped))
+    shutil.rmtree(workdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
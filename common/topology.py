@@ -0,0 +1,337 @@
+'''
+Shared-way topology builder for boundary polygons
+
+ogr2osm writes every polygon as its own closed way (or a multipolygon relation
+of closed ways), so the border between two adjacent areas is written twice.
+build() splits the rings of the selected features at the nodes where the set
+of neighbouring polygons changes, writes each resulting segment once as an
+untagged way, and replaces the polygon geometry of each feature by a relation
+of those ways.
+
+Nodes are matched through a hash index of their coordinates quantised to
+1e-7 degrees, so duplicate nodes left by the input are merged as well.
+
+dissolve() merges areas with identical tags which share edges into one
+area, removing the shared edges.
+
+Call these from a translation's preOutputTransform.
+'''
+
+import logging as l
+
+# Coordinate quantisation factor of the node index
+QUANT = 10000000
+# Maximum number of nodes in a way written by dissolve()
+MAX_WAY_NODES = 2000
+
+
+def _rings(geometry, geom, role='outer'):
+    """Return a list of (way, role) of the closed rings of a polygon geometry."""
+    if isinstance(geometry, geom.Way):
+        if len(geometry.points) < 4 or geometry.points[0] != geometry.points[-1]:
+            return None
+        return [(geometry, role)]
+    if isinstance(geometry, geom.Relation):
+        rings = []
+        for (member, memberrole) in geometry.members:
+            memberrings = _rings(member, geom, memberrole or role)
+            if memberrings is None:
+                return None
+            rings.extend(memberrings)
+        return rings
+    return None
+
+
+def _canonical(points, index):
+    """Replace points by the first point seen at the same coordinates."""
+    canonical = []
+    for point in points:
+        key = (int(round(point.x * QUANT)), int(round(point.y * QUANT)))
+        canonical.append(index.setdefault(key, point))
+    return canonical
+
+
+def _edge(a, b):
+    a = id(a)
+    b = id(b)
+    return (a, b) if a < b else (b, a)
+
+
+def _chainkey(points):
+    """Return a key identifying a chain of points regardless of direction."""
+    ids = [id(p) for p in points]
+    if ids[0] == ids[-1]:
+        # Closed chain, also independent of the start node
+        ids = ids[:-1]
+        start = ids.index(min(ids))
+        ids = ids[start:] + ids[:start]
+        backwards = [ids[0]] + ids[:0:-1]
+        return tuple(min(ids, backwards)) + (ids[0],)
+    ids = tuple(ids)
+    return min(ids, ids[::-1])
+
+
+def build(geometries, features, select=None, reltype='boundary'):
+    """
+    Rebuild the polygons of the selected features from shared ways.
+
+    select is called with each feature and defaults to features with a
+    boundary tag. The features get relations tagged with type=reltype.
+    Returns the number of ring ways replaced and the number of ways created.
+    """
+    import geom
+
+    if select is None:
+        select = lambda f: 'boundary' in f.tags
+
+    # Rings of the selected features, with duplicate nodes replaced by the
+    # first node seen at the same coordinates
+    index = {}
+    rings = []
+    oldgeometries = set()
+    for feature in features:
+        if not select(feature):
+            continue
+        featurerings = _rings(feature.geometry, geom)
+        if featurerings is None:
+            continue
+        oldgeometries.add(feature.geometry)
+        for (way, role) in featurerings:
+            oldgeometries.add(way)
+            rings.append((feature, role, way, _canonical(way.points, index)))
+    if not rings:
+        return (0, 0)
+
+    # Rings using each edge
+    owners = {}
+    for (n, (feature, role, way, points)) in enumerate(rings):
+        for i in range(len(points) - 1):
+            owners.setdefault(_edge(points[i], points[i + 1]), set()).add(n)
+
+    # Split the rings where the owners change and write each chain once
+    chainways = {}
+    members = {}
+    for (n, (feature, role, way, points)) in enumerate(rings):
+        count = len(points) - 1
+        edgeowners = [owners[_edge(points[i], points[i + 1])] for i in range(count)]
+        splits = [i for i in range(count) if edgeowners[i - 1] != edgeowners[i]]
+        if splits:
+            ring = points[splits[0]:-1] + points[:splits[0] + 1]
+            splits = [i - splits[0] for i in splits] + [count]
+            chains = [ring[splits[i]:splits[i + 1] + 1] for i in range(len(splits) - 1)]
+        else:
+            chains = [points]
+        for chain in chains:
+            key = _chainkey(chain)
+            chainway = chainways.get(key)
+            if chainway is None:
+                chainway = geom.Way()
+                chainway.points = chain
+                for point in set(chain):
+                    point.addparent(chainway)
+                chainways[key] = chainway
+            members.setdefault(feature, []).append((chainway, role))
+
+    # Replace the feature geometries
+    for feature in features:
+        featuremembers = members.get(feature)
+        if featuremembers is None:
+            continue
+        relation = geom.Relation()
+        for (chainway, role) in featuremembers:
+            relation.members.append((chainway, role))
+            chainway.addparent(relation)
+        feature.geometry = relation
+        relation.addparent(feature)
+        feature.tags['type'] = reltype
+
+    # Detach the old rings and drop the nodes left without a parent
+    for (feature, role, way, points) in rings:
+        for point in set(way.points):
+            point.parents.discard(way)
+            if not point.parents:
+                oldgeometries.add(point)
+    oldids = set(id(g) for g in oldgeometries)
+    geometries[:] = [g for g in geometries if id(g) not in oldids]
+
+    l.info("Topology: replaced %d ring ways by %d shared ways", len(rings), len(chainways))
+    return (len(rings), len(chainways))
+
+
+def _chainrings(edges, points):
+    """
+    Join undirected edges (pairs of point ids) into closed rings.
+
+    Returns a list of point lists, or None if the edges do not form rings.
+    """
+    ends = {}
+    for edge in edges:
+        for end in edge:
+            ends.setdefault(end, []).append(edge)
+    unused = set(edges)
+    rings = []
+    for edge in edges:
+        if edge not in unused:
+            continue
+        unused.discard(edge)
+        (start, current) = edge
+        ring = [start, current]
+        while current != start:
+            for nextedge in ends[current]:
+                if nextedge in unused:
+                    break
+            else:
+                return None
+            unused.discard(nextedge)
+            current = nextedge[1] if nextedge[0] == current else nextedge[0]
+            ring.append(current)
+        rings.append([points[i] for i in ring])
+    return rings
+
+
+def _inside(x, y, ring):
+    """Return True if (x, y) is inside the ring of points."""
+    inside = False
+    for i in range(len(ring) - 1):
+        (a, b) = (ring[i], ring[i + 1])
+        if (a.y > y) != (b.y > y) and x < a.x + (y - a.y) * (b.x - a.x) / (b.y - a.y):
+            inside = not inside
+    return inside
+
+
+def _roles(rings):
+    """Return outer or inner for each ring, by the number of rings it is in."""
+    boxes = [(min(p.x for p in r), min(p.y for p in r), max(p.x for p in r), max(p.y for p in r))
+             for r in rings]
+    roles = []
+    for (n, ring) in enumerate(rings):
+        # Test the midpoint of an edge, vertices can be shared between rings
+        x = (ring[0].x + ring[1].x) / 2.0
+        y = (ring[0].y + ring[1].y) / 2.0
+        depth = 0
+        for (m, other) in enumerate(rings):
+            (minx, miny, maxx, maxy) = boxes[m]
+            if m != n and minx <= x <= maxx and miny <= y <= maxy and _inside(x, y, other):
+                depth += 1
+        roles.append('inner' if depth % 2 else 'outer')
+    return roles
+
+
+def _ringways(ring, geom):
+    """Return ways for a ring, split into parts of at most MAX_WAY_NODES nodes."""
+    ways = []
+    for start in range(0, len(ring) - 1, MAX_WAY_NODES - 1):
+        way = geom.Way()
+        way.points = ring[start:start + MAX_WAY_NODES]
+        for point in set(way.points):
+            point.addparent(way)
+        ways.append(way)
+    return ways
+
+
+def dissolve(geometries, features, selected):
+    """
+    Merge the selected area features with equal tags which share edges.
+
+    Features sharing an edge are found through a hash index of the edges.
+    Each group of connected features is replaced by its first feature, with
+    a new geometry made of the edges which are not shared. Areas which only
+    touch at a node, or along edges with different vertices, are not merged.
+    Returns the number of features before and after merging.
+    """
+    import geom
+
+    # Rings of the selected features, grouped by tags
+    index = {}
+    groups = {}
+    count = 0
+    for feature in selected:
+        rings = _rings(feature.geometry, geom)
+        if rings is None:
+            continue
+        count += 1
+        rings = [(way, _canonical(way.points, index)) for (way, role) in rings]
+        groups.setdefault(frozenset(feature.tags.items()), []).append((feature, rings))
+
+    oldgeometries = set()
+    oldrings = []
+    removed = set()
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        # Features using each edge
+        owners = {}
+        for (n, (feature, rings)) in enumerate(members):
+            for (way, points) in rings:
+                for i in range(len(points) - 1):
+                    owners.setdefault(_edge(points[i], points[i + 1]), []).append(n)
+
+        # Connected groups of features
+        parent = list(range(len(members)))
+
+        def find(n):
+            while parent[n] != n:
+                parent[n] = parent[parent[n]]
+                n = parent[n]
+            return n
+
+        for edgeowners in owners.values():
+            for n in edgeowners[1:]:
+                parent[find(n)] = find(edgeowners[0])
+        components = {}
+        for n in range(len(members)):
+            components.setdefault(find(n), []).append(n)
+
+        for component in components.values():
+            if len(component) < 2:
+                continue
+            # The edges used an odd number of times form the new boundary
+            points = {}
+            edges = []
+            seen = set()
+            for n in component:
+                for (way, ringpoints) in members[n][1]:
+                    for i in range(len(ringpoints) - 1):
+                        edge = _edge(ringpoints[i], ringpoints[i + 1])
+                        if len(owners[edge]) % 2 and edge not in seen:
+                            seen.add(edge)
+                            edges.append(edge)
+                        points[id(ringpoints[i])] = ringpoints[i]
+            rings = _chainrings(edges, points)
+            if not rings:
+                continue
+
+            feature = members[component[0]][0]
+            roles = _roles(rings)
+            if len(rings) == 1 and len(rings[0]) <= MAX_WAY_NODES:
+                geometry = _ringways(rings[0], geom)[0]
+            else:
+                geometry = geom.Relation()
+                for (ring, role) in zip(rings, roles):
+                    for way in _ringways(ring, geom):
+                        geometry.members.append((way, role))
+                        way.addparent(geometry)
+                feature.tags['type'] = 'multipolygon'
+            for n in component:
+                (other, otherrings) = members[n]
+                oldgeometries.add(other.geometry)
+                for (way, ringpoints) in otherrings:
+                    oldgeometries.add(way)
+                    oldrings.append(way)
+                if other is not feature:
+                    removed.add(id(other))
+            feature.geometry = geometry
+            geometry.addparent(feature)
+
+    # Detach the old rings and drop the nodes left without a parent
+    for way in oldrings:
+        for point in set(way.points):
+            point.parents.discard(way)
+            if not point.parents:
+                oldgeometries.add(point)
+    oldids = set(id(g) for g in oldgeometries)
+    geometries[:] = [g for g in geometries if id(g) not in oldids]
+    features[:] = [f for f in features if id(f) not in removed]
+
+    l.info("Dissolve: merged %d areas into %d", count, count - len(removed))
+    return (count, count - len(removed))
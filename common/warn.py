@@ -0,0 +1,78 @@
+'''
+Aggregated warnings
+
+Per-feature problems are reported with warn() instead of being logged one
+line at a time:
+
+    warn('kohdeluokka', "Kohdeluokka %s not known to this script", 12345)
+
+The message is formatted only when it is logged. flush() logs each distinct
+message once, with the number of times it was seen, at the end of
+preOutputTransform, and at exit if the run stopped before that. A category
+keeps at most LIMIT distinct messages, or the limit given to set_limit();
+further messages of the category are only counted. reset() forgets the
+warnings without logging them.
+'''
+
+import atexit
+import logging as l
+
+# Default number of distinct messages kept per category
+LIMIT = 20
+
+# Distinct message limits by category, None for no limit
+limits = {}
+# Counts by (category, format, args), and the keys in the order first seen
+counts = {}
+order = []
+# Distinct messages kept, and occurrences of messages over the limit,
+# by category
+distinct = {}
+suppressed = {}
+
+
+def set_limit(category, limit):
+    """Keep at most limit distinct messages of category, None for all."""
+    limits[category] = limit
+
+
+def warn(category, format, *args):
+    """Count the warning format % args of category."""
+    key = (category, format, args)
+    n = counts.get(key)
+    if n is not None:
+        counts[key] = n + 1
+        return
+    kept = distinct.get(category, 0)
+    limit = limits.get(category, LIMIT)
+    if limit is not None and kept >= limit:
+        suppressed[category] = suppressed.get(category, 0) + 1
+        return
+    distinct[category] = kept + 1
+    counts[key] = 1
+    order.append(key)
+
+
+def flush(level=l.WARNING):
+    """Log the warnings seen so far and forget them."""
+    for key in order:
+        (category, format, args) = key
+        n = counts[key]
+        if n > 1:
+            l.log(level, "%s (%d times)", format % args, n)
+        else:
+            l.log(level, format, *args)
+    for (category, n) in sorted(suppressed.items()):
+        l.log(level, "%s: %d more warnings not shown", category, n)
+    reset()
+
+
+def reset():
+    """Forget the warnings seen so far."""
+    counts.clear()
+    del order[:]
+    distinct.clear()
+    suppressed.clear()
+
+
+atexit.register(flush)
@@ -0,0 +1,267 @@
+'''
+Translation worker with warm modules
+
+Starting ogr2osm once per input file imports GDAL, the translation and its
+tables in every run. A worker is one long-lived process which imports them
+once and runs ogr2osm in-process for each job from a queue directory:
+
+    python -m common.worker serve [--ogr2osm PATH] [-t TRANSLATION]... QUEUEDIR
+    python -m common.worker submit QUEUEDIR -t TRANSLATION SOURCE OUTPUT
+
+submit writes a job file to QUEUEDIR/jobs. Workers claim jobs by renaming
+them to QUEUEDIR/running, so several workers can serve one queue, and write
+the result with the job's timings to QUEUEDIR/done. The output of ogr2osm
+and the log of a job go to OUTPUT.log. A worker finishes its job and stops
+on SIGTERM or SIGINT, or with --once when the queue is empty.
+
+The translations given with -t are imported at start. ogr2osm imports the
+translation of a job with __import__, so it finds the module already loaded,
+and tables the module builds on first use, like the tag functions of
+mtk-gml, stay built from job to job. Other translations are loaded by their
+first job and stay loaded as well.
+
+After each job the worker resets the state of the run: the geometry and
+feature lists and id counters of ogr2osm's geom module, and the module
+globals of every loaded module of this repository which defines reset(),
+such as uvmtrans.uvmfeatures and the stats counters. A module keeping per
+run state in globals has to define reset() to be run by a worker.
+
+The ogr2osm script defaults to the .py file of the OGR2OSM environment
+variable, or ogr2osm.py on the PATH.
+'''
+
+import json
+import logging as l
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds between looks at an empty queue
+POLL = 0.5
+
+
+def find_script(command):
+    """Return the path of the ogr2osm.py of an ogr2osm command."""
+    import shlex
+
+    for token in shlex.split(command):
+        if not token.endswith('.py'):
+            continue
+        if os.path.isfile(token):
+            return os.path.abspath(token)
+        for directory in os.environ.get('PATH', '').split(os.pathsep):
+            path = os.path.join(directory, token)
+            if os.path.isfile(path):
+                return path
+    raise IOError('No ogr2osm script in %r' % command)
+
+
+def preload(translation):
+    """Import translation the way ogr2osm's -t option does, return the module."""
+    (root, ext) = os.path.splitext(translation)
+    if ext == '.py' and os.path.exists(translation):
+        directory = os.path.dirname(os.path.abspath(translation))
+        name = os.path.basename(root)
+    else:
+        directory = ROOT
+        name = translation
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return __import__(name, fromlist=[''])
+
+
+class Worker(object):
+    """Runs ogr2osm jobs in this process."""
+
+    def __init__(self, script, translations=()):
+        start = time.time()
+        # Imported before the first job, like ogr2osm does in each run
+        from osgeo import ogr
+        import geom
+
+        self.script = script
+        with open(script) as f:
+            self.code = compile(f.read(), script, 'exec', 0, True)
+        for translation in translations:
+            preload(translation)
+        self.geomstate = []
+        for cls in vars(geom).values():
+            if isinstance(cls, type) and cls.__module__ == geom.__name__:
+                for (name, value) in vars(cls).items():
+                    if not name.startswith('__') and isinstance(value, (int, list)):
+                        self.geomstate.append((cls, name, None if isinstance(value, list) else value))
+        self.path = list(sys.path)
+        self.warmup = time.time() - start
+
+    def run(self, job):
+        """Run the job, return its result."""
+        source = job['source']
+        output = job['output']
+        result = dict(job)
+        started = time.time()
+        env = job.get('env') or {}
+        environ = dict((k, os.environ.get(k)) for k in set(env) | set(['OGR2OSM_SINK']))
+        # The sink of the worker's own environment is not the job's
+        os.environ.pop('OGR2OSM_SINK', None)
+        os.environ.update(env)
+        argv = sys.argv
+        sys.argv = [self.script, '-f', '-t', job['translation'], '-o', output, source]
+        (stdout, stderr) = (sys.stdout, sys.stderr)
+        root = l.getLogger()
+        handlers = root.handlers[:]
+        log = open(output + '.log', 'w')
+        handler = l.StreamHandler(log)
+        handler.setFormatter(l.Formatter('%(levelname)s:%(name)s:%(message)s'))
+        root.handlers[:] = [handler]
+        sys.stdout = sys.stderr = log
+        try:
+            exec(self.code, {'__name__': '__main__', '__file__': self.script})
+            result['status'] = 'ok'
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+            result['status'] = 'ok' if ok else 'failed'
+            if not ok:
+                result['error'] = 'exit %s' % (e.code,)
+        except Exception as e:
+            import traceback
+            traceback.print_exc(file=log)
+            result['status'] = 'failed'
+            result['error'] = '%s: %s' % (type(e).__name__, e)
+        finally:
+            (sys.stdout, sys.stderr) = (stdout, stderr)
+            root.handlers[:] = handlers
+            log.close()
+            sys.argv = argv
+            for (k, v) in environ.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+        result['seconds'] = round(time.time() - started, 3)
+        started = time.time()
+        self.reset()
+        result['reset'] = round(time.time() - started, 3)
+        return result
+
+    def reset(self):
+        """Forget the state of the last job."""
+        for (cls, name, value) in self.geomstate:
+            if value is None:
+                del getattr(cls, name)[:]
+            else:
+                setattr(cls, name, value)
+        for module in list(sys.modules.values()):
+            path = getattr(module, '__file__', None)
+            reset = getattr(module, 'reset', None)
+            if path and callable(reset) and os.path.abspath(path).startswith(ROOT + os.sep):
+                reset()
+        sys.path[:] = self.path
+
+
+def submit(queuedir, translation, source, output, env=None):
+    """Add a job to the queue, return the path of its job file."""
+    jobs = os.path.join(queuedir, 'jobs')
+    if not os.path.isdir(jobs):
+        os.makedirs(jobs)
+    name = '%.6f-%d-%s.json' % (time.time(), os.getpid(), os.path.basename(source))
+    job = {'translation': translation, 'source': os.path.abspath(source),
+           'output': os.path.abspath(output)}
+    if env:
+        job['env'] = env
+    # Written under another name, so workers only see complete jobs
+    tmp = os.path.join(queuedir, '.' + name)
+    with open(tmp, 'w') as f:
+        json.dump(job, f, sort_keys=True)
+    path = os.path.join(jobs, name)
+    os.rename(tmp, path)
+    return path
+
+
+def claim(queuedir):
+    """Take the oldest job of the queue, return (name, job) or None."""
+    jobs = os.path.join(queuedir, 'jobs')
+    running = os.path.join(queuedir, 'running')
+    for name in sorted(os.listdir(jobs)):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(running, name)
+        try:
+            os.rename(os.path.join(jobs, name), path)
+        except OSError:
+            # Claimed by another worker
+            continue
+        with open(path) as f:
+            return (name, json.load(f))
+    return None
+
+
+def serve(worker, queuedir, once=False):
+    """Run the jobs of queuedir until stopped, return the number of failed jobs."""
+    import signal
+
+    for d in ('jobs', 'running', 'done'):
+        if not os.path.isdir(os.path.join(queuedir, d)):
+            os.makedirs(os.path.join(queuedir, d))
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    (done, failed) = (0, 0)
+    while not stopping:
+        claimed = claim(queuedir)
+        if claimed is None:
+            if once:
+                break
+            time.sleep(POLL)
+            continue
+        (name, job) = claimed
+        result = worker.run(job)
+        done += 1
+        if result['status'] != 'ok':
+            failed += 1
+        with open(os.path.join(queuedir, 'done', name), 'w') as f:
+            json.dump(result, f, indent=1, sort_keys=True)
+        os.remove(os.path.join(queuedir, 'running', name))
+        sys.stdout.write('%s: %s in %.2f s, reset %.3f s\n'
+                         % (job['source'], result['status'], result['seconds'], result['reset']))
+        sys.stdout.flush()
+    sys.stdout.write('%d jobs, %d failed\n' % (done, failed))
+    return failed
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run ogr2osm jobs in a warm process.')
+    commands = parser.add_subparsers(dest='command')
+    p = commands.add_parser('serve', help='Run the jobs of a queue directory')
+    p.add_argument('--ogr2osm', default=os.environ.get('OGR2OSM', 'ogr2osm.py'),
+                   help='ogr2osm command, its .py file is run')
+    p.add_argument('-t', '--translation', action='append', default=[],
+                   help='Translation to import at start, may be repeated')
+    p.add_argument('--once', action='store_true', help='Stop when the queue is empty')
+    p.add_argument('queuedir')
+    p = commands.add_parser('submit', help='Add a job to a queue directory')
+    p.add_argument('-t', '--translation', required=True)
+    p.add_argument('queuedir')
+    p.add_argument('source')
+    p.add_argument('output')
+    args = parser.parse_args(argv)
+
+    if args.command == 'submit':
+        sys.stdout.write(submit(args.queuedir, args.translation, args.source, args.output) + '\n')
+        return 0
+    if args.command != 'serve':
+        parser.error('Give a command, serve or submit')
+    worker = Worker(find_script(args.ogr2osm), args.translation)
+    sys.stdout.write('Worker ready in %.2f s\n' % worker.warmup)
+    sys.stdout.flush()
+    return 1 if serve(worker, args.queuedir, args.once) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,48 @@
 '''
 A translation function for DataBC TA_MUNICIP city data. 
 
+Municipalities (CODE MU) are tagged as admin_level 8 boundaries, regional
+districts (RD) as admin_level 6 boundaries and Indian reserves (IR) as
+aboriginal lands. Records with other CODE values get no tags.
 '''
 
-    
+from common import reproject, sink, stats, topology
+
+# Tags of each CODE value
+codetags = {
+    # Municipality
+    'MU':{ 'boundary':'administrative', 'admin_level':'8', 'source':'DataBC TA_MUNICIP' },
+    # Regional district
+    'RD':{ 'boundary':'administrative', 'admin_level':'6', 'source':'DataBC TA_MUNICIP' },
+    # Indian reserve
+    'IR':{ 'boundary':'aboriginal_lands', 'source':'DataBC TA_MUNICIP' },
+}
+
+# MUN_NAME.title() of each name seen
+nametitles = {}
+
 def filterTags(attrs):
     if not attrs:
         return
-    if 'CODE' in attrs and attrs['CODE'] == 'MU':
-        if 'MUN_NAME' in attrs:
-            return { 'boundary':'administrative', 'admin_level':'8', 'source':'DataBC TA_MUNICIP', 'name':attrs['MUN_NAME'].title() }
-        else:
-            return { 'boundary':'administrative', 'admin_level':'8', 'source':'DataBC TA_MUNICIP' }
-    
-    return tags
\ No newline at end of file
+    stats.count(attrs.get('CODE'))
+    base = codetags.get(attrs.get('CODE'))
+    if base is None:
+        return {}
+    tags = dict(base)
+    if 'MUN_NAME' in attrs:
+        name = nametitles.get(attrs['MUN_NAME'])
+        if name is None:
+            name = nametitles[attrs['MUN_NAME']] = attrs['MUN_NAME'].title()
+        tags['name'] = name
+    return tags
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    # Write the borders shared by adjacent polygons only once
+    topology.build(geometries, features)
+    stats.output(geometries, features)
+    sink.output(geometries, features)
+    stats.report()
@@ -25,6 +25,11 @@ TORIGHTPRO      To left property number     Belongs on different ways
 TORIGHTTHE      To left theoretical         Not mappable
 YEARADDED       Year added to GIS database  Not mappable
 
+With the OGR2OSM_INTERPOLATION environment variable set, FROMLEFTPR,
+TOLEFTPROP, FROMRIGHTP and TORIGHTPRO are used after all: they become
+addr:interpolation ways beside the road, offset by the value of the variable
+in metres, see common.interpolation. This needs NumPy.
+
 The following fields are used:    
 
 Field           Used for            Reason
@@ -48,6 +53,11 @@ ROADTYPE=Major Road Network             highway=secondary                   Does
 ROADTYPE=Highway Ramp                   highway=motorway_link
 '''
 
+from common import conflate, interpolation, reproject, stats
+
+# (feature, fromleft, toleft, fromright, toright) of the roads
+ranges = []
+
 def translateName(rawname):
     '''
     A general purpose name expander.
@@ -95,6 +105,7 @@ def filterTags(attrs):
         tags['tol:streetid'] = attrs['STREETID'].strip()
         
     if 'ROADTYPE' in attrs:
+        stats.count(attrs['ROADTYPE'].strip())
         if attrs['ROADTYPE'].strip() == 'Major Road Network':
             tags['highway'] = 'secondary'
         elif attrs['ROADTYPE'].strip() == 'Arterial':
@@ -121,4 +132,41 @@ def filterTags(attrs):
             
         tags['source'] = 'Township of Langley GIS Data'
 
-    return tags
\ No newline at end of file
+    return tags
+
+
+def number(ogrfeature, field):
+    index = ogrfeature.GetFieldIndex(field)
+    if index < 0:
+        return 0
+    try:
+        return int(float(ogrfeature.GetField(index) or 0))
+    except ValueError:
+        return 0
+
+
+def filterFeaturePost(feature, ogrfeature, ogrgeometry):
+    if feature is None or ogrfeature is None:
+        return
+    if interpolation.configured() is None:
+        return
+    numbers = [number(ogrfeature, field)
+               for field in ('FROMLEFTPR', 'TOLEFTPROP', 'FROMRIGHTP', 'TORIGHTPRO')]
+    if any(numbers):
+        ranges.append(tuple([feature] + numbers))
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    if ranges:
+        interpolation.interpolate(ranges, interpolation.configured(),
+                                  tags={'source': 'Township of Langley GIS Data'})
+    conflate.conflate(geometries, features)
+    stats.output(geometries, features)
+    stats.report()
+
+
+def reset():
+    del ranges[:]
@@ -4,6 +4,9 @@
 '''
 This translation file adds a __LAYER field to a datasource before translating it
 
+To add the field and translate in one pass, chain it in front of the other
+translation with chain.py, see common.chain.
+
 Copyright (c) 2012 Paul Norman
 <penorman@mac.com>
 Released under the MIT license: http://opensource.org/licenses/mit-license.php
@@ -11,12 +14,14 @@ Released under the MIT license: http://opensource.org/licenses/mit-license.php
 '''
 
 from osgeo import ogr
+from common import reproject, stats
 
 def filterLayer(layer):
     if not layer:
         return
     
     layername = layer.GetName()
+    stats.layer(layername)
     
     # Add a __LAYER field
     field = ogr.FieldDefn('__LAYER', ogr.OFTString)
@@ -33,3 +38,11 @@ def filterLayer(layer):
     layer.ResetReading()
     
     return layer
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    stats.output(geometries, features)
+    stats.report()
@@ -10,9 +10,9 @@
 # License: MIT License http://opensource.org/licenses/mit-license.php
 
 import geom
-from osgeo import ogr
-import re
+from common import compat, memo, sink, stats, stitch, topology, warn
 import logging as l
+import os
 
 
 def filterLayer(layer):
@@ -61,33 +61,148 @@ def filterLayer(layer):
         "Virtausnuoli",
     ]
     if layer.GetName() in skiplayers:
-        l.debug("Skipping layer '%s'" % layer.GetName())
+        l.debug("Skipping layer '%s'", layer.GetName())
+        stats.skip(layer.GetName())
         return None
     else:
-        l.debug("Processing layer '%s'" % layer.GetName())
-        return layer
+        l.debug("Processing layer '%s'", layer.GetName())
+        stats.layer(layer.GetName())
+        mtk_kentat(layer.GetLayerDefn())
+        from common import tiles
+        return tiles.filter_layer(layer)
+
+
+def filterFeature(ogrfeature, fieldNames, reproject):
+    if ogrfeature is None:
+        return
+    from common import tiles
+    # Features crossing a tile border are read by the runs of both tiles
+    if not tiles.owns(ogrfeature):
+        return None
+    return ogrfeature
+
+
+# Area features which are merged with adjacent areas of the same class
+# before output. MTK delivers them cut at map sheet and attribute borders.
+mtk_dissolve = set([
+    32100, 32111, 32112, 32113, # quarry
+    32200, # cemetery
+    32300, # landfill
+    32500, # quarry
+    32611, # farm
+    32612, # orchard
+    32800, # meadow
+    32900, # park
+    33100, # recreation_ground
+    34100, # bare_rock
+    34300, # sand
+    34700, # scree
+    35300, 35400, 35411, 35412, 35421, 35422, # wetland
+    36200, # water
+    36313, # riverbank
+    38300, # reedbed
+    38400, # tidalflat
+    39120, # scrub
+    39130, # wet_meadow
+])
+
+# Simplification tolerance in metres of each feature class. MTK geometry is
+# surveyed at sub-metre precision, which OSM does not need for landcover.
+mtk_tolerances = {
+    32611 : 1.0, # farm
+    32612 : 1.0, # orchard
+    32800 : 1.0, # meadow
+    34100 : 2.0, # bare_rock
+    34300 : 2.0, # sand
+    34700 : 2.0, # scree
+    35300 : 2.0, 35400 : 2.0, 35411 : 2.0, 35412 : 2.0, 35421 : 2.0, 35422 : 2.0, # wetland
+    36200 : 1.0, # water
+    36313 : 1.0, # riverbank
+    38300 : 2.0, # reedbed
+    38400 : 2.0, # tidalflat
+    39120 : 2.0, # scrub
+    39130 : 2.0, # wet_meadow
+}
+
+# Features of the mtk_dissolve classes
+dissolvefeatures = []
+# Simplification tolerance of features of the mtk_tolerances classes
+simplifyfeatures = {}
+# Features of the mtk_roadfeatures classes, stitched together before output
+roadfeatures = []
+# Address interpolation [start, end] features of road features
+interpolations = {}
+# The results of the tag functions declaring the attributes they read are
+# cached, see mtk_tags(), unless this environment variable is set to 0
+TAGCACHE_ENV = 'OGR2OSM_TAGCACHE'
+cachetags = os.environ.get(TAGCACHE_ENV) != '0'
+# Tags of the tag functions declaring the attributes they read, see reads()
+tagcache = memo.LRUCache()
+# Tag functions of the feature classes seen so far, see mtk_luokka()
+luokat = {}
 
 
 def filterFeaturePost(feature, ogrfeature, ogrgeometry):
     if feature is None and ogrfeature is None and ogrgeometry is None:
         return
     kohdeluokka = ogrfeature['kohdeluokka']
+    stats.count(kohdeluokka)
+    feature.tags = mtk_tags(mtk_luokka(kohdeluokka), kohdeluokka, ogrfeature)
     if kohdeluokka in mtk_roadfeatures:
-        feature.tags = mtk_roadfeatures[kohdeluokka](ogrfeature, feature)
-    else:
-        feature.tags = mtk_features.get(kohdeluokka, mtk_default)(ogrfeature)
+        if "highway" in feature.tags:
+            mtk_interpolation(ogrfeature, feature, feature.tags)
+        roadfeatures.append(feature)
     feature.tags['source'] = 'MTK_2013' # FIXME: Read year from input XML
+    if kohdeluokka in mtk_dissolve:
+        dissolvefeatures.append(feature)
+    if kohdeluokka in mtk_tolerances:
+        simplifyfeatures[feature] = mtk_tolerances[kohdeluokka]
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    from common import nodes, reproject, simplify, tiles
+    reproject.reproject(geometries)
+    if cachetags:
+        l.info("Tag cache: %d hits, %d misses (%.1f %%)",
+            tagcache.hits, tagcache.misses, 100.0 * tagcache.hitrate())
+    warn.flush()
+    # Merge the tile-cut pieces of landcover areas and roads
+    topology.dissolve(geometries, features, dissolvefeatures)
+    stitch.stitch(geometries, features, roadfeatures, interpolations)
+    simplify.simplify(geometries, features, simplifyfeatures)
+    simplify.quantise(geometries)
+    nodes.merge(geometries, features)
+    tiles.stable_ids(geometries, features)
+    stats.output(geometries, features)
+    sink.output(geometries, features)
+    stats.report()
+
+
+def reset():
+    """Forget the features of the run, keeping the tag tables built so far."""
+    del dissolvefeatures[:]
+    simplifyfeatures.clear()
+    del roadfeatures[:]
+    interpolations.clear()
+    kentat.clear()
+    del nimikentat[:]
+    lukukentat.clear()
+    tagcache.hits = tagcache.misses = 0
 
 
 def ustr(x):
-    return unicode(str(x), 'utf_8') # MTK XML is encoded in UTF-8
+    # MTK XML is encoded in UTF-8
+    return x.decode('utf_8') if isinstance(x, bytes) else compat.text_type(x)
 
 
 def fget(ogrfeature, key, default=None):
     """Get a value from ogrfeature['key'], return default if does not exist."""
     try:
         val = ogrfeature[key]
-    except ValueError:
+    except (KeyError, ValueError):
+        # GDAL 3 raises KeyError for a missing field, older versions ValueError
         val = default
     if val is None:
         val = default
@@ -95,26 +210,192 @@ def fget(ogrfeature, key, default=None):
 
 
 def mtk_default(f):
-    l.warn("Kohdeluokka %s not known to this script" % f['kohdeluokka'])
+    warn.warn('kohdeluokka', "Kohdeluokka %s not known to this script", f['kohdeluokka'])
     return {}
 
 
-def mtk_getnimi(f):
-    """Return a name string from various nimi_* features."""
-    # nimi_* features in Osoitepiste and Tieviiva layers giving the name in
-    # various languages. Roughly in order of how common they are.
-    nimi_feats = [ "nimi_suomi", "nimi_ruotsi", "nimi_inarinsaame",
-    "nimi_koltansaame", "nimi_pohjoissaame" ]
-    nimi = None
-    for lang in nimi_feats:
-        nimi = fget(f, lang)
+def mtk_tags(function, kohdeluokka, o):
+    """
+    Return the tags of ogrfeature o from function, cached if possible.
+
+    The cache key is kohdeluokka and the few coded attributes the function
+    declares. Names are nearly unique per feature, so the name tags of the
+    function's names hook are added after the cache.
+    """
+    keys = getattr(function, 'reads', None)
+    if keys is None or not cachetags:
+        tags = function(o)
+    else:
+        fields = lukukentat.get(function)
+        if fields is None:
+            fields = lukukentat[function] = tuple(kentat.get(k) for k in keys)
+        if None in fields:
+            key = (kohdeluokka,) + tuple(None if i is None else o.GetField(i) for i in fields)
+        else:
+            key = (kohdeluokka,) + tuple(map(o.GetField, fields))
+        tags = tagcache.get(key)
+        if tags is None:
+            tags = function(o)
+            tagcache.put(key, tags)
+        # Callers add tags of their own
+        tags = dict(tags)
+    names = getattr(function, 'names', None)
+    if names is not None:
+        names(o, tags)
+    return tags
+
+
+def mtk_luokka(kohdeluokka):
+    """Return the tag function of kohdeluokka, made on first use."""
+    function = luokat.get(kohdeluokka)
+    if function is None:
+        if kohdeluokka in mtk_roadfeatures:
+            function = mtk_roadfeatures[kohdeluokka]
+        else:
+            function = mtk_features.get(kohdeluokka, mtk_default)
+        if not callable(function):
+            function = mtk_tagit(function)
+        luokat[kohdeluokka] = function
+    return function
+
+
+def mtk_tagit(spec):
+    """
+    Return the tag function of the table entry spec, "key=value, ...".
+
+    A value {field} is replaced by the ogrfeature attribute field, the other
+    tags are fixed.
+    """
+    tags = {}
+    fields = []
+    for tag in spec.split(", ") if spec else []:
+        (key, value) = tag.split("=", 1)
+        if value.startswith("{") and value.endswith("}"):
+            fields.append((key, value[1:-1]))
+        else:
+            tags[key] = value
+    def function(f):
+        result = dict(tags)
+        for (key, field) in fields:
+            result[key] = ustr(f[field])
+        return result
+    return reads(*[field for (key, field) in fields])(function)
+
+
+def reads(*keys, **options):
+    """Declare the ogrfeature attributes a tag function reads.
+
+    The tags returned by a declaring function are cached by kohdeluokka and
+    the values of the attributes, see mtk_tags(). The names option is a
+    function (ogrfeature, tags) adding the tags which depend on the names,
+    run on every feature after the cache.
+    """
+    def declare(function):
+        function.reads = keys
+        function.names = options.get('names')
+        return function
+    return declare
+
+
+# nimi_* features in Osoitepiste and Tieviiva layers giving the name in
+# various languages, and the language codes of their name:* tags. Roughly in
+# order of how common they are.
+NIMI_LANGS = (
+    ( "nimi_suomi", "fi" ),
+    ( "nimi_ruotsi", "sv" ),
+    ( "nimi_inarinsaame", "smn" ),
+    ( "nimi_koltansaame", "sms" ),
+    ( "nimi_pohjoissaame", "se" ),
+)
+NIMI_FEATS = tuple(field for (field, lang) in NIMI_LANGS)
+HIGHWAY_READS = ( "tasosijainti", "paallyste", "yksisuuntaisuus" )
+RAILWAY_READS = ( "valmiusaste", "tasosijainti", "sahkoisyys" )
+
+# Municipalities with a Swedish speaking majority, where name is the Swedish
+# name when one exists. Elsewhere name follows the order of NIMI_LANGS.
+mtk_ruotsinkieliset = set([
+    149, # Inkoo - Ingå
+    280, # Korsnäs
+    287, # Kristiinankaupunki - Kristinestad
+    288, # Kruunupyy - Kronoby
+    322, # Kemiönsaari - Kimitoön
+    440, # Luoto - Larsmo
+    445, # Parainen - Pargas
+    475, # Maalahti - Malax
+    499, # Mustasaari - Korsholm
+    545, # Närpiö - Närpes
+    598, # Pietarsaari - Jakobstad
+    599, # Pedersören kunta - Pedersöre
+    710, # Raasepori - Raseborg
+    893, # Uusikaarlepyy - Nykarleby
+    946, # Vöyri - Vörå
+    # Åland
+    35, 43, 60, 62, 65, 76, 170, 295, 318, 417, 438, 478, 736, 766, 771, 941,
+])
+SUOMI_ENSIN = tuple("name:" + lang for (field, lang) in NIMI_LANGS)
+RUOTSI_ENSIN = ( "name:sv", ) + tuple(t for t in SUOMI_ENSIN if t != "name:sv")
+
+# Field indices by name, and (name:<lang> tag, index) of the name fields, of
+# the layer being processed. Set by filterLayer.
+kentat = {}
+nimikentat = []
+# Field indices of the attributes each tag function reads, None for those
+# missing from the layer, see mtk_tags()
+lukukentat = {}
+
+
+def utext(x):
+    """Return x as unicode, decoding byte strings as UTF-8."""
+    return x.decode('utf_8') if isinstance(x, bytes) else x
+
+
+def mtk_kentat(defn):
+    """Look up the field indices of the layer with definition defn."""
+    kentat.clear()
+    lukukentat.clear()
+    for i in range(defn.GetFieldCount()):
+        kentat[defn.GetFieldDefn(i).GetName()] = i
+    nimikentat[:] = [("name:" + lang, kentat[field])
+        for (field, lang) in NIMI_LANGS if field in kentat]
+
+
+def mtk_nimet(o):
+    """
+    Return the name tags of ogrfeature o: name:<lang> for each filled nimi_*
+    field, and name in the first language of the municipality which has one.
+    """
+    tags = {}
+    for (tag, i) in nimikentat:
+        nimi = o.GetField(i)
         if nimi:
-            nimi = ustr(nimi)
+            tags[tag] = utext(nimi)
+    if not tags:
+        return tags
+    kieli = SUOMI_ENSIN
+    if "kuntatunnus" in kentat and "name:sv" in tags:
+        try:
+            if int(o.GetField(kentat["kuntatunnus"])) in mtk_ruotsinkieliset:
+                kieli = RUOTSI_ENSIN
+        except (TypeError, ValueError):
+            pass
+    for tag in kieli:
+        if tag in tags:
+            tags["name"] = tags[tag]
             break
-    return nimi
+    return tags
+
+
+def mtk_getnimi(f):
+    """Return the name string of feature f, or None."""
+    return mtk_nimet(f).get("name")
+
+
+def mtk_roadnames(o, tags):
+    """Add the name tags of road ogrfeature o to tags."""
+    tags.update(mtk_nimet(o))
 
 
-def mtk_highway(o, f):
+def mtk_highway(o):
     tags = { "highway" : "road" }
     taso = int(fget(o, 'tasosijainti', 0))
     if taso == -11:
@@ -128,9 +409,11 @@ def mtk_highway(o, f):
     yksisuun = int(fget(o, 'yksisuuntaisuus', 0))
     if yksisuun > 0:
         tags["oneway"] = "yes" if yksisuun == 1 else "-1"
-    nimi = mtk_getnimi(o)
-    if nimi:
-        tags["name"] = nimi
+    return tags
+
+
+def mtk_interpolation(o, f, tags):
+    """Add address interpolation nodes to the ends of road feature f."""
     # Add address interpolation to (high)ways, when sensible
     # address numbers for beginning and end of the road segment exist.
     minleftnum = int(fget(o, 'minOsoitenumeroVasen', -1))
@@ -158,25 +441,27 @@ def mtk_highway(o, f):
         fmax = geom.Feature()
         fmax.geometry = f.geometry.points[-1]
         fmax.tags = { "addr:housenumber" : ustr(maxaddress) }
+        interpolations[f] = [fmin, fmax]
         tags["addr:interpolation"] = "all"
-    return tags
 
 
-def mtk_12112(o, f):
-    tags = mtk_highway(o, f)
+def mtk_12112_names(o, tags):
+    mtk_roadnames(o, tags)
+    if tags.get("name") == 'Valtatie':
+        nro = ustr(fget(o, 'tienumero', ''))
+        tags["name"] = (u"Valtatie " + nro).strip()
+
+
+@reads(*HIGHWAY_READS, names=mtk_12112_names)
+def mtk_12112(o):
+    tags = mtk_highway(o)
     tags["highway"] = "trunk"
-    nimi = mtk_getnimi(o)
-    if nimi:
-        if nimi == 'Valtatie':
-            nro = ustr(fget(o, 'tienumero', ''))
-            nimi = nimi + " " + nro
-            nimi= nimi.strip()
-        tags["name"] = nimi
     return tags
 
 
-def mtk_12141(o, f):
-    tags = mtk_highway(o, f)
+@reads(*HIGHWAY_READS, names=mtk_roadnames)
+def mtk_12141(o):
+    tags = mtk_highway(o)
     tags["highway"] = "track"
     if "surface" in tags and tags["surface"] == "paved":
         tags["tracktype"] = "grade1"
@@ -185,6 +470,7 @@ def mtk_12141(o, f):
     return tags
 
 
+@reads("korkeusarvo")
 def mtk_surveypoint(f):
     tags = { "man_made" : "survey_point" }
     height = fget(f, 'korkeusarvo')
@@ -193,6 +479,7 @@ def mtk_surveypoint(f):
     return tags
 
 
+@reads(*RAILWAY_READS)
 def mtk_railway(f):
     tags = {}
     state = int(fget(f, "valmiusaste", 0))
@@ -221,140 +508,141 @@ def mtk_railway(f):
 
 mtk_roadfeatures = {
 # Autotie Ia
-12111 : lambda o,f: dict(mtk_highway(o,f).items() + {"highway":"motorway"}.items()),
+12111 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"motorway"})),
 # Autotie Ib
 12112 : mtk_12112, # trunk
 # Autotie IIa
-12121 : lambda o,f: dict(mtk_highway(o,f).items() + {"highway":"primary"}.items()),
+12121 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"primary"})),
 # Autotie IIb
-12122 : lambda o,f: dict(mtk_highway(o,f).items()+{"highway":"secondary"}.items()),
+12122 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"secondary"})),
 # Autotie IIIa
-12131 : lambda o,f: dict(mtk_highway(o,f).items() + {"highway":"residential"}.items()),
+12131 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"residential"})),
 # Autotie IIIb
-12132 : lambda o,f: dict(mtk_highway(o,f).items() + {"highway":"service"}.items()),
+12132 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"service"})),
 # Ajotie
 12141 : mtk_12141, # track, grade 1 or 2
 # Lautta
-12151 : lambda o,f: { "route" : "ferry", },
+12151 : "route=ferry",
 # Lossi
-12152 : lambda o,f: { "route" : "ferry", "type" : "cable", },
+12152 : "route=ferry, type=cable",
 # Talvitie
-12312 : lambda o,f: dict(mtk_highway(o,f).items() + {"winter_road":"yes"}.items()),
+12312 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"winter_road":"yes"})),
 # Polku
-12313 : lambda o,f: dict(mtk_highway(o,f).items() + {"highway":"path"}.items()),
+12313 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{"highway":"path"})),
 # Kävely- ja pyörätie
-12314 : lambda o,f: dict(mtk_highway(o,f).items() + \
-            { "highway" : "cycleway", "foot" : "designated" }.items()),
+12314 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), \
+            **{ "highway" : "cycleway", "foot" : "designated" })),
 # Ajopolku
-12316 : lambda o,f: dict(mtk_highway(o,f).items() + { "highway":"track", "tracktype" : "grade3" }.items()),
+12316 : reads(*HIGHWAY_READS, names=mtk_roadnames)(lambda o: dict(mtk_highway(o), **{ "highway":"track", "tracktype" : "grade3" })),
 }
 
 
 mtk_features = {
-# featureclass (kohdeluokka) : function from ogrfeature to OSM tag dict
+# featureclass (kohdeluokka) : function from ogrfeature to OSM tag dict, or
+# the tags as "key=value, ...", where a value {field} is the attribute field
 # Work in progress.
 # Suoja-alue
-62200 : lambda _: { "seamark:type" : "restricted_area", },
+62200 : "seamark:type=restricted_area",
 # Ampuma-alueen reunaviiva
-62100 : lambda _: { "landuse" : "military", "military" : "range", },
+62100 : "landuse=military, military=range",
 # Suoja-alueen reunaviiva
-#62200 : lambda _: {}, # Same class as Suoja-alue (!)
+#62200 : "", # Same class as Suoja-alue (!)
 # Kunta
-84200 : lambda f: { "type" : "boundary", "boundary" : "administrative", "admin_level" : "8", "ref" : ustr(fget(f, 'kuntatunnus', 'FIXME')), "name" : "FIXME", "place" : "FIXME", },
+84200 : reads("kuntatunnus")(lambda f: { "type" : "boundary", "boundary" : "administrative", "admin_level" : "8", "ref" : ustr(fget(f, 'kuntatunnus', 'FIXME')), "name" : "FIXME", "place" : "FIXME", }),
 # Valtakunnan rajapyykki
-82500 : lambda _: { "man_made" : "cairn", },
+82500 : "man_made=cairn",
 # Muu kaupunki
-84302 : lambda _: {},
+84302 : "",
 # Muu kunta
-84303 : lambda _: {},
+84303 : "",
 # Aluemeren ulkoraja
-82100 : lambda _: { "boundary" : "administrative", "admin_level" : "2", },
+82100 : "boundary=administrative, admin_level=2",
 # Valtakunnan raja
-84111 : lambda _: { "boundary" : "administrative", "admin_level" : "2", },
+84111 : "boundary=administrative, admin_level=2",
 # Aluehallintoviraston toimialueen raja
-84112 : lambda _: { "boundary" : "administrative", "admin_level" : "4", },
+84112 : "boundary=administrative, admin_level=4",
 # Kunnan raja
-84113 : lambda _: { "boundary" : "administrative", "admin_level" : "8", },
+84113 : "boundary=administrative, admin_level=8",
 # Käymätön raja
-84114 : lambda _: { "boundary" : "administrative", "admin_level" : "8", },
+84114 : "boundary=administrative, admin_level=8",
 # Maakunnan raja
-84115 : lambda _: { "boundary" : "administrative", "admin_level" : "6", },
+84115 : "boundary=administrative, admin_level=6",
 # Rajavyöhykkeen takaraja
-82200 : lambda _: {},
+82200 : "",
 # Sisäisten aluevesien ulkoraja
-82300 : lambda _: {},
+82300 : "",
 # Ulko- ja sisäsaariston raja
-82400 : lambda _: {},
+82400 : "",
 # Muuntaja
-22100 : lambda _: { "power" : "transformer", },
+22100 : "power=transformer",
 # Putkijohdon symboli, luokittelematon
-26190 : lambda _: {},
+26190 : "",
 # Putkijohdon symboli, kaasu
-26191 : lambda _: {},
+26191 : "",
 # Putkijohdon symboli, kiinteä aine
-26192 : lambda _: {},
+26192 : "",
 # Putkijohdon symboli, lämpö
-26193 : lambda _: {},
+26193 : "",
 # Putkijohdon symboli, vesi
-26194 : lambda _: {},
+26194 : "",
 # Putkijohdon symboli, vesihöyry
-26195 : lambda _: {},
+26195 : "",
 # Putkijohdon symboli, viemäri
-26196 : lambda _: {},
+26196 : "",
 # Putkijohdon symboli, öljy
-26197 : lambda _: {},
+26197 : "",
 # Suurjännitelinjan pylväs
-22392 : lambda _: { "power" : "tower", },
+22392 : "power=tower",
 # Sähkölinjan symboli (tallennettu alaluokkiin)
-22391 : lambda _: {},
+22391 : "",
 # Suurjännitelinjan symboli
-22394 : lambda _: {},
+22394 : "",
 # Jakelujännitelinjan symboli
-22395 : lambda _: {},
+22395 : "",
 # Vedenottamo
-26200 : lambda _: { "man_made" : "water_works", },
+26200 : "man_made=water_works",
 # Vesitorni
-45800 : lambda _: { "man_made" : "water_tower", },
+45800 : "man_made=water_tower",
 # Muuntoasema
-22200 : lambda _: { "power" : "station", },
+22200 : "power=station",
 # Putkijohto, luokittelematon
-26111 : lambda _: { "man_made" : "pipeline", },
+26111 : "man_made=pipeline",
 # Putkijohto, kaasu
-26111 : lambda _: { "man_made" : "pipeline", "type" : "gas", },
+26111 : "man_made=pipeline, type=gas",
 # Putkijohto, kiinteä aine
-26112 : lambda _: { "man_made" : "pipeline", "type" : "solid", },
+26112 : "man_made=pipeline, type=solid",
 # Putkijohto, lämpö
-26113 : lambda _: { "man_made" : "pipeline", "type" : "heat", },
+26113 : "man_made=pipeline, type=heat",
 # Putkijohto, vesi
-26114 : lambda _: { "man_made" : "pipeline", "type" : "water", },
+26114 : "man_made=pipeline, type=water",
 # Putkijohto, vesihöyry
-26115 : lambda _: { "man_made" : "pipeline", "type" : "steam", },
+26115 : "man_made=pipeline, type=steam",
 # Putkijohto, viemäri
-26116 : lambda _: { "man_made" : "pipeline", "type" : "sewage", },
+26116 : "man_made=pipeline, type=sewage",
 # Putkijohto, öljy
-26117 : lambda _: { "man_made" : "pipeline", "type" : "oil", },
+26117 : "man_made=pipeline, type=oil",
 # Sähkölinja (tallennettu alaluokkiin)
-22300 : lambda _: { "power" : "line", },
+22300 : "power=line",
 # Sähkölinja, suurjännite
-22311 : lambda _: { "power" : "line", },
+22311 : "power=line",
 # Sähkölinja, jakelujännite
-22312 : lambda _: { "power" : "minor_line", },
+22312 : "power=minor_line",
 # Eloperäinen ainessymboli
-32191 : lambda _: {},
+32191 : "",
 # Hieno kivennäisainessymboli
-32192 : lambda _: {},
+32192 : "",
 # Hautausmaan symboli
-32291 : lambda _: {},
+32291 : "",
 # Louhoksen symboli
-32591 : lambda _: {},
+32591 : "",
 # Niityn symboli
-32891 : lambda _: {},
+32891 : "",
 # Täytemaan symboli
-33091 : lambda _: {},
+33091 : "",
 # Varastoalueen symboli
-38991 : lambda _: {},
+38991 : "",
 # Tunnelin aukko
-16800 : lambda _: {},
+16800 : "",
 # Kolmiopiste, luokittelematon
 95100 : mtk_surveypoint,
 # Kolmiopiste, I luokka
@@ -374,444 +662,444 @@ mtk_features = {
 # Korkeuskiintopiste, IV luokka
 95214 : mtk_surveypoint,
 # Vesiasteikko
-95300 : lambda _: { "man_made" : "monitoring_station", "monitoring:river_level" : "yes", },
+95300 : "man_made=monitoring_station, monitoring:river_level=yes",
 # Korkeuskäyrän viettoviiva
-52192 : lambda _: {},
+52192 : "",
 # Apukäyrän viettoviiva
-52193 : lambda _: {},
+52193 : "",
 # Syvyyskäyrän viettoviiva
-54192 : lambda _: {},
+54192 : "",
 # Korkeuskäyrän korkeusarvo
-52191 : lambda _: {},
+52191 : "",
 # Korkeuspiste
-52210 : lambda f: { "ele:n60" : ustr(f['teksti']), },
+52210 : "ele:n60={teksti}",
 # Syvyyskäyrän syvyysarvo
-54191 : lambda _: {},
+54191 : "",
 # Syvyyspiste
-54210 : lambda f: { "depth" : ustr(f['teksti']), },
+54210 : "depth={teksti}",
 # Korkeuskäyrä
-52100 : lambda _: {},
+52100 : "",
 # Syvyyskäyrä
-54100 : lambda _: {},
+54100 : "",
 # Autoliikennealue
-32421 : lambda _: { "amenity" : "parking", },
+32421 : "amenity=parking",
 # Hautausmaa
-32200 : lambda _: { "landuse" : "cemetery", },
+32200 : "landuse=cemetery",
 # Hietikko
-34300 : lambda _: { "natural" : "sand", },
+34300 : "natural=sand",
 # Kaatopaikka
-32300 : lambda _: { "landuse" : "landfill", },
+32300 : "landuse=landfill",
 # Kallio - alue
-34100 : lambda _: { "natural" : "bare_rock", "area" : "yes" },
+34100 : "natural=bare_rock, area=yes",
 # Kivikko
-34700 : lambda _: { "natural" : "scree", },
+34700 : "natural=scree",
 # Lentokenttäalue, tuntematon
-32400 : lambda _: { "aeroway" : "aerodrome", },
+32400 : "aeroway=aerodrome",
 # Lentokentän kiitotie, päällystetty
-32411 : lambda _: { "aeroway" : "runway", "surface" : "paved", },
+32411 : "aeroway=runway, surface=paved",
 # Lentokentän kiitotie, päällystämätön
-32412 : lambda _: { "aeroway" : "runway", "surface" : "unpaved", },
+32412 : "aeroway=runway, surface=unpaved",
 # Muu lentokenttäalue
-32413 : lambda _: { "aeroway" : "aerodrome", },
+32413 : "aeroway=aerodrome",
 # Muu lentokenttäalue, päällystetty
-32415 : lambda _: { "aeroway" : "aerodrome", },
+32415 : "aeroway=aerodrome",
 # Muu lentokenttäalue, päällystämätön
-32416 : lambda _: { "aeroway" : "aerodrome", },
+32416 : "aeroway=aerodrome",
 # Muu lentoliikennealue
-32414 : lambda _: { "aeroway" : "aerodrome", },
+32414 : "aeroway=aerodrome",
 # Muu lentoliikennealue, päällystetty
-32417 : lambda _: { "aeroway" : "aerodrome", },
+32417 : "aeroway=aerodrome",
 # Muu lentoliikennealue, päällystämätön
-32418 : lambda _: { "aeroway" : "aerodrome", },
+32418 : "aeroway=aerodrome",
 # Louhos
-32500 : lambda _: { "landuse" : "quarry", },
+32500 : "landuse=quarry",
 # Maa-aineksenottoalue, luokittelematon
-32100 : lambda _: { "landuse" : "quarry", "resource" : "aggregate", },
+32100 : "landuse=quarry, resource=aggregate",
 # Maa-aineksenottoalue, karkea kivennäisaines
-32111 : lambda _: { "landuse" : "quarry", "resource" : "aggregate", },
+32111 : "landuse=quarry, resource=aggregate",
 # Maa-aineksenottoalue, hieno kivennäisaines
-32112 : lambda _: { "landuse" : "quarry", "resource" : "clay", },
+32112 : "landuse=quarry, resource=clay",
 # Maa-aineksenottoalue, eloperäinen aines
-32113 : lambda _: { "landuse" : "quarry", "resource" : "organic", },
+32113 : "landuse=quarry, resource=organic",
 # Pelto
-32611 : lambda _: { "landuse" : "farm", },
+32611 : "landuse=farm",
 # Puutarha
-32612 : lambda _: { "landuse" : "orchard", },
+32612 : "landuse=orchard",
 # Niitty
-32800 : lambda _: { "landuse" : "meadow", },
+32800 : "landuse=meadow",
 # Puisto
-32900 : lambda _: { "leisure" : "park", },
+32900 : "leisure=park",
 # Soistuma
-35300 : lambda _: { "natural" : "wetland", "wetland" : "swamp", },
+35300 : "natural=wetland, wetland=swamp",
 # Suo (tallennettu alaluokkiin)
-35400 : lambda _: { "natural" : "wetland", },
+35400 : "natural=wetland",
 # Suo, helppokulkuinen puuton
-35411 : lambda _: { "natural" : "wetland", },
+35411 : "natural=wetland",
 # Suo, helppokulkuinen metsää kasvava
-35412 : lambda _: { "natural" : "wetland", },
+35412 : "natural=wetland",
 # Suo, vaikeakulkuinen puuton
-35421 : lambda _: { "natural" : "wetland", "wetland" : "marsh", },
+35421 : "natural=wetland, wetland=marsh",
 # Suo, vaikeakulkuinen metsää kasvava
-35422 : lambda _: { "natural" : "wetland", "wetland" : "swamp", },
+35422 : "natural=wetland, wetland=swamp",
 # Täytemaa
-33000 : lambda _: {},
+33000 : "",
 # Urheilu- ja virkistysalue
-33100 : lambda _: { "landuse" : "recreation_ground" },
+33100 : "landuse=recreation_ground",
 # Järvivesi
-36200 : lambda _: { "natural" : "water", },
+36200 : "natural=water",
 # Merivesi
-36211 : lambda _: { "natural" : "coastline", },
+36211 : "natural=coastline",
 # Virtavesialue
-36313 : lambda _: { "waterway" : "riverbank", },
+36313 : "waterway=riverbank",
 # Harva louhikko
-34200 : lambda _: {},
+34200 : "",
 # Kallio - symboli
-#34100 : lambda _: {}, # Same class as Kallio - alue (!)
+#34100 : "", # Same class as Kallio - alue (!)
 # Kivi
-34600 : lambda _: { "natural" : "stone", },
+34600 : "natural=stone",
 # Lähde
-36100 : lambda _: { "natural" : "spring", },
+36100 : "natural=spring",
 # Merkittävä luontokohde
-34900 : lambda _: {},
+34900 : "",
 # Havumetsä
-32710 : lambda _: {},
+32710 : "",
 # Lehtimetsä
-32713 : lambda _: {},
+32713 : "",
 # Sekametsä
-32714 : lambda _: {},
+32714 : "",
 # Varvikko
-32715 : lambda _: {},
+32715 : "",
 # Pensaikko
-32719 : lambda _: {},
+32719 : "",
 # Metsämaan ojitus
-32721 : lambda _: {},
+32721 : "",
 # Puu
-35100 : lambda _: { "natural" : "tree", },
+35100 : "natural=tree",
 # Vesikuoppa
 # FIXME: 36400 is a point, is it rendered as natural=water?
-36400 : lambda _: { "natural" : "water", "water" : "pond" },
+36400 : "natural=water, water=pond",
 # Virtaveden juoksusuunta (tallennettu alaluokkiin)
-36391 : lambda _: {},
+36391 : "",
 # Kapean virtaveden juoksusuunta
-36392 : lambda _: {},
+36392 : "",
 # Leveän virtaveden juoksusuunta
-36393 : lambda _: {},
+36393 : "",
 # Vedenpinnan korkeusluku
-36291 : lambda f: { "ele:n60" : ustr(f['teksti']), },
+36291 : "ele:n60={teksti}",
 # Jyrkänne
-34400 : lambda _: { "natural" : "cliff", },
+34400 : "natural=cliff",
 # Kalliohalkeama
-34500 : lambda _: {},
+34500 : "",
 # Luiska
-34800 : lambda _: {  "embankment" : "yes", },
+34800 : "embankment=yes",
 # Yksikäsitteinen reunaviiva
-30211 : lambda _: {},
+30211 : "",
 # Epämääräinen reunaviiva
-30212 : lambda _: {},
+30212 : "",
 # Keinotekoinen rantaviiva
-30100 : lambda _: {},
+30100 : "",
 # Vesialueiden välinen reuna
-30900 : lambda _: {},
+30900 : "",
 # Pato
-30300 : lambda _: { "waterway" : "dam", },
+30300 : "waterway=dam",
 # Puurivi
-35200 : lambda _: { "natural" : "tree_row", },
+35200 : "natural=tree_row",
 # Sulkuportti
-30400 : lambda _: { "waterway" : "lock_gate", },
+30400 : "waterway=lock_gate",
 # Suojänne
-35500 : lambda _: {},
+35500 : "",
 # Maasto/1 tekninen viiva
-30999 : lambda _: {},
+30999 : "",
 # Virtavesi - kapea
-36300 : lambda _: { "waterway" : "stream", },
+36300 : "waterway=stream",
 # Virtavesi, alle 2m
-36311 : lambda _: { "waterway" : "stream", },
+36311 : "waterway=stream",
 # Virtavesi, 2-5m
-36312 : lambda _: { "waterway" : "river", },
+36312 : "waterway=river",
 # Maatuva vesialue
-38300 : lambda _: { "natural" : "wetland", "wetland" : "reedbed", },
+38300 : "natural=wetland, wetland=reedbed",
 # Matalikko
-38700 : lambda _: { "seamark:type" : "sea_area", "seamark:sea_area:category" : "shoal", },
+38700 : "seamark:type=sea_area, seamark:sea_area:category=shoal",
 # Muu avoin alue, luokittelematon
-39100 : lambda _: {},
+39100 : "",
 # Avoin metsämaa
-39110 : lambda _: {},
+39110 : "",
 # Varvikko
-39120 : lambda _: { "natural" : "scrub", },
+39120 : "natural=scrub",
 # Avoin vesijättö
-39130 : lambda _: { "natural" : "wetland", "wetland" : "wet_meadow", },
+39130 : "natural=wetland, wetland=wet_meadow",
 # Tulva-alue
-38400 : lambda _: { "natural" : "wetland", "wetland" : "tidalflat", },
+38400 : "natural=wetland, wetland=tidalflat",
 # Varastoalue
-38900 : lambda _: {},
+38900 : "",
 # Vesikivikko
-38600 : lambda _: { "seamark:type" : "seabed_area", "seamark:seabed_area:surface" : "stone", },
+38600 : "seamark:type=seabed_area, seamark:seabed_area:surface=stone",
 # Kaislikko
-38100 : lambda _: {},
+38100 : "",
 # Uittolaite
-38800 : lambda _: { "seamark:mooring:category" : "dolphin", "seamark:type" : "mooring", },
+38800 : "seamark:mooring:category=dolphin, seamark:type=mooring",
 # Vesikivi, vedenalainen
-38511 : lambda _: { "seamark:type" : "rock", "seamark:rock:water_level" : "submerged", },
+38511 : "seamark:type=rock, seamark:rock:water_level=submerged",
 # Vesikivi, pinnassa
-38512 : lambda _: { "seamark:type" : "rock", "seamark:rock:water_level" : "awash", },
+38512 : "seamark:type=rock, seamark:rock:water_level=awash",
 # Vesikivi, vedenpäällinen
-38513 : lambda _: { "seamark:type" : "rock", "seamark:rock:water_level" : "always_dry", },
+38513 : "seamark:type=rock, seamark:rock:water_level=always_dry",
 # Koski
-38200 : lambda _: { "whitewater:rapid_grade" : "unknown", },
+38200 : "whitewater:rapid_grade=unknown",
 # Maasto/2 kuvion reuna, luokittelematon
-30200 : lambda _: {},
+30200 : "",
 # Maasto/2 yksikäsitteinen reunaviiva
-30211 : lambda _: {},
+30211 : "",
 # Maasto/2 epämääräinen reunaviiva
-30212 : lambda _: {},
+30212 : "",
 # Metsän raja
-39500 : lambda _: {},
+39500 : "",
 # Uittoränni
-39000 : lambda _: {},
+39000 : "",
 # Maasto/2 tekninen viiva
-30999 : lambda _: {},
+30999 : "",
 # Huomaute
-3001 : lambda _: {},
+3001 : "",
 # Lähiosoite
-96001 : lambda f: { "addr:full" : unicode.strip(mtk_getnimi(f) + " " + ustr(fget(f, "numero", ""))) } if mtk_getnimi(f) is not None else {},
+96001 : (lambda f: { "addr:full" : (mtk_getnimi(f) + " " + ustr(fget(f, "numero", ""))).strip() } if mtk_getnimi(f) is not None else {}),
 # Kulkupaikka
-96002 : lambda _: {},
+96002 : "",
 # Pelastuskoodipiste
-96010 : lambda _: {},
+96010 : "",
 # Autotien nimi
-12101 : lambda _: {},
+12101 : "",
 # Kulkuväylän nimi
-12301 : lambda _: {},
+12301 : "",
 # Rautatieliikennepaikan nimi
-14201 : lambda f: { "railway" : "station", "name" : ustr(f['teksti']), },
+14201 : "railway=station, name={teksti}",
 # Turvalaitteen nimi
-16101 : lambda _: {},
+16101 : "",
 # Maa-aineksenottoalueen nimi
-32101 : lambda f: { "landuse" : "quarry", "name" : ustr(f['teksti']), },
+32101 : "landuse=quarry, name={teksti}",
 # Hautausmaan nimi
-32201 : lambda f: { "landuse" : "cemetery", "name" : ustr(f['teksti']), },
+32201 : "landuse=cemetery, name={teksti}",
 # Kaatopaikan nimi
-32301 : lambda f: { "landuse" : "landfill", "name" : ustr(f['teksti']), },
+32301 : "landuse=landfill, name={teksti}",
 # Liikennealueen nimi
-32401 : lambda _: {},
+32401 : "",
 # Louhoksen nimi
-32501 : lambda f: { "landuse" : "quarry", "name" : ustr(f['teksti']), },
+32501 : "landuse=quarry, name={teksti}",
 # Puiston nimi
-32901 : lambda f: { "leisure" : "park", "name" : ustr(f['teksti']), },
+32901 : "leisure=park, name={teksti}",
 # Täytemaan nimi
-33001 : lambda _: {},
+33001 : "",
 # Urheilu- ja virkistysalueen nimi
-33101 : lambda f: { "leisure" : "sports_centre", "name" : ustr(f['teksti']), },
+33101 : "leisure=sports_centre, name={teksti}",
 # Kiven nimi
-34601 : lambda f: { "natural" : "stone", "name" : ustr(f['teksti']), },
+34601 : "natural=stone, name={teksti}",
 # Merkittävän luontokohteen nimi
-34901 : lambda f: { "natural" : "feature", "name" : ustr(f['teksti']), },
+34901 : "natural=feature, name={teksti}",
 # Pellon tai niityn nimi
-35010 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35010 : "place=locality, name={teksti}",
 # Metsäalueen nimi
-35020 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35020 : "place=locality, name={teksti}",
 # Suon nimi
-35030 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35030 : "place=locality, name={teksti}",
 # Kohouman nimi
-35040 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35040 : "place=locality, name={teksti}",
 # Painanteen nimi
-35050 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35050 : "place=locality, name={teksti}",
 # Niemen nimi
-35060 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35060 : "place=locality, name={teksti}",
 # Saaren nimi
-35070 : lambda f: { "place" : "islet", "name" : ustr(f['teksti']), },
+35070 : "place=islet, name={teksti}",
 # Matalikon nimi
-35080 : lambda f: { "natural" : "shoal", "name" : ustr(f['teksti']), },
+35080 : "natural=shoal, name={teksti}",
 # Muu maastonimi
-35090 : lambda f: { "place" : "locality", "name" : ustr(f['teksti']), },
+35090 : "place=locality, name={teksti}",
 # Puun nimi
-35101 : lambda f: { "natural" : "tree", "name" : ustr(f['teksti']), },
+35101 : "natural=tree, name={teksti}",
 # Lähteen nimi
-36101 : lambda f: { "natural" : "spring", "name" : ustr(f['teksti']), },
+36101 : "natural=spring, name={teksti}",
 # Vakaveden nimi
-36201 : lambda f: { "natural" : "water", "water" : "lake", "name" : ustr(f['teksti']), },
+36201 : "natural=water, water=lake, name={teksti}",
 # Virtaveden nimi
-36301 : lambda f: { "natural" : "water", "water" : "river", "name" : ustr(f['teksti']), },
+36301 : "natural=water, water=river, name={teksti}",
 # Vakaveden osan nimi
-36410 : lambda f: { "natural" : "bay", "name" : ustr(f['teksti']), },
+36410 : "natural=bay, name={teksti}",
 # Virtaveden osan nimi
-36420 : lambda f: { "natural" : "bay", "name" : ustr(f['teksti']), },
+36420 : "natural=bay, name={teksti}",
 # Muu vesistökohteen nimi
-36490 : lambda f: { "natural" : "bay", "name" : ustr(f['teksti']), },
+36490 : "natural=bay, name={teksti}",
 # Kosken nimi
-38201 : lambda f: { "waterway" : "rapids", "name" : ustr(f['teksti']), },
+38201 : "waterway=rapids, name={teksti}",
 # Vesikiven nimi
-38501 : lambda f: { "natural" : "rock", "name" : ustr(f['teksti']), },
+38501 : "natural=rock, name={teksti}",
 # Varastoalueen nimi
-38901 : lambda _: {},
+38901 : "",
 # Rakennuksen nimi
-42101 : lambda f: { "place" : "isolated_dwelling", "name" : ustr(f['teksti']),},
+42101 : "place=isolated_dwelling, name={teksti}",
 # Rakennusryhmän nimi
-42201 : lambda f: { "place" : "hamlet", "name" : ustr(f['teksti']), },
+42201 : "place=hamlet, name={teksti}",
 # Altaan nimi
-44301 : lambda f: { "natural" : "water", "water" : "pond", "name" : ustr(f['teksti']), },
+44301 : "natural=water, water=pond, name={teksti}",
 # Muistomerkin nimi
-44901 : lambda f: { "historic" : "memorial", "name" : ustr(f['teksti']), },
+44901 : "historic=memorial, name={teksti}",
 # Kaupungin nimi
-48111 : lambda f: { "place" : "town", "name" : ustr(f['teksti']), },
+48111 : "place=town, name={teksti}",
 # Muun kunnan nimi
-48112 : lambda f: { "place" : "village", "name" : ustr(f['teksti']), },
+48112 : "place=village, name={teksti}",
 # Kylän, kaupunginosan tai kulmakunnan nimi
-48120 : lambda f: { "place" : "suburb", "name" : ustr(f['teksti']), },
+48120 : "place=suburb, name={teksti}",
 # Talon nimi
-48130 : lambda f: { "place" : "isolated_dwelling", "name" : ustr(f['teksti']),},
+48130 : "place=isolated_dwelling, name={teksti}",
 # Muu asutusnimi
-48190 : lambda f: { "place" : "isolated_dwelling", "name" : ustr(f['teksti']),},
+48190 : "place=isolated_dwelling, name={teksti}",
 # Luonnonsuojelualueen nimi
-#72201 : lambda _: {}, # Same class as Luonnonpuisto (!)
+#72201 : "", # Same class as Luonnonpuisto (!)
 # Luonnonmuistomerkin nimi
-72303 : lambda _: {},
+72303 : "",
 # Muinaisjäännöksen nimi
-72403 : lambda f: { "historic" : "archaeological_site", "name" : ustr(f['teksti']), },
+72403 : "historic=archaeological_site, name={teksti}",
 # Luonnonpuiston nimi
-72502 : lambda f: { "leisure" : "nature_reserve", "name" : ustr(f['teksti']), },
+72502 : "leisure=nature_reserve, name={teksti}",
 # Kansallispuiston nimi
-72601 : lambda f: { "leisure" : "nature_reserve", "name" : ustr(f['teksti']), },
+72601 : "leisure=nature_reserve, name={teksti}",
 # Erämaa-alueen nimi
-72701 : lambda f: { "boundary" : "protected_area", "protect_class" : "1a", "name" : ustr(f['teksti']), },
+72701 : "boundary=protected_area, protect_class=1a, name={teksti}",
 # Retkeilyalueen nimi
-72801 : lambda f: { "tourism" : "camp_site", "name" : ustr(f['teksti']), },
+72801 : "tourism=camp_site, name={teksti}",
 # Valtakunnan rajapyykin nimi
-82501 : lambda _: {},
+82501 : "",
 # Rajapyykin nimi
-92401 : lambda _: {},
+92401 : "",
 # Allas - alue
-44300 : lambda _: { "landuse" : "reservoir", },
+44300 : "landuse=reservoir",
 # Ilmaradan kannatinpylväs
-44591 : lambda _: { "aerialway" : "pylon", },
+44591 : "aerialway=pylon",
 # Kellotapuli
-44600 : lambda _: { "man_made" : "tower", "tower:type" : "bell_tower", },
+44600 : "man_made=tower, tower:type=bell_tower",
 # Lähestymisvalo
-44700 : lambda _: { "man_made" : "beacon", },
+44700 : "man_made=beacon",
 # Masto
-44800 : lambda _: { "man_made" : "mast", "mast:type" : "communication", },
+44800 : "man_made=mast, mast:type=communication",
 # Muistomerkki
-44900 : lambda _: { "historic" : "memorial", },
+44900 : "historic=memorial",
 # Näkötorni
-45000 : lambda _: { "man_made" : "tower", "tower:type" : "observation", },
+45000 : "man_made=tower, tower:type=observation",
 # Portti
-45200 : lambda _: { "barrier" : "gate", },
+45200 : "barrier=gate",
 # Savupiippu
-45300 : lambda _: { "man_made" : "chimney", },
+45300 : "man_made=chimney",
 # Tervahauta
-45400 : lambda _: { "man_made" : "tar_kiln", },
+45400 : "man_made=tar_kiln",
 # Tulentekopaikka
-45710 : lambda _: { "tourism" : "picnic_site", "fireplace" : "yes", },
+45710 : "tourism=picnic_site, fireplace=yes",
 # Tuulimoottori
-45500 : lambda _: { "power" : "generator", "power_source" : "wind", },
+45500 : "power=generator, power_source=wind",
 # Maston korkeus
-44803 : lambda f: { "man_made" : "tower", "height" : ustr(float(fget(f, 'korkeusarvo', 0.0))/1000.0), },
+44803 : reads("korkeusarvo")(lambda f: { "man_made" : "tower", "height" : ustr(float(fget(f, 'korkeusarvo', 0.0))/1000.0), }),
 # Savupiipun korkeus
-45303 : lambda _: { },
+45303 : "",
 # Aallonmurtaja
-44100 : lambda _: { "man_made" : "breakwater", },
+44100 : "man_made=breakwater",
 # Aita,tekoaines
-44211 : lambda _: { "barrier" : "fence", "fixme" : "wall?", },
+44211 : "barrier=fence, fixme=wall?",
 # Aita, istutettu
-44213 : lambda _: { "barrier" : "hedge", },
+44213 : "barrier=hedge",
 # Allas - viiva
-#44300 : lambda _: {}, # Same class as Allas - alue (!)
+#44300 : "", # Same class as Allas - alue (!)
 # Ilmarata
-44500 : lambda _: { "aerialway": "unknown", },
+44500 : "aerialway=unknown",
 # Pistolaituri, alle 5 m
-45111 : lambda _: { "man_made" : "pier", },
+45111 : "man_made=pier",
 # Pistolaituri, vähintään 5 m
-45112 : lambda _: { "man_made" : "pier", "area" : "yes", },
+45112 : "man_made=pier, area=yes",
 # Rakennelma
-45700 : lambda _: { "man_made" : "yes", },
+45700 : "man_made=yes",
 ## Building border lines are not imported
 # Rakennusalueen reunaviiva, luokittelematon
-42200 : lambda _: {},
+42200 : "",
 # Asuinrakennus, ? krs
-42110 : lambda _: {},
+42110 : "",
 # Asuinrakennus, 1-2 krs
-42111 : lambda _: {},
+42111 : "",
 # Asuinrakennus, 3-n krs
-42112 : lambda _: {},
+42112 : "",
 # Liike- tai julkinen rakennus, ? krs
-42120 : lambda _: {},
+42120 : "",
 # Liike- tai julkinen rakennus, 1-2 krs
-42121 : lambda _: {},
+42121 : "",
 # Liike- tai julkinen rakennus, 3-n krs
-42122 : lambda _: {},
+42122 : "",
 # Lomarakennus, ? krs
-42130 : lambda _: {},
+42130 : "",
 # Lomarakennus, 1-2 krs
-42131 : lambda _: {},
+42131 : "",
 # Lomarakennus, 3-n krs
-42132 : lambda _: {},
+42132 : "",
 # Teollinen rakennus, ? krs
-42140 : lambda _: {},
+42140 : "",
 # Teollinen rakennus, 1-2 krs
-42141 : lambda _: {},
+42141 : "",
 # Teollinen rakennus, 3-n krs
-42142 : lambda _: {},
+42142 : "",
 # Kirkko
-42170 : lambda _: {},
+42170 : "",
 # Kirkollinen rakennus, ? krs
-42150 : lambda _: {},
+42150 : "",
 # Kirkollinen rakennus, 1-2 krs
-42151 : lambda _: {},
+42151 : "",
 # Kirkollinen rakennus, 3-n krs
-42152 : lambda _: {},
+42152 : "",
 # Muu rakennus, ? krs
-42160 : lambda _: {},
+42160 : "",
 # Muu rakennus, 1-2 krs
-42161 : lambda _: {},
+42161 : "",
 # Muu rakennus, 3-n krs
-42162 : lambda _: {},
+42162 : "",
 ## Building border lines end
 # Rakennus, luokittelematon
-42200 : lambda _: { "building" : "yes", },
+42200 : "building=yes",
 # Asuinrakennus, ? krs
-42210 : lambda _: { "building" : "residential", },
+42210 : "building=residential",
 # Asuinrakennus, 1-2 krs
-42211 : lambda _: { "building" : "residential", },
+42211 : "building=residential",
 # Asuinrakennus, 3-n krs
-42212 : lambda _: { "building" : "residential", },
+42212 : "building=residential",
 # Liike- tai julkinen rakennus, ? krs
-42220 : lambda _: { "building" : "public", },
+42220 : "building=public",
 # Liike- tai julkinen rakennus, 1-2 krs
-42221 : lambda _: { "building" : "public", },
+42221 : "building=public",
 # Liike- tai julkinen rakennus, 3-n krs
-42222 : lambda _: { "building" : "public", },
+42222 : "building=public",
 # Lomarakennus, ? krs
-42230 : lambda _: { "building" : "yes", },
+42230 : "building=yes",
 # Lomarakennus, 1-2 krs
-42231 : lambda _: { "building" : "yes", },
+42231 : "building=yes",
 # Lomarakennus, 3-n krs
-42232 : lambda _: { "building" : "yes", },
+42232 : "building=yes",
 # Teollinen rakennus, ? krs
-42240 : lambda _: { "building" : "industrial", },
+42240 : "building=industrial",
 # Teollinen rakennus, 1-2 krs
-42241 : lambda _: { "building" : "industrial", },
+42241 : "building=industrial",
 # Teollinen rakennus, 3-n krs
-42242 : lambda _: { "building" : "industrial", },
+42242 : "building=industrial",
 # Kirkko
-42270 : lambda _: { "building" : "church", "amenity" : "place_of_worship", "religion" : "christian", },
+42270 : "building=church, amenity=place_of_worship, religion=christian",
 # Kirkollinen rakennus, ? krs
-42250 : lambda _: { "building" : "public", },
+42250 : "building=public",
 # Kirkollinen rakennus, 1-2 krs
-42251 : lambda _: { "building" : "public", },
+42251 : "building=public",
 # Kirkollinen rakennus, 3-n krs
-42252 : lambda _: { "building" : "public", },
+42252 : "building=public",
 # Muu rakennus, ? krs
-42260 : lambda _: { "building" : "yes", },
+42260 : "building=yes",
 # Muu rakennus, 1-2 krs
-42261 : lambda _: { "building" : "yes", },
+42261 : "building=yes",
 # Muu rakennus, 3-n krs
-42262 : lambda _: { "building" : "yes", },
+42262 : "building=yes",
 # Rautatieliikennepaikka
-14200 : lambda _: { "railway" : "station" },
+14200 : "railway=station",
 # Rautatie, sähköistyssymboli
-14191 : lambda _: {},
+14191 : "",
 # Rautatie, käytöstä poistetun symboli
-14192 : lambda _: {},
+14192 : "",
 # Rautatie (tallennettu alaluokkiin)
 14110 : mtk_railway,
 # Rautatie, sähköistetty
@@ -819,225 +1107,225 @@ mtk_features = {
 # Rautatie, sähköistämätön
 14112 : mtk_railway,
 # Kapearaiteinen rautatie
-14121 : lambda f: dict(mtk_railway(f).items() + {"railway" : "narrow_gauge"}.items()),
+14121 : reads(*RAILWAY_READS)(lambda f: dict(mtk_railway(f), **{"railway" : "narrow_gauge"})),
 # Metro
-14131 : lambda f: dict(mtk_railway(f).items() + {"railway" : "subway"}.items()),
+14131 : reads(*RAILWAY_READS)(lambda f: dict(mtk_railway(f), **{"railway" : "subway"})),
 ## 'Selite' points are not imported
 # Kulkuväylän selite
-12302 : lambda _: {},
+12302 : "",
 # Turvalaitteen selite
-16102 : lambda _: {},
+16102 : "",
 # Vedenottamon selite
-26202 : lambda _: {},
+26202 : "",
 # Maa-aineksenottoalueen selite
-32102 : lambda _: {},
+32102 : "",
 # Hautausmaan selite
-32202 : lambda _: {},
+32202 : "",
 # Kaatopaikan selite
-32302 : lambda _: {},
+32302 : "",
 # Liikennealueen selite
-32402 : lambda f: { "aeroway" : "helipad", } if re.match('Helikopter.*', ustr(f['teksti'])) else {},
+32402 : reads("teksti")(lambda f: { "aeroway" : "helipad", } if ustr(f['teksti']).startswith('Helikopter') else {}),
 # Louhoksen selite
-32502 : lambda _: {},
+32502 : "",
 # Maatalousmaan selite
-32602 : lambda _: {},
+32602 : "",
 # Puiston selite
-32902 : lambda _: {},
+32902 : "",
 # Täytemaan selite
-33002 : lambda _: {},
+33002 : "",
 # Urheilu- ja virkistysalueen selite
-33102 : lambda _: {},
+33102 : "",
 # Merkittävän luontokohteen selite
-34902 : lambda _: {},
+34902 : "",
 # Puun selite
-35102 : lambda _: {},
+35102 : "",
 # Muun maastokohteen selite
-36500 : lambda _: {},
+36500 : "",
 # Varastoalueen selite
-38902 : lambda _: {},
+38902 : "",
 # Metsän rajan selite
-39502 : lambda _: {},
+39502 : "",
 # Rakennuksen selite
-42102 : lambda f: { "tourism" : "hotel", } if re.match('Hot.*', ustr(f['teksti'])) else {},
+42102 : reads("teksti")(lambda f: { "tourism" : "hotel", } if ustr(f['teksti']).startswith('Hot') else {}),
 # Rakennusryhmän selite
-42202 : lambda _: {},
+42202 : "",
 # Aidan selite
-44202 : lambda _: {},
+44202 : "",
 # Altaan selite
-44302 : lambda _: {},
+44302 : "",
 # Ilmaradan selite
-44402 : lambda _: {},
+44402 : "",
 # Muistomerkin selite
-44902 : lambda _: {},
+44902 : "",
 # Näkötornin selite
-45002 : lambda _: {},
+45002 : "",
 # Tervahaudan selite
-45402 : lambda _: {},
+45402 : "",
 # Tuulimoottorin selite
-45502 : lambda _: {},
+45502 : "",
 # Rakennelman selite
-45702 : lambda _: {},
+45702 : "",
 # Vesitornin selite
-45802 : lambda _: {},
+45802 : "",
 # Sotilasalueen selite
-62102 : lambda _: {},
+62102 : "",
 # Suoja-alueen selite
-62202 : lambda _: {},
+62202 : "",
 # Luonnonsuojelualueen selite
-#72202 : lambda _: {}, # Same class as Kansallispuisto (!)
+#72202 : "", # Same class as Kansallispuisto (!)
 # Luonnonmuistomerkin selite
-72304 : lambda _: {},
+72304 : "",
 # Muinaisjäännöksen selite
-72404 : lambda _: {},
+72404 : "",
 # Suojametsän selite
-72501 : lambda _: {},
+72501 : "",
 # Kansallispuiston selite
-72603 : lambda _: {},
+72603 : "",
 # Luonnonpuiston selite
-72604 : lambda _: {},
+72604 : "",
 # Erämaa-alueen selite
-72702 : lambda _: {},
+72702 : "",
 # Retkeilyalueen selite
-72802 : lambda _: {},
+72802 : "",
 # Aluemeren ulkorajan selite
-82102 : lambda _: {},
+82102 : "",
 # Rajavyöhykkeen takarajan selite
-82202 : lambda _: {},
+82202 : "",
 # Sisäisten aluevesien ulkorajan selite
-82302 : lambda _: {},
+82302 : "",
 # Ulko- ja sisäsaariston rajan selite
-82402 : lambda _: {},
+82402 : "",
 # Kunnan hallintorajan selite
-85100 : lambda _: {},
+85100 : "",
 # Vesiasteikon selite
-95302 : lambda _: {},
+95302 : "",
 ## 'Selite' points end
 # Luonnonsuojelualue
-72200 : lambda _: { "boundary" : "protected_area", "protection_title" : "luonnonsuojelualue", "protect_class" : "4", },
+72200 : "boundary=protected_area, protection_title=luonnonsuojelualue, protect_class=4",
 # Luonnonpuisto
-72201 : lambda _: { "boundary" : "protected_area", "protection_title" : "luonnonpuisto", "related_law" : "Luonnonsuojelulaki", "protect_class" : "1", },
+72201 : "boundary=protected_area, protection_title=luonnonpuisto, related_law=Luonnonsuojelulaki, protect_class=1",
 # Kansallispuisto
-72202 : lambda _: { "boundary" : "national_park", },
+72202 : "boundary=national_park",
 # Retkeilyalue
-72800 : lambda _: { "boundary" : "protected_area", "protection_title" : "retkeilyalue", "related_law" : "Ulkoilulaki", "protect_class" : "6" },
+72800 : "boundary=protected_area, protection_title=retkeilyalue, related_law=Ulkoilulaki, protect_class=6",
 # Suojametsä
-72500 : lambda _: { "boundary" : "protected_area", "protection_title" : "suojametsä", "related_law" : "Kuntalaki", "protect_class" : "15" },
+72500 : "boundary=protected_area, protection_title=suojametsä, related_law=Kuntalaki, protect_class=15",
 # Rauhoitettu kivi
-72310 : lambda _: { "natural" : "stone", },
+72310 : "natural=stone",
 # Rauhoitettu puu
-72320 : lambda _: { "natural" : "tree", },
+72320 : "natural=tree",
 # Muu rauhoitettu kohde
-72340 : lambda _: {},
+72340 : "",
 # Muinaisjäännös
-72330 : lambda _: { "historic" : "archaeological_site", "fixme" : "castle/fort/memorial/ruins?", },
+72330 : "historic=archaeological_site, fixme=castle/fort/memorial/ruins?",
 ## Features Below are lines and do not map well to OSM data types
 # Erämaa-alue
-72700 : lambda _: {}, # "boundary" : "protected_area", "protect_class" : "1b" },
+72700 : "", # "boundary" : "protected_area", "protect_class" : "1b" },
 # Rauhoitettu kivi
-72410 : lambda _: {},
+72410 : "",
 # Rauhoitettu puu
-72420 : lambda _: {},
+72420 : "",
 # Muu rauhoitettu kohde
-72440 : lambda _: {},
+72440 : "",
 # Muinaisjäännös
-74330 : lambda _: {}, # "historic" : "archaeological_site", "area" : "yes", "fixme" : "castle/fort/memorial/ruins?", },
+74330 : "", # "historic" : "archaeological_site", "area" : "yes", "fixme" : "castle/fort/memorial/ruins?", },
 # Suojelualueen reunaviiva
-72000 : lambda _: {},
+72000 : "",
 # Suojelukohteet tekninen viiva
-30999 : lambda _: {},
+30999 : "",
 # Taajaan rakennettu alue
-40200 : lambda _: {},
+40200 : "",
 # Taajaan rakennetun alueen reunaviiva
-40100 : lambda _: {},
+40100 : "",
 ## Lines end
 # Lauttasymboli
-12192 : lambda _: {},
+12192 : "",
 # Lossisymboli
-12193 : lambda _: {},
+12193 : "",
 # Esterakennelma
-12200 : lambda _: {},
+12200 : "",
 # Kevytväylän alikulkusymboli
-12391 : lambda _: {},
+12391 : "",
 # Kulkukorkeusrajoitteen korkeus
-10111 : lambda f: { "maxheight" : ustr(f['teksti']), },
+10111 : "maxheight={teksti}",
 # Autotien siltanumero
-12105 : lambda _: {},
+12105 : "",
 # Autotien lauttanumero
-12106 : lambda _: {},
+12106 : "",
 # Paikallistien numero
-12181 : lambda _: {},
+12181 : "",
 # Maantien numero
-12182 : lambda _: {},
+12182 : "",
 # E- valta- tai kantatien numero
-12183 : lambda _: {},
+12183 : "",
 # Ankkuripaikka
-16600 : lambda _: { "seamark:type" : "anchorage", },
+16600 : "seamark:type=anchorage",
 # Hylky, luokittelematon
-16700 : lambda _: { "historic" : "wreck", "seamark:type" : "wreck", },
+16700 : "historic=wreck, seamark:type=wreck",
 # Hylky, pinnalla
-16712 : lambda _: { "historic" : "wreck", "seamark:type" : "wreck", "seamark:category" : "hull_visible", },
+16712 : "historic=wreck, seamark:type=wreck, seamark:category=hull_visible",
 # Hylky, syvyys tuntematon
-16721 : lambda _: { "historic" : "wreck", "seamark:type" : "wreck", },
+16721 : "historic=wreck, seamark:type=wreck",
 # Hylky, syvyys tunnettu
-16722 : lambda _: { "historic" : "wreck", "seamark:type" : "wreck", },
+16722 : "historic=wreck, seamark:type=wreck",
 # Linjamerkki
-#16120 : lambda _: { "seamark:type" : "navigation_line", "seamark:navigation_line:category" : "leading_line" ??? }
+#16120 : "seamark:type=navigation_line, seamark:navigation_line:category=leading_line ???"
 # Kummeli
-16121 : lambda _: { "seamark:type" : "beacon_special_purpose", "seamark:beacon_special_purpose:shape" : "cairn", },
+16121 : "seamark:type=beacon_special_purpose, seamark:beacon_special_purpose:shape=cairn",
 # Tunnusmajakka
-16122 : lambda _: { "man_made" : "lighthouse", },
+16122 : "man_made=lighthouse",
 # Loisto
-16124 : lambda _: { "seamark:type" : "light_minor" },
+16124 : "seamark:type=light_minor",
 # Linjaloisto
-16125 : lambda _: { "seamark:type" : "light_minor" },
+16125 : "seamark:type=light_minor",
 # Merimajakka
-16126 : lambda _: { "man_made" : "lighthouse", "seamark:type" : "landmark", "seamark:category" : "tower", },
+16126 : "man_made=lighthouse, seamark:type=landmark, seamark:category=tower",
 # Merimerkki, vasen
-16141 : lambda _: { "seamark:type" : "buoy_lateral", "seamark:buoy_lateral:colour" : "red", },
+16141 : "seamark:type=buoy_lateral, seamark:buoy_lateral:colour=red",
 # Merimerkki, oikea
-16142 : lambda _: { "seamark:type" : "buoy_lateral", "seamark:buoy_lateral:colour" : "green", },
+16142 : "seamark:type=buoy_lateral, seamark:buoy_lateral:colour=green",
 # Merimerkki, pohjoinen
-16143 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "black;yellow" },
+16143 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=black;yellow",
 # Merimerkki, etelä
-16144 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "yellow;black" },
+16144 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=yellow;black",
 # Merimerkki, itä
-16145 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "black;yellow;black" },
+16145 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=black;yellow;black",
 # Merimerkki, länsi
-16146 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "yellow;black;yellow" },
+16146 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=yellow;black;yellow",
 # Merimerkki, kari
-16147 : lambda _: { "seamark:type" : "buoy_isolated_danger", "seamark:buoy_isolated_danger:colour" : "black;red;black" },
+16147 : "seamark:type=buoy_isolated_danger, seamark:buoy_isolated_danger:colour=black;red;black",
 # Merimerkki, turvavesi
-16148 : lambda _: { "seamark:type" : "buoy_safe_water", "seamark:buoy_safe_water:colour_pattern" : "vertical", "seamark:buoy_safe_water:colour" : "red;white" },
+16148 : "seamark:type=buoy_safe_water, seamark:buoy_safe_water:colour_pattern=vertical, seamark:buoy_safe_water:colour=red;white",
 # Merimerkki, erikoismerkki
-16149 : lambda _: { "seamark:type" : "buoy_special_purpose" },
+16149 : "seamark:type=buoy_special_purpose",
 # Viittapoiju, vasen
-16151 : lambda _: { "seamark:type" : "buoy_lateral", "seamark:buoy_lateral:colour" : "red", },
+16151 : "seamark:type=buoy_lateral, seamark:buoy_lateral:colour=red",
 # Viittapoiju, oikea
-16152 : lambda _: { "seamark:type" : "buoy_lateral", "seamark:buoy_lateral:colour" : "green", },
+16152 : "seamark:type=buoy_lateral, seamark:buoy_lateral:colour=green",
 # Viittapoiju, pohjoinen
-16153 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "black;yellow" },
+16153 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=black;yellow",
 # Viittapoiju, etelä
-16154 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "yellow;black" },
+16154 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=yellow;black",
 # Viittapoiju, itä
-16155 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "black;yellow;black" },
+16155 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=black;yellow;black",
 # Viittapoiju, länsi
-16156 : lambda _: { "seamark:type" : "buoy_cardinal", "seamark:buoy_cardinal:colour" : "yellow;black;yellow" },
+16156 : "seamark:type=buoy_cardinal, seamark:buoy_cardinal:colour=yellow;black;yellow",
 # Viittapoiju, kari
-16157 : lambda _: { "seamark:type" : "buoy_isolated_danger", "seamark:buoy_isolated_danger:colour" : "black;red;black" },
+16157 : "seamark:type=buoy_isolated_danger, seamark:buoy_isolated_danger:colour=black;red;black",
 # Viittapoiju, turvavesi
-16158 : lambda _: { "seamark:type" : "buoy_safe_water", "seamark:buoy_safe_water:colour_pattern" : "vertical", "seamark:buoy_safe_water:colour" : "red;white" },
+16158 : "seamark:type=buoy_safe_water, seamark:buoy_safe_water:colour_pattern=vertical, seamark:buoy_safe_water:colour=red;white",
 # Viittapoiju, erikoismerkki
-16159 : lambda _: { "seamark:type" : "buoy_special_purpose" },
+16159 : "seamark:type=buoy_special_purpose",
 # Hylyn syvyys
-16703 : lambda f: { "depth" : ustr(f['teksti']), },
+16703 : "depth={teksti}",
 # Kulkusyvyys (2.2mm teksti) # FIXME: depth=x ?
-16503 : lambda _: {},
+16503 : "",
 # Kulkusyvyys (1.8mm teksti)
-16504 : lambda _: {},
+16504 : "",
 # Alikulkukorkeus
-16508 : lambda _: {},
+16508 : "",
 # Laivaväylä
-16511 : lambda _: { "seamark:type" : "recommended_track", },
+16511 : "seamark:type=recommended_track",
 # Venereitti
-16512 : lambda _: { "seamark:type" : "recommended_track", },
+16512 : "seamark:type=recommended_track",
 }
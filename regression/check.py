@@ -0,0 +1,127 @@
+'''
+Golden regression corpus of the translations
+
+corpus.jsonl holds one input record per line:
+
+    {"translation": "langleyroad", "attrs": {"ROADNAME": "200 St", ...}}
+    {"translation": "mtk-gml", "layer": "Tieviiva", "attrs": {"kohdeluokka": 12131, ...}}
+
+Each record is run through the hooks ogr2osm calls per feature: filterFeature
+and filterTags, or filterFeaturePost for translations which set their tags
+there. Integer, real and string attributes become fields of the same type,
+and attributes left out of a record are missing fields: GDAL 3 raises
+KeyError for them, older versions ValueError.
+The tags of the feature, and of any features the hooks created, are written
+one record per line as JSON with sorted keys and escaped non-ASCII
+characters, so the output is the same bytes on every interpreter.
+
+check.py compares the output with golden.jsonl and lists the records which
+differ. With --update it rewrites golden.jsonl instead.
+
+Needs the ogr2osm geom module and GDAL's osgeo package, run with the ogr2osm
+directory on PYTHONPATH.
+
+Usage: python regression/check.py [--update]
+'''
+
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+import geom
+from osgeo import ogr
+
+from common import chain, compat
+
+
+def load(translation):
+    """Import the translation module named like ogr2osm's -t option."""
+    return chain.load(translation)
+
+
+def ogrfeature(layer, attrs):
+    """Return an OGR feature with attrs as its fields."""
+    defn = ogr.FeatureDefn(layer)
+    for (name, value) in sorted(attrs.items()):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            type = ogr.OFTString
+        elif isinstance(value, int):
+            type = ogr.OFTInteger
+        else:
+            type = ogr.OFTReal
+        defn.AddFieldDefn(ogr.FieldDefn(str(name), type))
+    feature = ogr.Feature(defn)
+    for (name, value) in attrs.items():
+        feature.SetField(str(name), value)
+    return feature
+
+
+def run(module, record):
+    """Return the tags of record translated by module, or None if dropped."""
+    attrs = record['attrs']
+    o = ogrfeature(record.get('layer', ''), attrs)
+    if hasattr(module, 'filterFeature'):
+        o = module.filterFeature(o, sorted(attrs), lambda g: g)
+        if o is None:
+            return None
+    if hasattr(module, 'mtk_kentat'):
+        module.mtk_kentat(o.GetDefnRef())
+    if hasattr(module, 'filterTags'):
+        tags = module.filterTags(dict((k, compat.text_type(v)) for (k, v) in attrs.items()))
+        if tags is None:
+            return None
+    else:
+        tags = {}
+    created = len(geom.Feature.features)
+    feature = geom.Feature()
+    way = geom.Way()
+    way.points = [geom.Point(0.0, 0.0), geom.Point(1.0, 1.0)]
+    feature.geometry = way
+    feature.tags = tags
+    if hasattr(module, 'filterFeaturePost'):
+        module.filterFeaturePost(feature, o, None)
+    return [f.tags for f in geom.Feature.features[created:]]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    modules = {}
+    lines = []
+    with io.open(os.path.join(HERE, 'corpus.jsonl'), encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            translation = record['translation']
+            if translation not in modules:
+                modules[translation] = load(translation)
+            result = run(modules[translation], record)
+            lines.append(json.dumps(result, sort_keys=True, ensure_ascii=True))
+
+    goldenpath = os.path.join(HERE, 'golden.jsonl')
+    if '--update' in argv:
+        with io.open(goldenpath, 'w', encoding='ascii', newline='\n') as f:
+            f.write(u''.join(compat.text_type(line) + u'\n' for line in lines))
+        sys.stdout.write('Wrote %d records to %s\n' % (len(lines), goldenpath))
+        return 0
+
+    with io.open(goldenpath, encoding='ascii') as f:
+        golden = [line.rstrip(u'\n') for line in f]
+    differ = 0
+    for (n, (line, expected)) in enumerate(zip(lines, golden)):
+        if line != expected:
+            differ += 1
+            sys.stdout.write('Record %d differs:\n  golden: %s\n  output: %s\n'
+                             % (n + 1, expected, line))
+    if len(lines) != len(golden):
+        differ += 1
+        sys.stdout.write('%d records, %d golden lines\n' % (len(lines), len(golden)))
+    sys.stdout.write('%d records, %d differ\n' % (len(lines), differ))
+    return 1 if differ else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
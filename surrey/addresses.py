@@ -3,8 +3,14 @@ Translation rules for the Surrey Addresses.
 
 Copyright 2010-2012 Paul Norman. 
 
+With OGR2OSM_STREETS set to the Surrey roads dataset, each addr:street is
+looked up in the road names expanded alike by expandName(), and unknown
+streets are reported with the nearest road names, see common.streets.
+
 '''
 
+from common import conflate, reproject, stats, streets, warn
+
 affixlookup = {
     'Ave':'Avenue',
     'Rd':'Road',
@@ -28,12 +34,16 @@ affixlookup = {
     'W':'West'
 }
 
+def expandName(rawname):
+    return ' '.join([affixlookup.get(part.title(), part) for part in rawname.split()])
+
 def filterFeature(ogrfeature, fieldNames, reproject):
     if not ogrfeature: return
 
     index = ogrfeature.GetFieldIndex('STATUS')
     if index >= 0:
         if ogrfeature.GetField(index) in ('History', 'For Construction', 'Proposed'):
+            stats.count('rejected')
             return None
     return ogrfeature
 
@@ -41,12 +51,13 @@ def filterTags(attrs):
     if not attrs: return
 
     tags = {}
+    stats.count('accepted')
 
     if 'HOUSE_NO' in attrs:
         tags['addr:housenumber'] = attrs['HOUSE_NO'].strip(' ')
 
     # This assumes every address will have a road name
-    tags['addr:street'] = ' '.join([affixlookup.get(part.title(), part) for part in attrs['ROAD_NAME'].split()])
+    tags['addr:street'] = expandName(attrs['ROAD_NAME'])
 
     #Add city-wide addressing info
     tags['addr:city'] = 'Surrey'
@@ -59,4 +70,16 @@ def filterTags(attrs):
     if tags['addr:housenumber'].strip() == '' or  tags['addr:street'].strip() == '':
         raise Exception('Invalid address found with ' + str(attrs))
 
+    streets.check(tags['addr:street'], 'ROAD_NAME', expandName)
+
     return tags
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    conflate.conflate(geometries, features)
+    stats.output(geometries, features)
+    warn.flush()
+    stats.report()
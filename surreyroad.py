@@ -5,6 +5,8 @@ Copyright 2011 Paul Norman.
 
 """
 
+from common import conflate, reproject, stats
+
 def translateName(rawname):
 	suffixlookup = {}
 	suffixlookup.update({'Ave':'Avenue'})
@@ -60,6 +62,7 @@ def filterTags(attrs):
 		tags.update({'lanes': attrs['NO_LANE'].strip(' ')})
 
 	if 'RC_TYPE2' in attrs:
+		stats.count(attrs['RC_TYPE2'])
 		if attrs['RC_TYPE2'] == "Road" or attrs['RC_TYPE2'] == "Frontage Road":  #TYPE=0 or 1
 			#some form of road	
 			if attrs['STATUS'] and attrs['STATUS'] == "Unconstructed":
@@ -120,3 +123,10 @@ def filterTags(attrs):
 
 	return tags
 
+
+def preOutputTransform(geometries, features):
+	if geometries is None and features is None: return
+	reproject.reproject(geometries)
+	conflate.conflate(geometries, features)
+	stats.output(geometries, features)
+	stats.report()
@@ -0,0 +1,94 @@
+'''
+Stand-in for the ogr2osm geom module, for the tests
+
+The common modules import geom, which ogr2osm puts on the path of the
+translations. This module has the classes and attributes of ogr2osm's geom
+that they use, so the tests run without ogr2osm and GDAL. Running the tests
+from the repository root puts this directory first on the path:
+
+    python -m unittest discover tests
+
+As in ogr2osm, every geometry and feature created is added to the class
+lists Geometry.geometries and Feature.features, which the tests pass to the
+stages as the lists of the run. reset() empties them, way() and feature()
+build the test data.
+'''
+
+
+class Geometry(object):
+    geometries = []
+    elementIdCounter = 0
+
+    def __init__(self):
+        Geometry.elementIdCounter -= 1
+        self.id = Geometry.elementIdCounter
+        self.parents = set()
+        Geometry.geometries.append(self)
+
+    def addparent(self, parent):
+        self.parents.add(parent)
+
+    def removeparent(self, parent):
+        self.parents.discard(parent)
+
+
+class Point(Geometry):
+    def __init__(self, x, y):
+        Geometry.__init__(self)
+        self.x = x
+        self.y = y
+
+
+class Way(Geometry):
+    def __init__(self):
+        Geometry.__init__(self)
+        self.points = []
+
+
+class Relation(Geometry):
+    def __init__(self):
+        Geometry.__init__(self)
+        self.members = []
+
+
+class Feature(object):
+    features = []
+
+    def __init__(self):
+        self.geometry = None
+        self.tags = {}
+        Feature.features.append(self)
+
+
+def reset():
+    """Forget the geometries and features created so far."""
+    del Geometry.geometries[:]
+    del Feature.features[:]
+    Geometry.elementIdCounter = 0
+
+
+def way(coords, points=None):
+    """
+    Return a way through coords. The Points are shared through points, a
+    dict of Point by coordinates, or only within the way without one.
+    """
+    if points is None:
+        points = {}
+    w = Way()
+    for xy in coords:
+        point = points.get(xy)
+        if point is None:
+            point = points[xy] = Point(*xy)
+        w.points.append(point)
+    for point in set(w.points):
+        point.addparent(w)
+    return w
+
+
+def feature(geometry, **tags):
+    """Return a feature with geometry and tags."""
+    f = Feature()
+    f.geometry = geometry
+    f.tags = tags
+    geometry.addparent(f)
+    return f
@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from common import checkpoint
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.directory, 'manifest.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_resume(self):
+        shards = [self.write('shard%d.osm' % n, b'<osm/>' * (n + 1)) for n in range(3)]
+        manifest = checkpoint.Manifest(self.manifest)
+        manifest.record('a', shards[0])
+        manifest.record('b', shards[1])
+        manifest.close()
+        # A rerun skips the recorded jobs only
+        manifest = checkpoint.Manifest(self.manifest)
+        self.assertTrue(manifest.done('a', shards[0]))
+        self.assertTrue(manifest.done('b', shards[1]))
+        self.assertFalse(manifest.done('c', shards[2]))
+        self.assertFalse(manifest.done('a', shards[1]))
+        manifest.record('c', shards[2])
+        manifest.close()
+        manifest = checkpoint.Manifest(self.manifest)
+        self.assertEqual(sorted(manifest.jobs), ['a', 'b', 'c'])
+
+    def test_shard_changed(self):
+        shard = self.write('shard.osm', b'<osm/>')
+        manifest = checkpoint.Manifest(self.manifest)
+        manifest.record('a', shard)
+        manifest.close()
+        self.write('shard.osm', b'<osm')
+        self.assertFalse(checkpoint.Manifest(self.manifest).done('a', shard))
+        os.remove(shard)
+        self.assertFalse(checkpoint.Manifest(self.manifest).done('a', shard))
+
+    def test_truncated_line(self):
+        shards = [self.write('shard%d.osm' % n, b'<osm/>') for n in range(2)]
+        manifest = checkpoint.Manifest(self.manifest)
+        manifest.record('a', shards[0])
+        manifest.close()
+        # A crash while writing the next line
+        with open(self.manifest, 'ab') as f:
+            f.write(b'{"key": "b", "out')
+        manifest = checkpoint.Manifest(self.manifest)
+        self.assertTrue(manifest.done('a', shards[0]))
+        self.assertFalse(manifest.done('b', shards[1]))
+        manifest.record('b', shards[1])
+        manifest.close()
+        with io.open(self.manifest, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])['key'], 'b')
+        manifest = checkpoint.Manifest(self.manifest)
+        self.assertTrue(manifest.done('a', shards[0]))
+        self.assertTrue(manifest.done('b', shards[1]))
+
+    def test_remove(self):
+        manifest = checkpoint.Manifest(self.manifest)
+        manifest.record('a', self.write('shard.osm', b'<osm/>'))
+        manifest.remove()
+        self.assertFalse(os.path.exists(self.manifest))
+        self.assertEqual(checkpoint.Manifest(self.manifest).jobs, {})
+
+    def test_job_key(self):
+        source = self.write('input.shp', b'abc')
+        key = checkpoint.job_key(source, 'mtk-gml', 3)
+        self.assertEqual(checkpoint.job_key(source, 'mtk-gml', 3), key)
+        self.assertNotEqual(checkpoint.job_key(source, 'mtk-gml', 4), key)
+        self.write('input.shp', b'abcd')
+        self.assertNotEqual(checkpoint.job_key(source, 'mtk-gml', 3), key)
+        self.write('input.shp', b'abc')
+        st = os.stat(source)
+        os.utime(source, (st.st_atime, st.st_mtime + 10))
+        self.assertNotEqual(checkpoint.job_key(source, 'mtk-gml', 3), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+import geom
+from common import conflate, sink
+
+XML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6" generator="test">
+  <node id="1" lat="49.1000000" lon="-122.8000000">
+    <tag k="addr:housenumber" v="10"/>
+    <tag k="addr:street" v="King  George Boulevard"/>
+  </node>
+  <node id="2" lat="49.1001000" lon="-122.8001000"/>
+  <node id="3" lat="49.1001000" lon="-122.8003000"/>
+  <node id="4" lat="49.1003000" lon="-122.8003000"/>
+  <way id="10">
+    <nd ref="2"/>
+    <nd ref="3"/>
+    <nd ref="4"/>
+    <nd ref="2"/>
+    <tag k="building" v="yes"/>
+    <tag k="addr:housenumber" v="12"/>
+    <tag k="addr:street" v="King George Boulevard"/>
+  </way>
+  <way id="11">
+    <nd ref="2"/>
+    <nd ref="3"/>
+    <tag k="surrey:geodb_oid" v="4711"/>
+  </way>
+  <relation id="20">
+    <member type="way" ref="10" role="outer"/>
+    <tag k="type" v="multipolygon"/>
+  </relation>
+</osm>
+'''
+
+
+class ConflateTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name, data=None):
+        path = os.path.join(self.directory, name)
+        if data is not None:
+            with open(path, 'wb') as f:
+                f.write(data)
+        return path
+
+    def extract_pbf(self):
+        """Write the objects of XML to a PBF file with sink.PbfSink."""
+        path = self.path('extract.osm.pbf')
+        out = sink.PbfSink(path)
+        for (kind, id, tags, data) in conflate._xml(self.path('extract.osm', XML)):
+            if kind == 'node':
+                out.node(id, data[0], data[1], tags)
+            elif kind == 'way':
+                out.way(id, data, tags)
+            else:
+                out.relation(id, [('way', 10, 'outer')], tags)
+        out.close()
+        return path
+
+    def address(self, x, y, number, street):
+        return geom.feature(geom.Point(x, y),
+                            **{'addr:housenumber': number, 'addr:street': street})
+
+    def test_xml_elements(self):
+        elements = list(conflate._xml(self.path('extract.osm', XML)))
+        self.assertEqual([(kind, id) for (kind, id, tags, data) in elements],
+                         [('node', 1), ('node', 2), ('node', 3), ('node', 4),
+                          ('way', 10), ('way', 11), ('relation', 20)])
+        (kind, id, tags, data) = elements[0]
+        self.assertEqual(data, (49.1, -122.8))
+        self.assertEqual(tags['addr:housenumber'], '10')
+        self.assertEqual(elements[4][3], [2, 3, 4, 2])
+        self.assertEqual(elements[6][2], {'type': 'multipolygon'})
+
+    def test_pbf_same_as_xml(self):
+        xml = list(conflate._xml(self.path('extract.osm', XML)))
+        pbf = list(conflate._pbf(self.extract_pbf()))
+        self.assertEqual(len(pbf), len(xml))
+        for (a, b) in zip(pbf, xml):
+            self.assertEqual(a[:3], b[:3])
+            if a[0] == 'node':
+                self.assertAlmostEqual(a[3][0], b[3][0], places=7)
+                self.assertAlmostEqual(a[3][1], b[3][1], places=7)
+            else:
+                self.assertEqual(a[3], b[3])
+
+    def test_pbf_dense_nodes(self):
+        # Negative ids and coordinates, and a granularity and offsets other
+        # than the defaults, in one dense node group
+        ids = [-5, -3, 7]
+        lats = [-100, 250, 0]
+        lons = [1000, -2000, 5]
+        dense = (sink._field(1, sink._packed(sink._delta(ids)))
+                 + sink._field(8, sink._packed(sink._delta(lats)))
+                 + sink._field(9, sink._packed(sink._delta(lons)))
+                 + sink._field(10, sink._packed([1, 2, 0, 0, 3, 4, 1, 2, 0])))
+        strings = b''.join([sink._field(1, s) for s in (b'', b'name', b'A', b'ref', b'7')])
+        block = (sink._field(1, strings) + sink._field(2, sink._field(2, dense))
+                 + sink._intfield(17, 1000) + sink._intfield(19, 45000000000)
+                 + sink._intfield(20, -73000000000))
+        blob = sink._intfield(2, len(block)) + sink._field(3, zlib.compress(block))
+        header = sink._field(1, b'OSMData') + sink._intfield(3, len(blob))
+        path = self.path('dense.osm.pbf', struct.pack('!I', len(header)) + header + blob)
+        nodes = list(conflate._pbf(path))
+        self.assertEqual([(kind, id, tags) for (kind, id, tags, data) in nodes],
+                         [('node', -5, {'name': 'A'}), ('node', -3, {}),
+                          ('node', 7, {'ref': '7', 'name': 'A'})])
+        for ((kind, id, tags, (lat, lon)), (dlat, dlon)) in zip(nodes, zip(lats, lons)):
+            self.assertAlmostEqual(lat, 45.0 + dlat * 1e-6, places=9)
+            self.assertAlmostEqual(lon, -73.0 + dlon * 1e-6, places=9)
+
+    def check_conflate(self, path):
+        near = self.address(-122.80001, 49.10001, '10', 'King George Boulevard')
+        far = self.address(-122.81, 49.1, '10', 'King George Boulevard')
+        building = self.address(-122.8002, 49.1002, '12', 'king george  boulevard')
+        road = geom.feature(geom.way([(-122.8, 49.0), (-122.8, 49.1)]), **{'surrey:geodb_oid': '4711'})
+        other = geom.feature(geom.way([(-122.7, 49.0), (-122.7, 49.1)]), **{'surrey:geodb_oid': '4712'})
+        self.assertEqual(conflate.conflate(self.geometries, self.features, path, 'flag'), 3)
+        self.assertEqual(near.tags[conflate.MATCH_TAG], 'node/1')
+        self.assertEqual(building.tags[conflate.MATCH_TAG], 'way/10')
+        self.assertEqual(road.tags[conflate.MATCH_TAG], 'way/11')
+        self.assertFalse(conflate.MATCH_TAG in far.tags)
+        self.assertFalse(conflate.MATCH_TAG in other.tags)
+
+    def test_conflate_xml(self):
+        self.check_conflate(self.path('extract.osm', XML))
+
+    def test_conflate_pbf(self):
+        self.check_conflate(self.extract_pbf())
+
+    def test_drop(self):
+        near = self.address(-122.80001, 49.10001, '10', 'King George Boulevard')
+        road = geom.feature(geom.way([(-122.8, 49.0), (-122.8, 49.1)]), **{'surrey:geodb_oid': '4711'})
+        far = self.address(-122.81, 49.1, '10', 'King George Boulevard')
+        path = self.path('extract.osm', XML)
+        self.assertEqual(conflate.conflate(self.geometries, self.features, path), 2)
+        self.assertEqual(self.features, [far])
+        self.assertEqual(self.geometries, [far.geometry])
+        self.assertFalse(near.geometry in self.geometries)
+        self.assertFalse(road.geometry in self.geometries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+import geom
+from common import nodes
+
+
+class NodeIndexTest(unittest.TestCase):
+
+    def check(self, index, count):
+        for i in range(count):
+            self.assertEqual(index.setdefault(i * 0.001, 60.0 - i * 0.001, i), i)
+        self.assertEqual(len(index), count)
+        for i in range(count):
+            self.assertEqual(index.setdefault(i * 0.001, 60.0 - i * 0.001, -1), i)
+            self.assertEqual(index.get(i * 0.001, 60.0 - i * 0.001), i)
+        self.assertEqual(index.get(-1.0, -1.0), None)
+        # Coordinates equal at 1e-7 degrees are the same node
+        self.assertEqual(index.get(0.00100000004, 59.999), 1)
+
+    def test_memory(self):
+        index = nodes.NodeIndex(spill=1 << 30)
+        try:
+            self.check(index, 5000)
+            self.assertTrue(index.mapped is None)
+        finally:
+            index.close()
+
+    def test_spill(self):
+        # Spilled from the start, and grown while spilled
+        index = nodes.NodeIndex(spill=0)
+        try:
+            self.assertFalse(index.mapped is None)
+            self.check(index, 5000)
+            self.assertFalse(index.mapped is None)
+        finally:
+            index.close()
+
+    def test_spill_when_grown(self):
+        index = nodes.NodeIndex(capacity=16, spill=4096)
+        try:
+            self.assertTrue(index.mapped is None)
+            self.check(index, 1000)
+            self.assertFalse(index.mapped is None)
+        finally:
+            index.close()
+
+
+class MergeTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+
+    def grid(self):
+        """Roads along the rows and columns of a grid, each with its own nodes."""
+        for i in range(20):
+            geom.feature(geom.way([(x * 0.001, i * 0.001) for x in range(20)]), highway='road')
+            geom.feature(geom.way([(i * 0.001, y * 0.001) for y in range(20)]), highway='road')
+
+    def check_merged(self, spill):
+        self.grid()
+        self.assertEqual(nodes.merge(self.geometries, self.features, spill=spill), 400)
+        points = [g for g in self.geometries if type(g) is geom.Point]
+        self.assertEqual(len(points), 400)
+        self.assertEqual(len(set((p.x, p.y) for p in points)), 400)
+        for point in points:
+            self.assertEqual(len(point.parents), 2)
+        for g in self.geometries:
+            if type(g) is geom.Way:
+                for point in g.points:
+                    self.assertTrue(g in point.parents)
+
+    def test_merge(self):
+        self.check_merged(nodes.SPILL)
+
+    def test_merge_spilled(self):
+        self.check_merged(0)
+
+    def test_tagged_nodes_kept(self):
+        road = geom.feature(geom.way([(0.0, 0.0), (0.001, 0.0)]), highway='road')
+        end = geom.feature(geom.Point(0.001, 0.0), **{'addr:housenumber': '1'})
+        address = geom.feature(geom.Point(0.0, 0.0), **{'addr:housenumber': '2'})
+        interpolation = geom.feature(geom.way([(0.0, 0.0)]), **{'addr:interpolation': 'odd'})
+        interpolation.geometry.points.append(end.geometry)
+        end.geometry.addparent(interpolation.geometry)
+        self.assertEqual(nodes.merge(self.geometries, self.features, spill=0), 2)
+        # The way node under the tagged interpolation end is merged into it
+        self.assertTrue(road.geometry.points[1] is end.geometry)
+        # and the address point at a way node is left apart
+        self.assertFalse(road.geometry.points[0] is address.geometry)
+        self.assertTrue(road.geometry.points[0] is interpolation.geometry.points[0])
+        self.assertTrue(address.geometry in self.geometries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import unittest
+
+import geom
+from common import reproject
+
+try:
+    import numpy
+    import pyproj
+except ImportError:
+    numpy = pyproj = None
+
+
+class ReprojectTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        os.environ.pop(reproject.REPROJECT_ENV, None)
+
+    def test_no_crs(self):
+        point = geom.Point(500000.0, 5444000.0)
+        self.assertEqual(reproject.reproject(self.geometries), 0)
+        self.assertEqual((point.x, point.y), (500000.0, 5444000.0))
+
+    def test_scaled_integers_refused(self):
+        # As stored by ogr2osm versions with --significant-digits
+        geom.Point(500000 * 10 ** 9, 5444000 * 10 ** 9)
+        self.assertRaises(ValueError, reproject.reproject, self.geometries, 'EPSG:26910')
+
+    @unittest.skipIf(numpy is None or pyproj is None, 'needs NumPy and pyproj')
+    def test_batches(self):
+        points = [geom.Point(500000.0 + n, 5444000.0) for n in range(5)]
+        way = geom.way([(500000.0, 5444000.0)])
+        self.assertEqual(reproject.reproject(self.geometries, 'EPSG:26910', chunk=2), 6)
+        for p in points + way.points:
+            self.assertAlmostEqual(p.x, -123.0, places=3)
+            self.assertAlmostEqual(p.y, 49.15, places=1)
+        self.assertTrue(points[1].x > points[0].x)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import geom
+from common import simplify
+
+# A wiggle of about 0.1 m off the border between the two areas
+WIGGLE = (0.000001, 0.0005)
+
+
+class SimplifyTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+        points = {}
+        # Two areas sharing the border x = 0, each with a vertex of about
+        # 1 cm off its outer side
+        self.west = geom.feature(geom.way(
+            [(0.0, 0.0), WIGGLE, (0.0, 0.001), (-0.001, 0.001), (-0.0010001, 0.0005),
+             (-0.001, 0.0), (0.0, 0.0)], points), landuse='meadow')
+        self.east = geom.feature(geom.way(
+            [(0.0, 0.0), (0.001, 0.0), (0.0010001, 0.0005), (0.001, 0.001), (0.0, 0.001),
+             WIGGLE, (0.0, 0.0)], points), landuse='meadow')
+        self.points = points
+
+    def simplify(self, west, east):
+        return simplify.simplify(self.geometries, self.features,
+                                 {self.west: west, self.east: east})
+
+    def test_shared_border_kept(self):
+        self.assertEqual(self.simplify(1.0, 1.0), (14, 10))
+        wiggle = self.points[WIGGLE]
+        for f in (self.west, self.east):
+            self.assertFalse(wiggle in f.geometry.points)
+        self.assertFalse(wiggle in self.geometries)
+        # The border nodes are still shared
+        for xy in ((0.0, 0.0), (0.0, 0.001)):
+            point = self.points[xy]
+            self.assertTrue(point in self.west.geometry.points)
+            self.assertTrue(point in self.east.geometry.points)
+            self.assertEqual(point.parents, set([self.west.geometry, self.east.geometry]))
+
+    def test_rings_closed(self):
+        self.simplify(1.0, 1.0)
+        for f in (self.west, self.east):
+            points = f.geometry.points
+            self.assertTrue(points[0] is points[-1])
+            self.assertEqual(len(points), 5)
+
+    def test_shared_border_smallest_tolerance(self):
+        # The border keeps the wiggle for the east area in both areas
+        self.assertEqual(self.simplify(1.0, 0.005), (14, 13))
+        wiggle = self.points[WIGGLE]
+        self.assertTrue(wiggle in self.west.geometry.points)
+        self.assertTrue(wiggle in self.east.geometry.points)
+        self.assertFalse(self.points[(-0.0010001, 0.0005)] in self.west.geometry.points)
+        self.assertTrue(self.points[(0.0010001, 0.0005)] in self.east.geometry.points)
+
+    def test_unselected_way_nodes_kept(self):
+        road = geom.way([WIGGLE, (0.0005, 0.0005)], self.points)
+        self.simplify(1.0, 1.0)
+        self.assertTrue(self.points[WIGGLE] in self.west.geometry.points)
+        self.assertTrue(self.points[WIGGLE] in road.points)
+
+    def test_small_ring_not_collapsed(self):
+        geom.reset()
+        tiny = geom.feature(geom.way([(0.0, 0.0), (0.000001, 0.0), (0.000001, 0.000001),
+                                      (0.0, 0.0)]), natural='scrub')
+        self.assertEqual(simplify.simplify(self.geometries, self.features, {tiny: 10.0}), (4, 4))
+
+
+class QuantiseTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+
+    def test_rounded(self):
+        point = geom.Point(24.123456789, -60.00000004)
+        way = geom.way([(1.23456789012, 2.0)])
+        simplify.quantise(geom.Geometry.geometries)
+        self.assertEqual((point.x, point.y), (24.1234568, -60.0))
+        self.assertEqual((way.points[0].x, way.points[0].y), (1.2345679, 2.0))
+
+    def test_decimals(self):
+        point = geom.Point(24.123456789, 60.5)
+        simplify.quantise(geom.Geometry.geometries, 3)
+        self.assertEqual((point.x, point.y), (24.123, 60.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import geom
+from common import stitch
+
+
+def coords(way):
+    return [(p.x, p.y) for p in way.points]
+
+
+class StitchTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+        # ogr2osm writes one node for the same coordinates
+        self.points = {}
+
+    def road(self, coords, **tags):
+        return geom.feature(geom.way(coords, self.points), **tags)
+
+    def address(self, xy, number):
+        point = self.points[xy]
+        return geom.feature(point, **{'addr:housenumber': number})
+
+    def test_segments_joined(self):
+        a = self.road([(0, 0), (1, 0)], highway='residential')
+        b = self.road([(1, 0), (2, 0)], highway='residential')
+        c = self.road([(3, 0), (2, 0)], highway='residential')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b, c]), (3, 1))
+        self.assertEqual(self.features, [a])
+        self.assertEqual(coords(a.geometry), [(0, 0), (1, 0), (2, 0), (3, 0)])
+        self.assertFalse(b.geometry in self.geometries)
+        self.assertFalse(c.geometry in self.geometries)
+        for point in a.geometry.points:
+            self.assertTrue(a.geometry in point.parents)
+            self.assertFalse(b.geometry in point.parents)
+
+    def test_different_tags_kept(self):
+        a = self.road([(0, 0), (1, 0)], highway='residential')
+        b = self.road([(1, 0), (2, 0)], highway='tertiary')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b]), (2, 2))
+
+    def test_junction_kept(self):
+        a = self.road([(0, 0), (1, 0)], highway='residential')
+        b = self.road([(1, 0), (2, 0)], highway='residential')
+        c = self.road([(1, 0), (1, 1)], highway='residential')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b, c]), (3, 3))
+
+    def test_unselected_way_at_node_kept(self):
+        a = self.road([(0, 0), (1, 0)], highway='residential')
+        b = self.road([(1, 0), (2, 0)], highway='residential')
+        self.road([(1, 0), (1, 1)], waterway='ditch')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b]), (2, 2))
+
+    def test_oneway_direction(self):
+        a = self.road([(0, 0), (1, 0)], highway='primary', oneway='yes')
+        b = self.road([(2, 0), (1, 0)], highway='primary', oneway='yes')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b]), (2, 2))
+        geom.reset()
+        self.points = {}
+        a = self.road([(0, 0), (1, 0)], highway='primary', oneway='yes')
+        b = self.road([(1, 0), (2, 0)], highway='primary', oneway='yes')
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b]), (2, 1))
+
+    def test_interpolation_joined(self):
+        a = self.road([(0, 0), (1, 0)], **{'addr:interpolation': 'even'})
+        b = self.road([(1, 0), (2, 0)], **{'addr:interpolation': 'even'})
+        ranges = [self.address((0, 0), '2'), self.address((1, 0), '10'),
+                  self.address((1, 0), '12'), self.address((2, 0), '20')]
+        interpolations = {a: ranges[:2], b: ranges[2:]}
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b], interpolations),
+                         (2, 1))
+        self.assertEqual(interpolations[a], [ranges[0], ranges[3]])
+        self.assertEqual(self.features, [a, ranges[0], ranges[3]])
+
+    def test_interpolation_decreasing_kept(self):
+        a = self.road([(0, 0), (1, 0)], **{'addr:interpolation': 'even'})
+        b = self.road([(1, 0), (2, 0)], **{'addr:interpolation': 'even'})
+        ranges = [self.address((0, 0), '2'), self.address((1, 0), '10'),
+                  self.address((1, 0), '8'), self.address((2, 0), '4')]
+        interpolations = {a: ranges[:2], b: ranges[2:]}
+        self.assertEqual(stitch.stitch(self.geometries, self.features, [a, b], interpolations),
+                         (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import geom
+from common import nodes, tiles
+
+# A tile output as ogr2osm writes it, nodes sorted by id as stable_ids()
+# leaves them, and the border node -700 shared with the next tile
+TILE0 = b'''<?xml version="1.0"?>
+<osm version="0.6" upload="false" generator="uvmtrans">
+  <node visible="true" id="-7000000000000000001" lat="44.9" lon="-73.0">
+    <tag k="name" v="A"/>
+  </node>
+  <node visible="true" id="-900" lat="45.0" lon="-73.0"/>
+  <node visible="true" id="-700" lat="45.0" lon="-72.9"/>
+  <way visible="true" id="-7000000000000000002">
+    <nd ref="-900"/>
+    <nd ref="-700"/>
+    <tag k="highway" v="residential"/>
+  </way>
+</osm>
+'''
+TILE1 = b'''<?xml version="1.0"?>
+<osm version="0.6" upload="false" generator="uvmtrans">
+  <node visible="true" id="-800" lat="45.1" lon="-72.8"/>
+  <node visible="true" id="-700" lat="45.0" lon="-72.9"/>
+  <way visible="true" id="-7000000001000000001">
+    <nd ref="-700"/>
+    <nd ref="-800"/>
+    <tag k="highway" v="residential"/>
+  </way>
+</osm>
+'''
+
+
+class StableIdsTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+        self.tearDown()
+
+    def tearDown(self):
+        os.environ.pop(tiles.TILE_ENV, None)
+        tiles.reset()
+
+    def run_tile(self, index):
+        os.environ[tiles.TILE_ENV] = '%d,0,0,1,1' % index
+        tiles.reset()
+        geom.reset()
+        points = {}
+        road = geom.feature(geom.way([(-73.0, 45.0), (-72.9, 45.0)], points), highway='residential')
+        poi = geom.feature(geom.Point(-72.9, 45.0), amenity='bench')
+        tiles.stable_ids(self.geometries, self.features)
+        return (points, road, poi)
+
+    def test_untagged_nodes_by_coordinates(self):
+        (points, road, poi) = self.run_tile(0)
+        border = points[(-72.9, 45.0)].id
+        self.assertEqual(border, tiles.node_id(-72.9, 45.0))
+        (points, road, poi) = self.run_tile(3)
+        self.assertEqual(points[(-72.9, 45.0)].id, border)
+
+    def test_tagged_ids_per_tile(self):
+        (points, road, poi) = self.run_tile(3)
+        base = -(tiles.TILE_BASE + 3 * tiles.TILE_IDS)
+        for g in (road.geometry, poi.geometry):
+            self.assertTrue(base - tiles.TILE_IDS < g.id < base)
+        # A tagged node at the coordinates of an untagged one keeps its own id
+        self.assertNotEqual(poi.geometry.id, points[(-72.9, 45.0)].id)
+        ids = [g.id for g in self.geometries]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_nodes_sorted_first(self):
+        self.run_tile(1)
+        kinds = [type(g) is geom.Point for g in self.geometries]
+        self.assertEqual(kinds, sorted(kinds, reverse=True))
+        ids = [g.id for g in self.geometries if type(g) is geom.Point]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_not_tiled(self):
+        point = geom.Point(-73.0, 45.0)
+        before = point.id
+        tiles.stable_ids(self.geometries, self.features)
+        self.assertEqual(point.id, before)
+
+    def test_merged_nodes_unique(self):
+        # Nodes rounding to the same coordinates would get the same id
+        os.environ[tiles.TILE_ENV] = '0,0,0,1,1'
+        tiles.reset()
+        geom.feature(geom.way([(-73.0, 45.0), (-72.9, 45.0)]), highway='residential')
+        geom.feature(geom.way([(-72.90000000001, 45.0), (-72.8, 45.1)]), highway='residential')
+        nodes.merge(self.geometries, self.features)
+        tiles.stable_ids(self.geometries, self.features)
+        ids = [g.id for g in self.geometries]
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), len(ids))
+
+
+class MergeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for (n, data) in enumerate((TILE0, TILE1)):
+            path = os.path.join(self.directory, 'tile%d.osm' % n)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.paths.append(path)
+        self.output = os.path.join(self.directory, 'merged.osm')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_repeated_nodes_dropped_once(self):
+        self.assertEqual(tiles.merge(self.paths, self.output), 1)
+        elements = list(tiles._elements(self.output))
+        self.assertEqual([(kind, id) for (kind, id, lines) in elements],
+                         [('node', -7000000000000000001), ('node', -900), ('node', -800),
+                          ('node', -700), ('way', -7000000000000000002),
+                          ('way', -7000000001000000001)])
+        # Tags are kept with their element
+        self.assertTrue(b'<tag k="name" v="A"/>' in b''.join(elements[0][2]))
+        with open(self.output, 'rb') as f:
+            self.assertTrue(f.read().rstrip().endswith(b'</osm>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import geom
+from common import topology
+
+SQUARE = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+
+
+def square(dx, dy, **tags):
+    return geom.feature(geom.way([(x + dx, y + dy) for (x, y) in SQUARE]), **tags)
+
+
+def coords(way):
+    return [(p.x, p.y) for p in way.points]
+
+
+class DissolveTest(unittest.TestCase):
+
+    def setUp(self):
+        geom.reset()
+        self.geometries = geom.Geometry.geometries
+        self.features = geom.Feature.features
+
+    def test_adjacent_areas_merged(self):
+        # Separate nodes at the same coordinates, as ogr2osm writes them
+        (a, b) = (square(0, 0, landuse='meadow'), square(1, 0, landuse='meadow'))
+        self.assertEqual(topology.dissolve(self.geometries, self.features, [a, b]), (2, 1))
+        self.assertEqual(self.features, [a])
+        way = a.geometry
+        self.assertTrue(isinstance(way, geom.Way))
+        self.assertTrue(way.points[0] is way.points[-1])
+        self.assertEqual(sorted(set(coords(way))),
+                         [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0), (1.0, 1.0), (2.0, 0.0), (2.0, 1.0)])
+        # The shared edge is gone
+        edges = set(frozenset(e) for e in zip(coords(way), coords(way)[1:]))
+        self.assertFalse(frozenset([(1.0, 0.0), (1.0, 1.0)]) in edges)
+
+    def test_old_geometries_removed(self):
+        (a, b) = (square(0, 0, landuse='meadow'), square(1, 0, landuse='meadow'))
+        old = [a.geometry, b.geometry]
+        topology.dissolve(self.geometries, self.features, [a, b])
+        for way in old:
+            self.assertFalse(way in self.geometries)
+        points = [g for g in self.geometries if isinstance(g, geom.Point)]
+        self.assertEqual(len(points), 6)
+        for point in points:
+            self.assertEqual(point.parents, set([a.geometry]))
+
+    def test_different_tags_kept(self):
+        (a, b) = (square(0, 0, landuse='meadow'), square(1, 0, natural='wetland'))
+        self.assertEqual(topology.dissolve(self.geometries, self.features, [a, b]), (2, 2))
+        self.assertEqual(self.features, [a, b])
+
+    def test_touching_at_node_kept(self):
+        (a, b) = (square(0, 0, landuse='meadow'), square(1, 1, landuse='meadow'))
+        self.assertEqual(topology.dissolve(self.geometries, self.features, [a, b]), (2, 2))
+        self.assertEqual(self.features, [a, b])
+
+    def test_enclosed_area_becomes_hole(self):
+        # Eight squares around a missing middle one
+        ring = [square(x, y, landuse='meadow') for x in range(3) for y in range(3)
+                if (x, y) != (1, 1)]
+        self.assertEqual(topology.dissolve(self.geometries, self.features, ring), (8, 1))
+        relation = ring[0].geometry
+        self.assertTrue(isinstance(relation, geom.Relation))
+        self.assertEqual(ring[0].tags['type'], 'multipolygon')
+        self.assertEqual(sorted(role for (member, role) in relation.members), ['inner', 'outer'])
+        for (member, role) in relation.members:
+            self.assertTrue(member.points[0] is member.points[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+'''
+Batch driver for the TIGER translations
+
+Finds all TIGER shapefiles of the supported layers in a directory tree,
+translates each of them with ogr2osm in a process pool and merges the
+per-file outputs into one .osm file per layer.
+
+Features which are present in more than one input file are written only once
+in the merged output. These are county-equivalent boundaries repeated in
+state files (same boundary, admin_level and nist:fips_code) and edges along
+county lines (same tiger:tlid). Untagged nodes at the same coordinates are
+merged into one, so the ways of adjacent files connect.
+
+Finished files are recorded in OUTPUTDIR/manifest.jsonl, and a rerun only
+translates the files which are not, see common.checkpoint. --restart
+translates everything again.
+
+Usage: python -m tiger.batch [-j JOBS] [--ogr2osm CMD] [--restart] INPUTDIR OUTPUTDIR
+
+The ogr2osm command defaults to the OGR2OSM environment variable or
+'ogr2osm.py' on the PATH.
+'''
+
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+from common import checkpoint
+
+# Input file name pattern, translation module and merged output name
+LAYERS = [
+    ('tl_*_county.shp', 'tiger.us_county', 'county'),
+    ('tl_*_place.shp', 'tiger.places', 'place'),
+    ('tl_*_cousub.shp', 'tiger.cousub', 'cousub'),
+    ('tl_*_edges.shp', 'tiger.edges', 'edges'),
+]
+
+# Directory containing the tiger package, added to the translation PYTHONPATH
+TRANSLATIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_inputs(root):
+    """Return a list of (layer, translation, path) for TIGER files under root."""
+    inputs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            for (pattern, translation, layer) in LAYERS:
+                if fnmatch.fnmatch(filename.lower(), pattern):
+                    inputs.append((layer, translation, os.path.join(dirpath, filename)))
+                    break
+    return inputs
+
+
+def translate(job):
+    """Run ogr2osm on a single file, return (source, output, returncode)."""
+    (command, translation, source, output) = job
+    env = dict(os.environ)
+    # Every job writes its own output and statistics files
+    env.pop('OGR2OSM_SINK', None)
+    if env.get('OGR2OSM_STATS'):
+        env['OGR2OSM_STATS'] = output + os.path.splitext(env['OGR2OSM_STATS'])[1]
+    env['PYTHONPATH'] = os.pathsep.join(
+        [TRANSLATIONS_DIR] + [p for p in [env.get('PYTHONPATH')] if p])
+    args = command + ['-f', '-t', translation, '-o', output, source]
+    with open(output + '.log', 'w') as log:
+        returncode = subprocess.call(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return (source, output, returncode)
+
+
+def dedup_key(tags):
+    """Return the key identifying a feature repeated across input files."""
+    if 'tiger:tlid' in tags:
+        return ('tlid', tags['tiger:tlid'])
+    if 'boundary' in tags and 'nist:fips_code' in tags:
+        return ('fips', tags['boundary'], tags.get('admin_level'), tags['nist:fips_code'])
+    return None
+
+
+def _tags(elem):
+    return dict((tag.get('k'), tag.get('v')) for tag in elem.findall('tag'))
+
+
+def merge_osm(paths, outpath):
+    """
+    Merge ogr2osm output files to outpath, dropping repeated features.
+
+    Element ids of every file are renumbered from a common negative counter,
+    and untagged nodes with the coordinates of a node already written get
+    its id. Returns the number of dropped ways and relations and the number
+    of merged nodes.
+    """
+    seen = set()
+    dropped = 0
+    merged = 0
+    # New id of the untagged node written at each (lat, lon)
+    nodeids = {}
+    nextid = [-1]
+    tmpdir = tempfile.mkdtemp(prefix='tiger-merge-')
+    try:
+        parts = [open(os.path.join(tmpdir, name), 'w+b')
+                 for name in ('node', 'way', 'relation')]
+        for path in paths:
+            root = ET.parse(path).getroot()
+            nodes = root.findall('node')
+            ways = root.findall('way')
+            relations = root.findall('relation')
+
+            # Drop repeated relations and ways, and the untagged member ways
+            # of dropped relations
+            keptrelations = []
+            droppedmembers = set()
+            for rel in relations:
+                key = dedup_key(_tags(rel))
+                if key is not None and key in seen:
+                    dropped += 1
+                    droppedmembers.update(m.get('ref') for m in rel.findall('member')
+                                          if m.get('type') == 'way')
+                    continue
+                if key is not None:
+                    seen.add(key)
+                keptrelations.append(rel)
+            keptmembers = set(m.get('ref') for rel in keptrelations
+                              for m in rel.findall('member') if m.get('type') == 'way')
+            keptways = []
+            for way in ways:
+                tags = _tags(way)
+                key = dedup_key(tags)
+                if key is not None and key in seen:
+                    dropped += 1
+                    continue
+                if not tags and way.get('id') in droppedmembers \
+                        and way.get('id') not in keptmembers:
+                    continue
+                if key is not None:
+                    seen.add(key)
+                keptways.append(way)
+
+            # Drop the untagged nodes left without a parent
+            usednodes = set(nd.get('ref') for way in keptways for nd in way.findall('nd'))
+            usednodes.update(m.get('ref') for rel in keptrelations
+                             for m in rel.findall('member') if m.get('type') == 'node')
+            keptnodes = [node for node in nodes
+                         if node.get('id') in usednodes or node.find('tag') is not None]
+
+            # Renumber and write out, pointing the references to a merged
+            # node to the node already written
+            newids = {}
+            newnodes = []
+            for node in keptnodes:
+                key = None
+                if node.find('tag') is None:
+                    key = (node.get('lat'), node.get('lon'))
+                    if key in nodeids:
+                        newids[('node', node.get('id'))] = nodeids[key]
+                        merged += 1
+                        continue
+                newids[('node', node.get('id'))] = str(nextid[0])
+                if key is not None:
+                    nodeids[key] = str(nextid[0])
+                nextid[0] -= 1
+                newnodes.append(node)
+            keptnodes = newnodes
+            for (kind, elems) in (('way', keptways), ('relation', keptrelations)):
+                for elem in elems:
+                    newids[(kind, elem.get('id'))] = str(nextid[0])
+                    nextid[0] -= 1
+            for (part, elems) in zip(parts, (keptnodes, keptways, keptrelations)):
+                for elem in elems:
+                    elem.set('id', newids[(elem.tag, elem.get('id'))])
+                    for nd in elem.findall('nd'):
+                        nd.set('ref', newids[('node', nd.get('ref'))])
+                    for member in elem.findall('member'):
+                        ref = (member.get('type'), member.get('ref'))
+                        if ref in newids:
+                            member.set('ref', newids[ref])
+                        else:
+                            elem.remove(member)
+                    elem.tail = None
+                    part.write(ET.tostring(elem) + b'\n')
+
+        with open(outpath, 'wb') as out:
+            out.write(b'<?xml version="1.0"?>\n'
+                      b'<osm version="0.6" upload="false" generator="tiger.batch">\n')
+            for part in parts:
+                part.seek(0)
+                shutil.copyfileobj(part, out)
+                part.close()
+            out.write(b'</osm>\n')
+    finally:
+        shutil.rmtree(tmpdir)
+    return (dropped, merged)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Translate and merge a tree of TIGER files.')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of parallel ogr2osm processes')
+    parser.add_argument('--ogr2osm', default=os.environ.get('OGR2OSM', 'ogr2osm.py'),
+                        help='Command used to run ogr2osm')
+    parser.add_argument('--restart', action='store_true',
+                        help='Translate every file, also those finished by an earlier run')
+    parser.add_argument('inputdir')
+    parser.add_argument('outputdir')
+    args = parser.parse_args(argv)
+
+    sharddir = os.path.join(args.outputdir, 'shards')
+    if not os.path.isdir(sharddir):
+        os.makedirs(sharddir)
+    command = shlex.split(args.ogr2osm)
+    inputs = find_inputs(args.inputdir)
+    manifest = checkpoint.Manifest(os.path.join(args.outputdir, 'manifest.jsonl'))
+    if args.restart:
+        manifest.remove()
+    jobs = []
+    keys = {}
+    layers = {}
+    for (layer, translation, source) in inputs:
+        name = os.path.splitext(os.path.relpath(source, args.inputdir))[0]
+        output = os.path.join(sharddir, name.replace(os.sep, '_') + '.osm')
+        keys[output] = checkpoint.job_key(source, translation)
+        if not manifest.done(keys[output], output):
+            jobs.append((command, translation, source, output))
+        layers.setdefault(layer, []).append(output)
+    if len(jobs) < len(inputs):
+        sys.stdout.write('Resuming, %d of %d files already translated\n'
+                         % (len(inputs) - len(jobs), len(inputs)))
+
+    failed = set()
+    pool = multiprocessing.Pool(args.jobs)
+    try:
+        for (source, output, returncode) in pool.imap_unordered(translate, jobs):
+            if returncode != 0:
+                sys.stderr.write('Translating %s failed, see %s.log\n' % (source, output))
+                failed.add(output)
+            else:
+                manifest.record(keys[output], output)
+    finally:
+        pool.close()
+        pool.join()
+        manifest.close()
+
+    for (pattern, translation, layer) in LAYERS:
+        paths = [p for p in layers.get(layer, []) if p not in failed]
+        if not paths:
+            continue
+        outpath = os.path.join(args.outputdir, 'tiger_%s.osm' % layer)
+        (dropped, merged) = merge_osm(paths, outpath)
+        sys.stdout.write('%s: merged %d files, dropped %d repeated features, '
+                         'merged %d shared nodes\n' % (outpath, len(paths), dropped, merged))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
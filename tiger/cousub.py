@@ -0,0 +1,40 @@
+'''
+A translation function for TIGER 2012 county subdivisions
+
+Functioning minor civil divisions (FUNCSTAT A) are tagged as admin_level 7
+boundaries, census county divisions and unorganized territories as census
+boundaries.
+'''
+
+from common import reproject, sink, stats
+from tiger import fips
+
+def filterTags(attrs):
+    if not attrs:
+        return
+    stats.count(attrs.get('FUNCSTAT'))
+    tags = {}
+    if attrs.get('FUNCSTAT', 'A') == 'A':
+        tags['boundary'] = 'administrative'
+        tags['admin_level'] = '7'
+    else:
+        tags['boundary'] = 'census'
+    # Names
+    if 'NAME' in attrs:
+        tags['name'] = attrs['NAME']
+    if 'NAMELSAD' in attrs:
+        tags['official_name'] = attrs['NAMELSAD']
+
+    # FIPS codes
+    fips.fips_tags(attrs, fips.COUSUB_FIELDS, tags)
+
+    return tags
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    stats.output(geometries, features)
+    sink.output(geometries, features)
+    stats.report()
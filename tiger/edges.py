@@ -0,0 +1,92 @@
+'''
+A translation function for TIGER 2012 all lines (edges)
+
+Only road and rail edges are kept, hydrography and boundary-only edges are
+covered by other layers. Edges along a county line are present in the files
+of both counties and share the same TLID, which is kept as tiger:tlid so the
+batch driver can drop the duplicate.
+
+The county FIPS code of each edge is kept as tiger:county_fips.
+'''
+
+from common import reproject, sink, stats
+from tiger import fips
+
+# MAF/TIGER Feature Class Code to OSM tags
+mtfcclookup = {
+    'S1100':{'highway':'motorway'},
+    'S1200':{'highway':'primary'},
+    'S1400':{'highway':'residential'},
+    'S1500':{'highway':'track'},
+    'S1630':{'highway':'motorway_link'},
+    'S1640':{'highway':'service'},
+    'S1710':{'highway':'footway'},
+    'S1720':{'highway':'steps'},
+    'S1730':{'highway':'service', 'service':'alley'},
+    'S1740':{'highway':'service'},
+    'S1750':{'highway':'road'},
+    'S1780':{'highway':'service', 'service':'parking_aisle'},
+    'S1820':{'highway':'cycleway'},
+    'S1830':{'highway':'bridleway'},
+
+    'R1011':{'railway':'rail'},
+    'R1051':{'railway':'light_rail'},
+    'R1052':{'railway':'funicular'},
+}
+
+affixlookup = {
+    'Ave':'Avenue',
+    'Rd':'Road',
+    'St':'Street',
+    'Pl':'Place',
+    'Cir':'Circle',
+    'Blvd':'Boulevard',
+    'Dr':'Drive',
+    'Ln':'Lane',
+    'Ct':'Court',
+    'Hwy':'Highway',
+    'Pkwy':'Parkway',
+    'Trl':'Trail',
+
+    'E':'East',
+    'S':'South',
+    'N':'North',
+    'W':'West'
+}
+
+def filterFeature(ogrfeature, fieldNames, reproject):
+    if not ogrfeature: return
+
+    index = ogrfeature.GetFieldIndex('MTFCC')
+    if index >= 0:
+        stats.count(ogrfeature.GetField(index))
+        if ogrfeature.GetField(index) not in mtfcclookup:
+            return None
+    return ogrfeature
+
+def filterTags(attrs):
+    if not attrs:
+        return
+    tags = dict(mtfcclookup.get(attrs.get('MTFCC'), {}))
+
+    if attrs.get('FULLNAME'):
+        tags['name'] = ' '.join([affixlookup.get(part, part) for part in attrs['FULLNAME'].split()])
+
+    if 'TLID' in attrs:
+        tags['tiger:tlid'] = attrs['TLID'].strip()
+
+    # FIPS codes
+    county = fips.fips_code(attrs, fips.COUNTY_FIELDS)
+    if county:
+        tags['tiger:county_fips'] = county
+
+    return tags
+
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    stats.output(geometries, features)
+    sink.output(geometries, features)
+    stats.report()
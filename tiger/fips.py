@@ -0,0 +1,158 @@
+'''
+Shared FIPS code handling for the TIGER translations
+
+TIGER layers carry their FIPS codes split over several fixed-width string
+fields (STATEFP, COUNTYFP, PLACEFP, COUSUBFP). The full code of an entity is
+the concatenation of the fields in hierarchical order.
+
+State and county codes are checked against the reference table fips.dat
+(see tiger/fipstable.py), which is memory-mapped on first use. Entries are
+keyed by the integer state * 1000 + county, states have county 0. County
+codes are only checked when the table has county rows.
+'''
+
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import sys
+
+# FIPS code fields of each entity type, in the order they are concatenated
+COUNTY_FIELDS = ('STATEFP', 'COUNTYFP')
+PLACE_FIELDS = ('STATEFP', 'PLACEFP')
+COUSUB_FIELDS = ('STATEFP', 'COUNTYFP', 'COUSUBFP')
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fips.dat')
+
+# Reference table, loaded by _load()
+_keys = None
+_offsets = None
+_names = None
+_hascounties = False
+# Decoded names by key
+_namecache = {}
+# Integer value of each FIPS code field string seen, None if not a number
+_codes = {}
+# FIPS tags and table name of counties by key state * 1000 + county
+_tagcache = {}
+
+
+def _load():
+    global _keys, _offsets, _names, _hascounties
+    with open(DATA_PATH, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:4] != b'FIPS':
+        raise ValueError('%s is not a FIPS table' % DATA_PATH)
+    n = array('I', data[4:8])
+    if sys.byteorder == 'big':
+        n.byteswap()
+    n = n[0]
+    keys = array('I', data[8:8 + 4 * n])
+    offsets = array('I', data[8 + 4 * n:12 + 8 * n])
+    if sys.byteorder == 'big':
+        keys.byteswap()
+        offsets.byteswap()
+    _hascounties = any(key % 1000 for key in keys)
+    _names = (data, 12 + 8 * n)
+    _offsets = offsets
+    _keys = keys
+
+
+def lookup(key):
+    """Return the name of integer FIPS key state * 1000 + county, or None."""
+    name = _namecache.get(key)
+    if name is not None:
+        return name
+    if _keys is None:
+        _load()
+    i = bisect_left(_keys, key)
+    if i == len(_keys) or _keys[i] != key:
+        return None
+    (data, base) = _names
+    name = data[base + _offsets[i]:base + _offsets[i + 1]].decode('utf-8')
+    _namecache[key] = name
+    return name
+
+
+def fips_code(attrs, fields):
+    """Return the FIPS code built from fields, or None if any is missing."""
+    code = ''
+    for field in fields:
+        value = attrs.get(field)
+        if not value:
+            return None
+        code = code + value.strip()
+    return code
+
+
+def _code(value):
+    """Return the integer value of FIPS code field string value, or None."""
+    try:
+        return _codes[value]
+    except KeyError:
+        pass
+    try:
+        code = int(value)
+    except (TypeError, ValueError):
+        code = None
+    _codes[value] = code
+    return code
+
+
+def _fips_tags(attrs, fields):
+    """Return the FIPS tags of an entity and its name in the table."""
+    tags = {}
+    if 'STATEFP' not in attrs:
+        return (tags, None)
+    tags['nist:state_fips'] = attrs['STATEFP']
+    code = fips_code(attrs, fields)
+    if code:
+        tags['nist:fips_code'] = code
+    state = _code(attrs['STATEFP'])
+    statename = lookup(state * 1000) if state is not None else None
+    if statename is None:
+        tags['fixme'] = 'Unknown state FIPS code %s' % attrs['STATEFP']
+        return (tags, None)
+    tags['is_in:state'] = statename
+
+    name = None
+    if fields == COUNTY_FIELDS:
+        county = _code(attrs.get('COUNTYFP'))
+        if county is None:
+            return (tags, None)
+        key = state * 1000 + county
+        name = lookup(key) if county else None
+        if name is None and (_hascounties or county == 0):
+            tags['fixme'] = 'Unknown county FIPS code %05d' % key
+            return (tags, None)
+        tags['nist:fips_code'] = '%05d' % key
+    return (tags, name)
+
+
+def fips_tags(attrs, fields, tags=None, fallback_name=False):
+    """
+    Add the nist:state_fips, nist:fips_code and is_in:state tags for an entity.
+
+    Unknown state or county codes are tagged with fixme alongside the nist
+    tags. When fallback_name is set, the county name from the table is used
+    as name if the feature has none.
+    """
+    if tags is None:
+        tags = {}
+    if fields == COUNTY_FIELDS:
+        # Features of the same county get the same tags, so they are computed
+        # once per key. The field strings are converted to integers once.
+        try:
+            cached = _tagcache[_codes[attrs['STATEFP']] * 1000 + _codes[attrs['COUNTYFP']]]
+        except (KeyError, TypeError):
+            cached = _fips_tags(attrs, fields)
+            state = _code(attrs.get('STATEFP'))
+            county = _code(attrs.get('COUNTYFP'))
+            if state is not None and county is not None:
+                _tagcache[state * 1000 + county] = cached
+    else:
+        cached = _fips_tags(attrs, fields)
+    tags.update(cached[0])
+    if fallback_name and cached[1] is not None and 'name' not in tags:
+        tags['name'] = cached[1]
+    return tags
@@ -0,0 +1,138 @@
+'''
+Builder for the FIPS reference table tiger/fips.dat used by tiger.fips
+
+The table always contains the states and state equivalents listed below.
+County rows are added from the Census Bureau national_county.txt file, with
+lines of the form
+
+    AL,01,001,Autauga County,H1
+
+Usage: python -m tiger.fipstable [national_county.txt]
+
+Table layout, all integers are unsigned 32-bit little endian:
+
+    b'FIPS', record count n
+    n keys, sorted, state * 1000 + county (county 0 for states)
+    n + 1 offsets into the name block
+    UTF-8 name block
+'''
+
+import io
+import os
+import struct
+import sys
+
+# State FIPS code, name
+STATES = [
+    (1, 'Alabama'),
+    (2, 'Alaska'),
+    (4, 'Arizona'),
+    (5, 'Arkansas'),
+    (6, 'California'),
+    (8, 'Colorado'),
+    (9, 'Connecticut'),
+    (10, 'Delaware'),
+    (11, 'District of Columbia'),
+    (12, 'Florida'),
+    (13, 'Georgia'),
+    (15, 'Hawaii'),
+    (16, 'Idaho'),
+    (17, 'Illinois'),
+    (18, 'Indiana'),
+    (19, 'Iowa'),
+    (20, 'Kansas'),
+    (21, 'Kentucky'),
+    (22, 'Louisiana'),
+    (23, 'Maine'),
+    (24, 'Maryland'),
+    (25, 'Massachusetts'),
+    (26, 'Michigan'),
+    (27, 'Minnesota'),
+    (28, 'Mississippi'),
+    (29, 'Missouri'),
+    (30, 'Montana'),
+    (31, 'Nebraska'),
+    (32, 'Nevada'),
+    (33, 'New Hampshire'),
+    (34, 'New Jersey'),
+    (35, 'New Mexico'),
+    (36, 'New York'),
+    (37, 'North Carolina'),
+    (38, 'North Dakota'),
+    (39, 'Ohio'),
+    (40, 'Oklahoma'),
+    (41, 'Oregon'),
+    (42, 'Pennsylvania'),
+    (44, 'Rhode Island'),
+    (45, 'South Carolina'),
+    (46, 'South Dakota'),
+    (47, 'Tennessee'),
+    (48, 'Texas'),
+    (49, 'Utah'),
+    (50, 'Vermont'),
+    (51, 'Virginia'),
+    (53, 'Washington'),
+    (54, 'West Virginia'),
+    (55, 'Wisconsin'),
+    (56, 'Wyoming'),
+    (60, 'American Samoa'),
+    (66, 'Guam'),
+    (69, 'Northern Mariana Islands'),
+    (72, 'Puerto Rico'),
+    (74, 'U.S. Minor Outlying Islands'),
+    (78, 'United States Virgin Islands'),
+]
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fips.dat')
+
+
+def read_counties(path, encoding='latin-1'):
+    """Return a list of (key, name) from a Census national_county.txt file."""
+    counties = []
+    with io.open(path, encoding=encoding) as f:
+        for line in f:
+            fields = line.strip().split(',')
+            if len(fields) < 4:
+                continue
+            counties.append((int(fields[1]) * 1000 + int(fields[2]), fields[3]))
+    return counties
+
+
+def write_table(records, path=DATA_PATH):
+    """Write (key, name) records to a FIPS table file."""
+    records = sorted(dict(records).items())
+    names = [name.encode('utf-8') for (key, name) in records]
+    offsets = [0]
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    n = len(records)
+    with open(path, 'wb') as f:
+        f.write(b'FIPS' + struct.pack('<I', n))
+        f.write(struct.pack('<%dI' % n, *[key for (key, name) in records]))
+        f.write(struct.pack('<%dI' % (n + 1), *offsets))
+        f.write(b''.join(names))
+
+
+def read_table(path=DATA_PATH):
+    """Return the (key, name) records of a FIPS table file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    (n,) = struct.unpack('<I', data[4:8])
+    keys = struct.unpack('<%dI' % n, data[8:8 + 4 * n])
+    offsets = struct.unpack('<%dI' % (n + 1), data[8 + 4 * n:12 + 8 * n])
+    names = data[12 + 8 * n:]
+    return [(keys[i], names[offsets[i]:offsets[i + 1]].decode('utf-8')) for i in range(n)]
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    records = [(state * 1000, name) for (state, name) in STATES]
+    for path in argv:
+        records.extend(read_counties(path))
+    write_table(records)
+    sys.stdout.write('Wrote %d records to %s\n' % (len(records), DATA_PATH))
+
+
+if __name__ == '__main__':
+    main()
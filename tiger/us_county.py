@@ -2,9 +2,13 @@
 A translation function for TIGER 2012 counties
 '''
 
+from common import reproject, sink, stats, topology
+from tiger import fips
+
 def filterTags(attrs):
     if not attrs:
         return
+    stats.count(attrs.get('CLASSFP'))
     tags = {}
     tags['boundary'] = 'administrative'
     tags['admin_level'] = '6'
@@ -15,9 +19,17 @@ def filterTags(attrs):
         tags['official_name'] = attrs['NAMELSAD']
 
     # FIPS codes
-    if 'STATEFP' in attrs:
-        tags['nist:state_fips'] = attrs['STATEFP']
-        if 'COUNTYFP' in attrs:
-            tags['nist:fips_code'] = attrs['STATEFP'] + attrs['COUNTYFP']
+    fips.fips_tags(attrs, fips.COUNTY_FIELDS, tags, fallback_name=True)
+
+    return tags
 
-    return tags
\ No newline at end of file
+
+def preOutputTransform(geometries, features):
+    if geometries is None and features is None:
+        return
+    reproject.reproject(geometries)
+    # Write the borders shared by adjacent polygons only once
+    topology.build(geometries, features)
+    stats.output(geometries, features)
+    sink.output(geometries, features)
+    stats.report()
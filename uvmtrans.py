@@ -1,36 +1,61 @@
 from osgeo import ogr
-import re
-import urllib
 import json
+import logging as l
+import math
 
+from common import compat, nodes, reproject, stats, tiles, warn
+
+# (feature, layer, text, wkb, envelope) of the features kept, see uvmrecord()
 uvmfeatures = []
 
 def filterLayer(layer):
     if layer is None:
         return None
-    print layer.GetName()
-    return layer
+    l.debug("Processing layer '%s'", layer.GetName())
+    stats.layer(layer.GetName())
+    return tiles.filter_layer(layer)
 
 def filterFeature(ogrfeature, fieldNames, reproject):
     if ogrfeature is None:
         return
+    if not tiles.owns(ogrfeature):
+        return
     layer = ogrfeature.GetFieldAsString("Layer")
     if (layer == "VA-BLDG-UVM" or
         layer == "VA-BLDG-NON UVM"):
+        stats.count(layer)
         return ogrfeature
     elif (layer == "VA-BLDG-ATTRIBUTES" and len(ogrfeature.GetFieldAsString("Text")) == 4):
         # Ignore CFC Soccer Stands - has no building outline
         if ogrfeature.GetFieldAsString("Text") == "0979":
+            stats.count("dropped")
             return
+        stats.count(layer)
         return ogrfeature
     else:
+        stats.count("dropped")
         return
 
 def filterFeaturePost(feature, ogrfeature, ogrgeometry):
     if feature is None and ogrfeature is None and ogrgeometry is None:
         return
-    global uvmfeatures
-    uvmfeatures.append((feature, ogrfeature, ogrgeometry))
+    uvmfeatures.append(uvmrecord(feature, ogrfeature, ogrgeometry))
+
+def uvmrecord(feature, ogrfeature, ogrgeometry):
+    # Keep the geometry as WKB bytes and its envelope instead of the OGR
+    # objects, the geometry is rebuilt only for the distance tests needing it
+    if ogrgeometry is None:
+        (wkb, envelope) = (None, None)
+    else:
+        (wkb, envelope) = (bytes(ogrgeometry.ExportToWkb()), ogrgeometry.GetEnvelope())
+    return (feature, ogrfeature.GetFieldAsString("Layer"), ogrfeature.GetFieldAsString("Text"),
+            wkb, envelope)
+
+def envelopedistance(a, b):
+    """Lower bound of the distance of geometries with envelopes a and b."""
+    dx = max(a[0] - b[1], b[0] - a[1], 0.0)
+    dy = max(a[2] - b[3], b[2] - a[3], 0.0)
+    return math.hypot(dx, dy)
 
 def filterTags(tags):
     if tags is None:
@@ -48,32 +73,43 @@ def filterTags(tags):
 def preOutputTransform(geometries, features):
     if geometries is None and features is None:
         return
-    global uvmfeatures
-    buildingcodes = [(feature, ogrfeature, ogrgeometry) for (feature, ogrfeature, ogrgeometry) in uvmfeatures if ogrfeature.GetFieldAsString("Layer") == "VA-BLDG-ATTRIBUTES"]
-    buildings = [x for x in uvmfeatures if x not in buildingcodes]
+    reproject.reproject(geometries)
+    # Features without a geometry have no distance to match on
+    located = [record for record in uvmfeatures if record[3] is not None]
+    buildingcodes = [record for record in located if record[1] == "VA-BLDG-ATTRIBUTES"]
+    buildings = [record for record in located if record[1] != "VA-BLDG-ATTRIBUTES"]
     # Match each code to the closest building, setting the building's feature's
     # name
-    for (codef, codeogrf, codeogrg) in buildingcodes:
+    for (codef, codelayer, buildingid, codewkb, codeenvelope) in buildingcodes:
+        codeogrg = ogr.CreateGeometryFromWkb(codewkb)
+        # Buildings by the distance of their envelopes, which is at most the
+        # distance of the buildings, ties kept in input order
+        candidates = sorted((envelopedistance(codeenvelope, building[4]), n)
+                            for (n, building) in enumerate(buildings))
         dist = float("inf")
-        chosenfeature = (None, None, None)
-        for (bldgf, bldgogrf, bldgogrg) in buildings:
-            newdist = codeogrg.Distance(bldgogrg)
-            if newdist < dist:
+        chosen = None
+        for (bound, n) in candidates:
+            if bound > dist:
+                break
+            newdist = codeogrg.Distance(ogr.CreateGeometryFromWkb(buildings[n][3]))
+            if chosen is None or newdist < dist or (newdist == dist and n < chosen):
                 dist = newdist
-                chosenfeature = (bldgf, bldgogrf, bldgogrg)
-        (bldgf, bldgogrf, bldgogrg) = chosenfeature
-        buildingid = codeogrf.GetFieldAsString("Text")
-        if bldgf.tags.has_key("uvm:buildingid") and bldgf.tags["uvm:buildingid"] != buildingid:
-            print "WARNING: buildingid overlap detected! " + bldgf.tags["uvm:buildingid"] + " " + buildingid
+                chosen = n
+        if chosen is None:
+            warn.warn('buildingid', "No building found for buildingid %s", buildingid)
+            continue
+        bldgf = buildings[chosen][0]
+        if "uvm:buildingid" in bldgf.tags and bldgf.tags["uvm:buildingid"] != buildingid:
+            warn.warn('buildingid', "buildingid overlap detected! %s %s", bldgf.tags["uvm:buildingid"], buildingid)
         bldgf.tags["uvm:buildingid"] = buildingid
-        page = urllib.urlopen("http://www-dev.uvm.edu/~aguertin/webteam/map/famis/getbldgname.php?BLDG="+buildingid)
-        name = page.read()
-        page.close
+        page = compat.urlopen("http://www-dev.uvm.edu/~aguertin/webteam/map/famis/getbldgname.php?BLDG="+buildingid)
+        name = page.read().decode('utf-8')
+        page.close()
         bldgf.tags["name"] = name
 
     # Remove the building code nodes
     for feature in [f for f in features if f.tags["Layer"] == "VA-BLDG-ATTRIBUTES"]:
-        print "Removing a text node: " + feature.tags["Text"]
+        warn.warn('text', "Removing a text node: %s", feature.tags["Text"])
         features.remove(feature)
         feature.geometry.removeparent(feature)
     
@@ -87,16 +123,24 @@ def preOutputTransform(geometries, features):
                     try:
                         point.removeparent(feature.geometry)
                     except:
-                        print "What went wrong here???"
+                        warn.warn('removal', "What went wrong here???")
             except:
-                print "Failed -- geometry.points does not exist -- not a way"
+                warn.warn('removal', "Failed -- geometry.points does not exist -- not a way")
         except:
-            print "Failed -- two building features with same geometry??"
+            warn.warn('removal', "Failed -- two building features with same geometry??")
 
     uvmjson(geometries, features)
+    warn.flush()
+    nodes.merge(geometries, features)
+    tiles.stable_ids(geometries, features)
+    stats.output(geometries, features)
+    stats.report()
+
+def reset():
+    del uvmfeatures[:]
 
 def uvmjson(geometries, features):
-    print "IN UVMJSON"
+    l.debug("Writing the buildings to /tmp/uvmbuildings.json")
     buildings = [building for building in features if "uvm:buildingid" in building.tags]
     outbuildings = []
     for building in buildings:
@@ -104,8 +148,7 @@ def uvmjson(geometries, features):
         outbuilding["id"] = building.tags["uvm:buildingid"]
         outbuilding["geometry"] = []
         if str(type(building.geometry)) != "<class '__main__.Way'>":
-            print "WARNING: building not way, being ignored!"
-            print str(type(building.geometry))
+            warn.warn('uvmjson', "building not way, being ignored! %s", str(type(building.geometry)))
         else:
             for point in building.geometry.points:
                 outbuilding["geometry"].append({"x": point.x, "y": point.y})